@@ -0,0 +1,105 @@
+"""
+Measure per-request scheduling overhead of Crawler.get_extra_info.
+
+Pages are served instantly from memory, so the numbers are dominated by task
+creation and scheduling rather than network or parsing. "shared cache" is a
+later query of a batch worker enriching repositories an earlier query of the
+worker already fetched. Run from the repository root:
+
+    python -m benchmarks.bench_scheduling [--records N] [--rounds R]
+"""
+
+import argparse
+import time
+
+from github_crawler.crawler import Crawler
+from github_crawler.loops import LOOP_BACKENDS, enable_eager_tasks, run_with_loop
+
+
+class FakeResponse:
+    text = "<html><body></body></html>"
+
+
+async def fetch_instant(url: str, params: dict | None = None, **kwargs) -> FakeResponse:
+    return FakeResponse()
+
+
+async def sequential(crawler: Crawler, records: list[dict]) -> None:
+    """Baseline: await each page in turn, no tasks at all"""
+    for record in records:
+        await crawler.fetch_and_parse_page(record)
+
+
+def make_crawler(extra_cache: dict | None = None) -> Crawler:
+    crawler = Crawler(
+        keywords=["bench"],
+        search_type="Repositories",
+        proxy="http://127.0.0.1:9",
+        with_extra=True,
+        fields=["owner"],
+        extra_cache=extra_cache,
+    )
+    crawler.fetch_url = fetch_instant
+    return crawler
+
+
+async def measure(mode: str, eager: bool, records_count: int, rounds: int) -> float:
+    """Best per-request time in microseconds over the rounds"""
+    if eager and not enable_eager_tasks():
+        return float("nan")
+
+    best = float("inf")
+    for _ in range(rounds):
+        urls = [f"https://github.com/owner/repo{i}" for i in range(records_count)]
+        if mode == "shared cache":
+            # An earlier query of the worker fetched the same pages
+            extra_cache = {}
+            earlier = make_crawler(extra_cache)
+            await earlier.get_extra_info([{"url": url} for url in urls])
+            await earlier.aclose()
+            crawler = make_crawler(extra_cache)
+        else:
+            crawler = make_crawler()
+        records = [{"url": url} for url in urls]
+
+        start = time.perf_counter()
+        if mode == "sequential":
+            await sequential(crawler, records)
+        else:
+            await crawler.get_extra_info(records)
+        best = min(best, time.perf_counter() - start)
+        await crawler.aclose()
+
+    return best / records_count * 1e6
+
+
+def available_backends() -> list[str]:
+    backends = ["asyncio"]
+    try:
+        import uvloop  # noqa: F401
+
+        backends.append("uvloop")
+    except ImportError:
+        pass
+    return [b for b in LOOP_BACKENDS if b in backends]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--records", type=int, default=5000)
+    p.add_argument("--rounds", type=int, default=5)
+    a = p.parse_args()
+
+    print(f"{'loop':<8} {'tasks':<8} {'mode':<12} {'us/request':>10}")
+    for backend in available_backends():
+        for eager in (False, True):
+            for mode in ("sequential", "gather", "shared cache"):
+                per_request = run_with_loop(
+                    measure(mode, eager, a.records, a.rounds), backend
+                )
+                tasks = "eager" if eager else "default"
+                print(f"{backend:<8} {tasks:<8} {mode:<12} {per_request:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,19 +6,96 @@ import argparse
 import asyncio
 import logging
 
+from github_crawler.aggregate import LanguageAggregator, require_numpy
+from github_crawler.archive import WarcWriter
+from github_crawler.cache import FRESH, QueryCache, query_key
 from github_crawler.crawler import Crawler
-from github_crawler.settings import SEARCH_TYPES
-from github_crawler.utils import normalize_proxy
+from github_crawler.extractors import get_fields
+from github_crawler.loops import (
+    LOOP_BACKENDS,
+    enable_eager_tasks,
+    get_loop_factory,
+    run_with_loop,
+)
+from github_crawler.owners import OwnerProfiles
+from github_crawler.profiling import Profiler
+from github_crawler.proxies import ProxyPool, preflight_proxies
+from github_crawler.redirects import RedirectMap
+from github_crawler.reparse import reparse_archive
+from github_crawler.seen import SeenFilter
+from github_crawler.settings import (
+    SEARCH_TYPES,
+    PROXY_HEALTH_URL,
+    SHARD_QUALIFIERS,
+    MAX_SEARCH_PAGES,
+    PROFILE_REPORT_PATH,
+    QUERY_CACHE_TTL,
+    OWNER_CACHE_TTL,
+    SEEN_CAPACITY,
+    SEEN_FP_RATE,
+)
+from github_crawler.utils import normalize_proxy, setup_logging
+from github_crawler.workers import run_batch
 
 
-def setup_logging(level: str = "INFO") -> None:
-    """Configure logging with proper formatting."""
-    logging.basicConfig(
-        level=getattr(logging, level.upper()),
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
+# Crawler options that make up the query cache key
+QUERY_KEY_FIELDS = [
+    "keywords",
+    "search_type",
+    "with_extra",
+    "pages",
+    "fields",
+    "shard_by",
+    "max_results",
+]
+
+
+def check_output_dir(p: argparse.ArgumentParser, path: str | None) -> None:
+    """Exit with a usage error if the directory of an output path does not exist"""
+    if path:
+        outdir = os.path.dirname(path) or "."
+        if not os.path.exists(outdir):
+            p.error(f"Output directory does not exist: {outdir}")
+
+
+def parse_reparse_args(argv: list[str] | None = None) -> tuple[dict, str | None]:
+    """
+    Parse CLI arguments of the reparse command.
+
+    Args:
+        argv: command line arguments list, without the command name
+
+    Returns: tuple of (config dict, output filename)
+    """
+    p = argparse.ArgumentParser(
+        prog="github_crawler reparse",
+        description="Re-parse a WARC archive of a previous crawl without network access",
+    )
+    p.add_argument("archive", help="Path to the WARC archive")
+    p.add_argument("--output", help="Optional output path for JSON results")
+    p.add_argument(
+        "--type", choices=SEARCH_TYPES, help="Only output results of this search type"
+    )
+    p.add_argument("--fields", nargs="+", help="Only extract these extra fields")
+    p.add_argument(
+        "--workers", type=int, help="Parser processes, defaults to one per core"
     )
 
+    a = p.parse_args(argv)
+
+    if not os.path.exists(a.archive):
+        p.error(f"Archive does not exist: {a.archive}")
+    check_output_dir(p, a.output)
+    if a.workers is not None and a.workers <= 0:
+        p.error("--workers must be a positive integer")
+
+    return {
+        "path": a.archive,
+        "fields": a.fields,
+        "workers": a.workers,
+        "search_type": a.type,
+    }, a.output
+
 
 def parse_and_normalize_args(argv: list[str] | None = None) -> tuple[dict, str | None]:
     """
@@ -39,12 +116,159 @@ def parse_and_normalize_args(argv: list[str] | None = None) -> tuple[dict, str |
         nargs="+",
         help="List of proxies in format host:port",
     )
-    p.add_argument("--keywords", required=True, nargs="+", help="Search keywords")
+    p.add_argument(
+        "--preflight",
+        action="store_true",
+        help="Probe all proxies at startup, drop dead ones and use the fastest",
+    )
+    p.add_argument(
+        "--health-url",
+        default=PROXY_HEALTH_URL,
+        help="URL requested through each proxy during preflight",
+    )
+    query_args = p.add_mutually_exclusive_group(required=True)
+    query_args.add_argument("--keywords", nargs="+", help="Search keywords")
+    query_args.add_argument(
+        "--queries",
+        help="File with a batch of queries, one line of space-separated keywords per query",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="With --queries: split the batch across this many processes",
+    )
     p.add_argument("--output", help="Optional output path for JSON results")
+    p.add_argument(
+        "--archive",
+        help="Tee raw responses into this gzip-compressed WARC file for later reparse",
+    )
+    p.add_argument(
+        "--cache-dir",
+        help="Cache query results in this directory; repeated queries differing only "
+        "in keyword order or case are served from it",
+    )
+    p.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=QUERY_CACHE_TTL,
+        help="Seconds cached results are fresh; stale results are returned and "
+        "refreshed in the background",
+    )
     p.add_argument(
         "--with-extra",
         action="store_true",
-        help="Repositories type only: include owner and language stats",
+        help="Fetch each result page and include extra fields (owner, language stats, "
+        "stars, issue state, ...)",
+    )
+    p.add_argument(
+        "--fields",
+        nargs="+",
+        help="With --with-extra: only extract these fields",
+    )
+    p.add_argument(
+        "--owner-profiles",
+        action="store_true",
+        help="With --with-extra: add the owner's profile (type, followers, location, "
+        "public repos), fetched once per distinct owner",
+    )
+    p.add_argument(
+        "--owner-cache-dir",
+        help="With --owner-profiles: persist owner profiles in this directory",
+    )
+    p.add_argument(
+        "--owner-cache-ttl",
+        type=float,
+        default=OWNER_CACHE_TTL,
+        help="Seconds persisted owner profiles are reused",
+    )
+    p.add_argument(
+        "--redirect-map",
+        help="Remember renamed and transferred repositories in this JSON file, so "
+        "later runs fetch them at their final URL without redirects",
+    )
+    p.add_argument(
+        "--seen-file",
+        help="With --with-extra: skip results enriched by earlier runs, remembered in "
+        "this compact filter file shared by runs and workers",
+    )
+    p.add_argument(
+        "--seen-capacity",
+        type=int,
+        default=SEEN_CAPACITY,
+        help="Number of URLs a new seen file is sized for",
+    )
+    p.add_argument(
+        "--seen-fp-rate",
+        type=float,
+        default=SEEN_FP_RATE,
+        help="False positive rate of a new seen file at capacity; a false positive "
+        "skips a result that was never enriched",
+    )
+    p.add_argument(
+        "--language-report",
+        action="store_true",
+        help="With --with-extra on repositories: aggregate language stats into a "
+        "report (top languages, shares, co-occurrence, percentiles); requires numpy",
+    )
+    p.add_argument(
+        "--pages",
+        type=int,
+        help=f"Search pages to fetch per query or shard (max {MAX_SEARCH_PAGES}); "
+        "defaults to 1, or all pages with --shard-by",
+    )
+    p.add_argument(
+        "--shard-by",
+        nargs="+",
+        choices=SHARD_QUALIFIERS,
+        help="Split queries over GitHub's result cap by these qualifiers, in order",
+    )
+    p.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run: event loop lag, slow callbacks and per-stage timings",
+    )
+    p.add_argument(
+        "--profile-report",
+        default=PROFILE_REPORT_PATH,
+        help="Path of the JSON profile report",
+    )
+    p.add_argument(
+        "--cprofile",
+        action="store_true",
+        help="With --profile: also capture cProfile function statistics",
+    )
+    p.add_argument(
+        "--tracemalloc",
+        action="store_true",
+        help="With --profile: also trace memory allocations",
+    )
+    p.add_argument(
+        "--profile-debug",
+        action="store_true",
+        help="With --profile: run the loop in asyncio debug mode to name slow callbacks; "
+        "inflates the reported timings",
+    )
+    p.add_argument(
+        "--loop",
+        choices=LOOP_BACKENDS,
+        default="asyncio",
+        help="Event loop implementation; uvloop requires the uvloop package",
+    )
+    p.add_argument(
+        "--eager-tasks",
+        action="store_true",
+        help="Run tasks eagerly so cached work finishes without scheduling (Python 3.12+)",
+    )
+    p.add_argument(
+        "--deadline",
+        type=float,
+        help="Time budget for the whole crawl in seconds; partial results are returned",
+    )
+    p.add_argument(
+        "--max-results",
+        type=int,
+        help="Stop after this many search results",
     )
 
     a = p.parse_args(argv)
@@ -54,44 +278,334 @@ def parse_and_normalize_args(argv: list[str] | None = None) -> tuple[dict, str |
     except ValueError as e:
         p.error(f"Invalid proxy format: {e}")
 
-    if a.output:
-        outdir = os.path.dirname(a.output) or "."
-        if not os.path.exists(outdir):
-            p.error(f"Output directory does not exist: {outdir}")
+    check_output_dir(p, a.output)
+    check_output_dir(p, a.archive)
+    if a.profile:
+        check_output_dir(p, a.profile_report)
+    elif a.cprofile or a.tracemalloc or a.profile_debug:
+        p.error("--cprofile, --tracemalloc and --profile-debug can only be used with --profile")
+
+    if a.fields:
+        if not a.with_extra:
+            p.error("--fields can only be used with --with-extra")
+        unknown = sorted(set(a.fields) - set(get_fields(a.type)))
+        if unknown:
+            p.error(
+                f"Unknown fields for {a.type}: {', '.join(unknown)}. "
+                f"Available: {', '.join(get_fields(a.type))}"
+            )
+
+    if a.language_report:
+        if not a.with_extra or a.type != "Repositories":
+            p.error("--language-report requires --with-extra and --type Repositories")
+        if a.fields and "language_stats" not in a.fields:
+            p.error("--language-report requires the language_stats field")
+        try:
+            require_numpy()
+        except RuntimeError as e:
+            p.error(str(e))
+
+    if a.owner_profiles and not a.with_extra:
+        p.error("--owner-profiles can only be used with --with-extra")
+    if a.owner_cache_dir and not a.owner_profiles:
+        p.error("--owner-cache-dir can only be used with --owner-profiles")
+    if a.owner_cache_ttl < 0:
+        p.error("--owner-cache-ttl must not be negative")
+
+    check_output_dir(p, a.redirect_map)
+
+    if a.seen_file:
+        if not a.with_extra:
+            p.error("--seen-file can only be used with --with-extra")
+        check_output_dir(p, a.seen_file)
+    if a.seen_capacity <= 0:
+        p.error("--seen-capacity must be a positive integer")
+    if not 0 < a.seen_fp_rate < 1:
+        p.error("--seen-fp-rate must be between 0 and 1")
+
+    queries = None
+    if a.queries:
+        try:
+            with open(a.queries, encoding="utf-8") as f:
+                queries = [line.split() for line in f if line.strip()]
+        except OSError as e:
+            p.error(f"Could not read queries file: {e}")
+        if not queries:
+            p.error(f"No queries in {a.queries}")
+
+    if a.workers < 1:
+        p.error("--workers must be a positive integer")
+    if a.workers > 1 and not a.queries:
+        p.error("--workers can only be used with --queries")
+    if a.queries:
+        for flag, value in [
+            ("--preflight", a.preflight),
+            ("--archive", a.archive),
+            ("--profile", a.profile),
+        ]:
+            if value:
+                p.error(f"{flag} cannot be combined with --queries")
+
+    if a.cache_ttl < 0:
+        p.error("--cache-ttl must not be negative")
+
+    if a.pages is not None and not 1 <= a.pages <= MAX_SEARCH_PAGES:
+        p.error(f"--pages must be between 1 and {MAX_SEARCH_PAGES}")
+
+    if a.deadline is not None and a.deadline <= 0:
+        p.error("--deadline must be a positive number of seconds")
 
-    if a.with_extra and a.type != "Repositories":
-        p.error("--with-extra can only be used with Repositories type")
+    if a.max_results is not None and a.max_results <= 0:
+        p.error("--max-results must be a positive integer")
 
     return {
         "keywords": a.keywords,
+        "queries": queries,
+        "workers": a.workers,
         "search_type": a.type,
         "proxies": normalized_proxies,
+        "preflight": a.preflight,
+        "loop": a.loop,
+        "health_url": a.health_url,
         "with_extra": a.with_extra,
+        "fields": a.fields,
+        "archive": a.archive,
+        "language_report": a.language_report,
+        "owner_profiles": {"directory": a.owner_cache_dir, "ttl": a.owner_cache_ttl}
+        if a.owner_profiles
+        else None,
+        "redirect_map": a.redirect_map,
+        "seen": {
+            "path": a.seen_file,
+            "capacity": a.seen_capacity,
+            "fp_rate": a.seen_fp_rate,
+        }
+        if a.seen_file
+        else None,
+        "eager_tasks": a.eager_tasks,
+        "cache": {"directory": a.cache_dir, "ttl": a.cache_ttl} if a.cache_dir else None,
+        "profile": {
+            "report": a.profile_report,
+            "cprofile": a.cprofile,
+            "trace_memory": a.tracemalloc,
+            "debug": a.profile_debug,
+        }
+        if a.profile
+        else None,
+        "deadline": a.deadline,
+        "max_results": a.max_results,
+        "pages": a.pages,
+        "shard_by": a.shard_by,
     }, a.output
 
 
 async def main(argv=None):
     setup_logging()
     logger = logging.getLogger(__name__)
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["reparse"]:
+        await reparse_main(argv[1:], logger)
+        return
+
     cfg, output_filename = parse_and_normalize_args(argv)
 
-    # Select proxy randomly
-    proxy = random.choice(cfg.pop("proxies"))
+    # The loop backend itself is selected in run() before the loop starts
+    loop_backend = cfg.pop("loop")
+    eager_tasks = cfg.pop("eager_tasks")
+    if eager_tasks and not enable_eager_tasks():
+        logger.warning("Eager task execution requires Python 3.12+, using regular tasks")
+
+    profile_cfg = cfg.pop("profile")
+    profile_report = profile_cfg.pop("report") if profile_cfg else None
+    profiler = Profiler(**profile_cfg, logger=logger) if profile_cfg else None
+    if profiler:
+        await profiler.start()
+    try:
+        queries = cfg.pop("queries")
+        workers = cfg.pop("workers")
+        if queries:
+            await crawl_batch(
+                cfg, queries, workers, loop_backend, output_filename, logger, eager_tasks
+            )
+        else:
+            await crawl(cfg, output_filename, logger, profiler)
+    finally:
+        if profiler:
+            await profiler.stop()
+            sys.stderr.write(profiler.summary())
+            profiler.write_report(profile_report)
+
+
+async def crawl_batch(
+    cfg: dict,
+    queries: list[list[str]],
+    workers: int,
+    loop_backend: str,
+    output_filename: str | None,
+    logger: logging.Logger,
+    eager_tasks: bool = False,
+) -> None:
+    """Run a batch of queries, possibly across worker processes, and write the merged results"""
+    cfg.pop("keywords")
+    proxies = cfg.pop("proxies")
+    cache = cfg.pop("cache")
+    language_report = cfg.pop("language_report")
+    seen = cfg.pop("seen")
+    owner_profiles = cfg.pop("owner_profiles")
+    redirect_map = cfg.pop("redirect_map")
+    for option in ("health_url", "preflight", "archive"):
+        cfg.pop(option)
+    try:
+        results, reports = await run_batch(
+            queries,
+            proxies,
+            cfg,
+            workers,
+            cache,
+            loop_backend,
+            logger,
+            language_report,
+            seen,
+            owner_profiles,
+            redirect_map,
+            eager_tasks,
+        )
+    except Exception as e:
+        logger.error(f"Batch execution failed: {type(e).__name__}: {e}")
+        return
+    write_results(
+        results, output_filename, logger, reports if language_report else None
+    )
+
+
+async def crawl(
+    cfg: dict,
+    output_filename: str | None,
+    logger: logging.Logger,
+    profiler: Profiler | None = None,
+) -> None:
+    """Pick a proxy, run the crawler and write its results"""
+    cache_cfg = cfg.pop("cache")
+    cache = QueryCache(**cache_cfg, logger=logger) if cache_cfg else None
+    aggregator = LanguageAggregator() if cfg.pop("language_report") else None
+    owner_cfg = cfg.pop("owner_profiles")
+    if cache:
+        # Fresh cache hits skip proxy selection entirely
+        query = {k: cfg[k] for k in QUERY_KEY_FIELDS}
+        query["owner_profiles"] = owner_cfg is not None
+        cached, state = cache.lookup(query_key(**query))
+        if state == FRESH:
+            logger.info("Query cache hit")
+            report = None
+            if aggregator:
+                aggregator.add_results(cached)
+                report = aggregator.report()
+            write_results(cached, output_filename, logger, report)
+            return
+
+    proxies = cfg.pop("proxies")
+    health_url = cfg.pop("health_url")
+    if cfg.pop("preflight"):
+        pool = await preflight_proxies(proxies, health_url, logger=logger)
+        if not pool.best:
+            logger.error("No working proxies after preflight")
+            return
+        # Use the fastest proxy and its prewarmed client; the other proxies
+        # stay in the pool for requests rerouted after block pages
+        proxy = pool.best.proxy
+        cfg["client"] = pool.best.client
+        logger.info(f"Preflight latency for {proxy}: {pool.best.latency:.3f}s")
+    else:
+        # Select proxy randomly
+        proxy = random.choice(proxies)
+        pool = ProxyPool.from_proxies(proxies)
     cfg["proxy"] = proxy
+    cfg["proxy_pool"] = pool
 
     logger.info(f"Using proxy: {proxy}")
 
+    archive_path = cfg.pop("archive")
+    archive = WarcWriter(archive_path) if archive_path else None
+    seen_cfg = cfg.pop("seen")
+    seen = None
+    owner_profiles = OwnerProfiles(**owner_cfg, logger=logger) if owner_cfg else None
+    redirect_map = cfg.pop("redirect_map")
+    redirects = RedirectMap(redirect_map, logger=logger) if redirect_map else None
     try:
-        results = await Crawler(**cfg, logger=logger).run()
+        try:
+            if seen_cfg:
+                seen = SeenFilter(**seen_cfg, logger=logger)
+            crawler = Crawler(
+                **cfg,
+                logger=logger,
+                archive=archive,
+                profiler=profiler,
+                aggregator=aggregator,
+                seen=seen,
+                owner_profiles=owner_profiles,
+                redirects=redirects,
+            )
+            if cache:
+                results = await cache.run_cached(crawler)
+            else:
+                results = await crawler.run()
+        except Exception as e:
+            logger.error(f"Crawler execution failed: {type(e).__name__}: {e}")
+            return
+
+        if results is None:
+            logger.error("Crawler returned no results")
+            return
+
+        report = None
+        if aggregator:
+            aggregator.add_results(results)
+            report = aggregator.report()
+        if profiler:
+            with profiler.stage("serialize"):
+                write_results(results, output_filename, logger, report)
+        else:
+            write_results(results, output_filename, logger, report)
+    finally:
+        # Stale results were written already, wait for their refresh to finish
+        if cache:
+            await cache.drain()
+        if archive:
+            archive.close()
+        if seen:
+            seen.close()
+        if owner_profiles:
+            await owner_profiles.cancel()
+        if redirects:
+            redirects.save()
+        await pool.aclose()
+
+
+async def reparse_main(argv: list[str], logger: logging.Logger) -> None:
+    """Re-parse a WARC archive and output results like a crawl"""
+    cfg, output_filename = parse_reparse_args(argv)
+    try:
+        results = await asyncio.to_thread(reparse_archive, **cfg, logger=logger)
     except Exception as e:
-        logger.error(f"Crawler execution failed: {type(e).__name__}: {e}")
+        logger.error(f"Reparse failed: {type(e).__name__}: {e}")
         return
+    write_results(results, output_filename, logger)
 
-    if results is None:
-        logger.error("Crawler returned no results")
-        return
 
-    results_formatted = json.dumps(results, indent=2)
+def write_results(
+    results: list[dict],
+    output_filename: str | None,
+    logger: logging.Logger,
+    language_report: dict | None = None,
+) -> None:
+    """
+    Write results as JSON to stdout and optionally to a file. With a language
+    report, the output is an object with "results" and "language_report" keys.
+    """
+    output = results
+    if language_report is not None:
+        output = {"results": results, "language_report": language_report}
+    results_formatted = json.dumps(output, indent=2)
     logger.info(f"Found {len(results)} results")
     sys.stdout.write(results_formatted)
 
@@ -104,8 +618,23 @@ async def main(argv=None):
             logger.error(
                 f"Failed to write output file {output_filename}: {type(e).__name__}: {e}"
             )
-            return
+
+
+def run(argv: list[str] | None = None) -> None:
+    """Run main on the event loop backend selected with --loop"""
+    argv = sys.argv[1:] if argv is None else argv
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument("--loop", default="asyncio")
+    known, _ = pre.parse_known_args(argv)
+    # Invalid values are reported by the full parser inside main
+    backend = known.loop if known.loop in LOOP_BACKENDS else "asyncio"
+    try:
+        get_loop_factory(backend)
+    except RuntimeError as e:
+        sys.stderr.write(f"{e}\n")
+        sys.exit(2)
+    run_with_loop(main(argv), backend)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()
@@ -0,0 +1,134 @@
+from .settings import (
+    LANGUAGE_REPORT_INITIAL_ROWS,
+    LANGUAGE_REPORT_PERCENTILES,
+    LANGUAGE_REPORT_TOP_N,
+)
+
+
+def require_numpy():
+    """Import NumPy, which language reports need but the crawler does not"""
+    try:
+        import numpy
+    except ImportError as e:
+        raise RuntimeError(
+            "Language reports require the numpy package: pip install numpy"
+        ) from e
+    return numpy
+
+
+class LanguageAggregator:
+    """
+    Collects language percentages of repositories into a repos x languages
+    matrix as results come in, and computes distribution reports over it.
+    Rows and columns grow by doubling, so adding a repository is amortized O(languages).
+    """
+
+    def __init__(self, capacity: int = LANGUAGE_REPORT_INITIAL_ROWS):
+        self.np = require_numpy()
+        self.languages: dict[str, int] = {}
+        self.rows: dict[str, int] = {}
+        self.matrix = self.np.zeros((capacity, 8), dtype=self.np.float32)
+        self.weights = self.np.zeros(capacity, dtype=self.np.float64)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _column(self, language: str) -> int:
+        column = self.languages.get(language)
+        if column is None:
+            column = self.languages[language] = len(self.languages)
+            if column == self.matrix.shape[1]:
+                self.matrix = self.np.pad(self.matrix, ((0, 0), (0, column)))
+        return column
+
+    def add(self, url: str, language_stats: dict[str, float], weight: float = 1.0) -> None:
+        """
+        Add one repository. Repositories already added are ignored.
+
+        Args:
+            url: Repository URL
+            language_stats: Language name to percentage
+            weight: Weight of the repository in weighted shares, e.g. its stars
+        """
+        if url in self.rows:
+            return
+        row = self.rows[url] = len(self.rows)
+        if row == self.matrix.shape[0]:
+            self.matrix = self.np.pad(self.matrix, ((0, row), (0, 0)))
+            self.weights = self.np.pad(self.weights, (0, row))
+        for language, percentage in language_stats.items():
+            # The column lookup may grow the matrix, so resolve it first
+            column = self._column(language)
+            self.matrix[row, column] = percentage
+        self.weights[row] = weight
+
+    def add_extra(self, url: str, extra: dict) -> None:
+        """Add the extra info of a repository page, weighted by its stars if known"""
+        if "language_stats" in extra:
+            stars = extra.get("stars")
+            self.add(url, extra["language_stats"], weight=stars if stars is not None else 1.0)
+
+    def add_results(self, results: list[dict]) -> None:
+        """
+        Add crawl results. Repositories streamed in during the crawl are skipped,
+        so this only adds results that never went through the crawler, e.g.
+        ones served from the query cache.
+        """
+        for record in results:
+            if "extra" in record:
+                self.add_extra(record["url"], record["extra"])
+
+    def _shares(self, matrix, weights) -> list[float] | None:
+        total = weights.sum()
+        if not total:
+            return None
+        return (weights @ matrix / total).tolist()
+
+    def report(self, top_n: int = LANGUAGE_REPORT_TOP_N) -> dict:
+        """
+        Distribution report: mean and weighted language shares, number of repositories
+        using each language, co-occurrence counts and percentiles of the top languages.
+        """
+        np = self.np
+        names = list(self.languages)
+        matrix = self.matrix[: len(self.rows), : len(names)].astype(np.float64)
+        weights = self.weights[: len(self.rows)]
+        if not len(self.rows) or not names:
+            return {"repos": len(self.rows), "languages": 0}
+
+        present = matrix > 0
+        repo_counts = present.sum(axis=0)
+        shares = self._shares(matrix, np.ones(len(self.rows)))
+        weighted = self._shares(matrix, weights)
+        # Languages GitHub lists at 0.0% are not counted as used
+        used = np.flatnonzero(repo_counts)
+        order = np.lexsort((-repo_counts[used], -np.asarray(shares)[used]))
+        top = used[order][:top_n]
+        top_names = [names[i] for i in top]
+
+        top_present = present[:, top].astype(np.int64)
+        cooccurrence = top_present.T @ top_present
+
+        percentiles = {}
+        for name, column in zip(top_names, top):
+            values = matrix[present[:, column], column]
+            points = np.percentile(values, LANGUAGE_REPORT_PERCENTILES)
+            percentiles[name] = {
+                f"p{p}": round(float(v), 2) for p, v in zip(LANGUAGE_REPORT_PERCENTILES, points)
+            }
+
+        return {
+            "repos": len(self.rows),
+            "languages": len(names),
+            "top": top_names,
+            "shares": {names[i]: round(shares[i], 2) for i in top},
+            "weighted_shares": (
+                {names[i]: round(weighted[i], 2) for i in top} if weighted else None
+            ),
+            "repo_counts": {names[i]: int(repo_counts[i]) for i in top},
+            "cooccurrence": {
+                a: {b: int(cooccurrence[i, j]) for j, b in enumerate(top_names)}
+                for i, a in enumerate(top_names)
+            },
+            "percentiles": percentiles,
+        }
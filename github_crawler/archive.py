@@ -0,0 +1,159 @@
+import gzip
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Iterator
+
+import httpx
+
+WARC_VERSION = b"WARC/1.0"
+
+# First bytes of a gzip member
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Headers describing the wire encoding, which no longer applies to the decoded body
+DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+
+class ArchivedResponse:
+    """
+    A response read back from a WARC archive
+    """
+
+    def __init__(
+        self,
+        url: str,
+        status_code: int,
+        headers: dict[str, str],
+        content: bytes,
+        requested_url: str | None = None,
+    ):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        # URL that was requested when the response came through redirects
+        self.requested_url = requested_url or url
+
+    @property
+    def encoding(self) -> str:
+        content_type = self.headers.get("content-type", "")
+        for part in content_type.split(";")[1:]:
+            key, _, value = part.strip().partition("=")
+            if key.lower() == "charset" and value:
+                return value.strip('"')
+        return "utf-8"
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+
+class WarcWriter:
+    """
+    Append HTTP responses to a gzip-compressed WARC file, one gzip member per record
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "ab")
+        if is_new:
+            self._write_record(
+                {"WARC-Type": "warcinfo", "Content-Type": "application/warc-fields"},
+                b"software: github-crawler\r\nformat: WARC File Format 1.0\r\n",
+            )
+
+    def write_response(self, response: httpx.Response) -> None:
+        """Archive a response with its decoded body"""
+        status_line = f"HTTP/1.1 {response.status_code} {response.reason_phrase}\r\n"
+        header_lines = "".join(
+            f"{name}: {value}\r\n"
+            for name, value in response.headers.items()
+            if name.lower() not in DROPPED_HEADERS
+        )
+        body = response.content
+        block = (
+            status_line + header_lines + f"Content-Length: {len(body)}\r\n\r\n"
+        ).encode("utf-8") + body
+
+        warc_headers = {
+            "WARC-Type": "response",
+            "WARC-Target-URI": str(response.url),
+            "Content-Type": "application/http;msgtype=response",
+        }
+        if response.history:
+            warc_headers["WARC-X-Requested-URI"] = str(response.history[0].request.url)
+        self._write_record(warc_headers, block)
+
+    def _write_record(self, headers: dict[str, str], block: bytes) -> None:
+        lines = [
+            WARC_VERSION.decode(),
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+            f"WARC-Date: {datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}",
+            *(f"{name}: {value}" for name, value in headers.items()),
+            f"Content-Length: {len(block)}",
+        ]
+        record = ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + block + b"\r\n\r\n"
+        self.file.write(gzip.compress(record))
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "WarcWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_warc(path: str) -> Iterator[ArchivedResponse]:
+    """
+    Read the response records of a (gzip-compressed) WARC file. Compression is
+    detected from the content, WarcWriter compresses whatever the file name.
+    """
+    with open(path, "rb") as f:
+        compressed = f.read(2) == GZIP_MAGIC
+    opener = gzip.open if compressed else open
+    with opener(path, "rb") as f:
+        while True:
+            line = f.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            if not line.startswith(WARC_VERSION):
+                raise ValueError(f"Invalid WARC record header in {path}: {line[:40]!r}")
+
+            headers = _read_headers(f)
+            block = f.read(int(headers.get("content-length", 0)))
+            if headers.get("warc-type") != "response":
+                continue
+            yield _parse_http_block(
+                headers["warc-target-uri"], block, headers.get("warc-x-requested-uri")
+            )
+
+
+def _read_headers(f) -> dict[str, str]:
+    headers = {}
+    for line in iter(f.readline, b""):
+        line = line.decode("utf-8").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _parse_http_block(
+    url: str, block: bytes, requested_url: str | None
+) -> ArchivedResponse:
+    head, _, body = block.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("iso-8859-1").split("\r\n")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    status_code = int(status_line.split(" ", 2)[1])
+    return ArchivedResponse(url, status_code, headers, body, requested_url)
@@ -0,0 +1,52 @@
+import html
+import re
+from urllib.parse import urlparse
+
+import httpx
+
+from .settings import BLOCK_REDIRECT_PATHS, BLOCK_SNIFF_BYTES, BLOCK_TITLES
+
+TITLE_RE = re.compile(rb"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+
+class BlockedPageError(Exception):
+    """
+    A successful response that is a rate limit, abuse detection, login or
+    challenge page instead of the requested content
+    """
+
+    def __init__(self, kind: str, url: str):
+        super().__init__(f"Blocked page ({kind}) for {url}")
+        self.kind = kind
+        self.url = url
+
+
+def classify_block(response: httpx.Response) -> str | None:
+    """
+    Recognize a block page from its headers, final URL and the title in the
+    first bytes of its body, without parsing the page.
+
+    Returns:
+        Kind of block page ("rate_limit", "abuse", "login" or "challenge"),
+        None for regular pages
+    """
+    if "retry-after" in response.headers:
+        return "rate_limit"
+
+    try:
+        url = response.url
+    except RuntimeError:  # Responses built without a request have no URL
+        url = None
+    if url is not None:
+        path = urlparse(str(url)).path.rstrip("/")
+        if path in BLOCK_REDIRECT_PATHS:
+            return BLOCK_REDIRECT_PATHS[path]
+
+    match = TITLE_RE.search(response.content[:BLOCK_SNIFF_BYTES])
+    if not match:
+        return None
+    title = html.unescape(match.group(1).decode("utf-8", "replace")).strip().lower()
+    for kind, prefixes in BLOCK_TITLES.items():
+        if title.startswith(tuple(prefixes)):
+            return kind
+    return None
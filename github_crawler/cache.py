@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+
+from .crawler import Crawler
+from .settings import QUERY_CACHE_TTL, QUERY_CACHE_STALE_TTL, SEARCH_OPERATORS
+from .utils import resolve_pages, write_json_atomic
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+def canonical_query(
+    keywords: list[str],
+    search_type: str,
+    with_extra: bool = False,
+    pages: int | None = None,
+    fields: list[str] | None = None,
+    shard_by: list[str] | None = None,
+    owner_profiles: bool = False,
+    max_results: int | None = None,
+) -> dict:
+    """
+    Canonical form of a query: keywords are split into terms, case-folded,
+    deduplicated and sorted, since GitHub search ignores case and order of
+    plain terms. Queries with boolean operators or quoted phrases keep their
+    terms as written, since those depend on order and case.
+    """
+    terms = [term for keyword in keywords for term in keyword.split()]
+    if not any(term in SEARCH_OPERATORS or '"' in term for term in terms):
+        terms = sorted({term.casefold() for term in terms})
+    query = {
+        "keywords": terms,
+        "search_type": search_type,
+        "with_extra": bool(with_extra),
+        "pages": resolve_pages(pages, shard_by),
+        "fields": sorted(fields) if fields else None,
+        "shard_by": shard_by or None,
+    }
+    # Only present when set, so keys of earlier entries stay valid
+    if owner_profiles:
+        query["owner_profiles"] = True
+    if max_results is not None:
+        query["max_results"] = max_results
+    return query
+
+
+def query_key(**query) -> str:
+    """Cache key of a query, see canonical_query for the arguments"""
+    canonical = json.dumps(canonical_query(**query), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    """
+    File-backed cache of query results with a TTL and stale-while-revalidate:
+    expired results are still returned for stale_ttl seconds while a background
+    crawl refreshes them.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: float = QUERY_CACHE_TTL,
+        stale_ttl: float = QUERY_CACHE_STALE_TTL,
+        logger: logging.Logger | None = None,
+    ):
+        self.directory = directory
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.logger = logger or logging.getLogger(__name__)
+        self.refreshing: set[asyncio.Task] = set()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key_for(crawler: Crawler) -> str:
+        return query_key(
+            keywords=crawler.keywords,
+            search_type=crawler.search_type,
+            with_extra=crawler.with_extra,
+            pages=crawler.pages,
+            fields=crawler.fields,
+            shard_by=crawler.shard_by,
+            owner_profiles=crawler.owner_profiles is not None,
+            max_results=crawler.max_results,
+        )
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def lookup(self, key: str) -> tuple[list[dict] | None, str]:
+        """
+        Returns:
+            Tuple of (cached results, FRESH/STALE/MISS)
+        """
+        try:
+            with open(self.path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None, MISS
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable cache entry {key}: {type(e).__name__}: {e}")
+            return None, MISS
+
+        age = time.time() - entry["stored_at"]
+        if age < self.ttl:
+            return entry["results"], FRESH
+        if age < self.ttl + self.stale_ttl:
+            return entry["results"], STALE
+        return None, MISS
+
+    def store(self, key: str, results: list[dict]) -> None:
+        """Atomically write results, so concurrent readers never see a partial file"""
+        write_json_atomic(self.path(key), {"stored_at": time.time(), "results": results})
+
+    @staticmethod
+    def is_complete(results: list[dict] | None) -> bool:
+        """
+        Only complete results are cached, never partial ones of a budgeted crawl
+        or of a crawl that could not fetch all of its search pages. Results the
+        seen filter skipped lack extra info that queries without it expect.
+        """
+        return results is not None and not any(
+            r.get("partial") or r.get("seen") for r in results
+        )
+
+    async def refresh(self, key: str, crawler: Crawler) -> list[dict] | None:
+        results = await crawler.run()
+        if self.is_complete(results):
+            try:
+                self.store(key, results)
+            except OSError as e:
+                # The crawl itself succeeded, its results are still returned
+                self.logger.warning(f"Could not cache results {key}: {type(e).__name__}: {e}")
+        return results
+
+    async def run_cached(self, crawler: Crawler) -> list[dict] | None:
+        """
+        Return cached results for the crawler's query. Fresh results are returned
+        without crawling, stale ones are returned immediately and refreshed in the
+        background (see drain), and misses are crawled and stored.
+        """
+        key = self.key_for(crawler)
+        results, state = self.lookup(key)
+        if state == FRESH:
+            self.logger.info("Query cache hit")
+            await crawler.aclose()
+            return results
+        if state == STALE:
+            self.logger.info("Query cache hit (stale), refreshing in the background")
+            task = asyncio.create_task(self.refresh(key, crawler))
+            self.refreshing.add(task)
+            task.add_done_callback(self.refreshing.discard)
+            return results
+        return await self.refresh(key, crawler)
+
+    async def drain(self) -> None:
+        """Wait for background refreshes to finish"""
+        if self.refreshing:
+            await asyncio.gather(*self.refreshing, return_exceptions=True)
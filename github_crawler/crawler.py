@@ -1,13 +1,45 @@
 import asyncio
 import logging
+import math
+import time
 from asyncio import Semaphore
-from urllib.parse import urlparse
 
 import httpx
 
-from .parsers import parse_search_results, parse_language_stats
-from .settings import MAX_CONCURRENT_REQUESTS
-from .utils import make_request, get_normalized_url, get_request_client
+from .aggregate import LanguageAggregator
+from .archive import WarcWriter
+from .blocks import BlockedPageError
+from .extractors import extract_fields
+from .latency import LatencyTracker
+from .lazy import LazyResults
+from .owners import OwnerProfiles
+from .proxies import ProxyPool
+from .redirects import RedirectMap
+from .parsers import parse_search_results, parse_result_count
+from .profiling import Profiler
+from .seen import SeenFilter
+from .settings import (
+    ADAPTIVE_TIMEOUTS,
+    BLOCK_MAX_REROUTES,
+    LAZY_PREFETCH,
+    MAX_CONCURRENT_REQUESTS,
+    RESULTS_PER_PAGE,
+    SEARCH_RESULT_CAP,
+    SHARD_MAX_DEPTH,
+)
+from .sharding import Shard
+from .utils import (
+    make_request,
+    get_normalized_url,
+    get_request_client,
+    get_expo_backoff,
+    get_remaining_time,
+    fits_deadline,
+    dedupe_results,
+    owner_from_url,
+    profile_stage,
+    resolve_pages,
+)
 
 
 class Crawler:
@@ -18,94 +50,471 @@ class Crawler:
         proxy: str,
         with_extra: bool = False,
         logger: logging.Logger | None = None,
+        deadline: float | None = None,
+        max_results: int | None = None,
+        client: httpx.AsyncClient | None = None,
+        pages: int | None = None,
+        shard_by: list[str] | None = None,
+        fields: list[str] | None = None,
+        archive: WarcWriter | None = None,
+        profiler: Profiler | None = None,
+        aggregator: LanguageAggregator | None = None,
+        seen: SeenFilter | None = None,
+        latency: LatencyTracker | None = None,
+        owner_profiles: OwnerProfiles | None = None,
+        redirects: RedirectMap | None = None,
+        proxy_pool: ProxyPool | None = None,
+        extra_cache: dict[str, dict] | None = None,
     ):
         self.logger = logger or logging.getLogger(self.__class__.__name__)
         self.semaphore = Semaphore(MAX_CONCURRENT_REQUESTS)
-        self.client = get_request_client(proxy)
+        # A prewarmed client from proxy preflight can be passed in
+        self.client = client or get_request_client(proxy)
+        # Closed with the crawler; clients of the proxy pool belong to the pool
+        self.own_client = self.client
+        # Requests answered with a block page move to another proxy of the pool
+        self.proxy_pool = proxy_pool
         self.keywords = keywords
         self.search_type = search_type
         self.proxy = proxy
         self.with_extra = with_extra
+        # Extra fields to extract from result pages, all registered ones if None
+        self.fields = fields
+        # Raw responses are teed into this archive for offline re-parsing
+        self.archive = archive
+        self.profiler = profiler
+        # Language stats are fed into this aggregator as they are extracted
+        self.aggregator = aggregator
+        # Latency of this crawler's proxy drives per-request timeouts; crawlers
+        # sharing proxies can share a tracker
+        if latency is None and ADAPTIVE_TIMEOUTS:
+            latency = LatencyTracker()
+        self.latency = latency
+        # Profiles of result owners are added to extra info when given
+        self.owner_profiles = owner_profiles
+        # Known moved URLs are rewritten before fetching; a persistent map can be
+        # shared between runs, otherwise redirects are only kept for this run
+        self.redirects = RedirectMap(logger=self.logger) if redirects is None else redirects
+        # URLs enriched by earlier runs are not fetched again
+        self.seen = seen
+        # Extra info of pages already fetched, keyed by URL. Crawlers of a batch
+        # share one, since queries of a batch often find the same repositories
+        self.extra_cache: dict[str, dict] = {} if extra_cache is None else extra_cache
+        # Enrichment of lazy results still running, cancelled on aclose
+        self.pending: set[asyncio.Task] = set()
+        # Crawl budget: seconds for the whole run and/or number of results
+        self.deadline = deadline
+        self.max_results = max_results
+        self.deadline_at: float | None = None
+        # Search pages and shards that could not be fetched in the last search
+        self.missing_pages = 0
+        # Distinct result URLs found so far by the search, checked against max_results
+        self.found: set[str] = set()
+        # Qualifiers used to split queries over the search result cap.
+        # Sharded crawls fetch every page of every shard unless told otherwise.
+        self.shard_by = shard_by
+        self.pages = resolve_pages(pages, shard_by)
+
+    @property
+    def has_budget(self) -> bool:
+        return self.deadline is not None or self.max_results is not None
+
+    def stage(self, name: str):
+        """Time a pipeline stage when profiling, no-op otherwise"""
+        return profile_stage(self.profiler, name)
 
     async def fetch_url(self, url: str, params: dict | None = None, **kwargs) -> httpx.Response | None:
         """
-        Fetch a URL asynchronously using the configured client and semaphore
+        Fetch a URL asynchronously using the configured client and semaphore.
+        Block pages are retried with backoff through another proxy of the pool,
+        or through the same one if there is no pool.
         """
-        return await make_request(
-            url, self.client, self.semaphore, params=params, logger=self.logger, **kwargs
-        )
+        kwargs.setdefault("deadline", self.deadline_at)
+        kwargs.setdefault("archive", self.archive)
+        kwargs.setdefault("latency", self.latency)
+        kwargs.setdefault("profiler", self.profiler)
+        for attempt in range(BLOCK_MAX_REROUTES + 1):
+            proxy, client = self.proxy, self.client
+            try:
+                return await make_request(
+                    url,
+                    client,
+                    self.semaphore,
+                    params=params,
+                    logger=self.logger,
+                    proxy=proxy,
+                    **kwargs,
+                )
+            except BlockedPageError as e:
+                if attempt == BLOCK_MAX_REROUTES:
+                    self.logger.error(f"{e} via {proxy}, giving up after {attempt + 1} attempts")
+                    return None
+                delay = get_expo_backoff(attempt)
+                if not fits_deadline(delay, kwargs["deadline"]):
+                    self.logger.warning(f"{e} via {proxy}. No time left to retry")
+                    return None
+                self.reroute(proxy)
+                self.logger.warning(f"{e} via {proxy}. Retrying via {self.proxy} in {delay}s")
+                with self.stage("backoff"):
+                    await asyncio.sleep(delay)
+        return None
 
-    def get_search_url_with_params(self) -> tuple[str, dict]:
+    def reroute(self, blocked_proxy: str) -> None:
+        """
+        Count a block page against the proxy and move the crawler to the
+        healthiest other proxy of the pool
+        """
+        if self.proxy_pool is None:
+            return
+        self.proxy_pool.record_block(blocked_proxy, self.logger)
+        if self.proxy != blocked_proxy:
+            # A concurrent request already moved the crawler
+            return
+        status = self.proxy_pool.next_proxy(exclude=blocked_proxy)
+        if status is None:
+            return
+        self.proxy = status.proxy
+        self.client = self.proxy_pool.client_for(status)
+
+    def get_search_url_with_params(
+        self, query: str | None = None, page: int = 1
+    ) -> tuple[str, dict]:
         """
         Get the GitHub search URL and query parameters.
 
+        Args:
+            query: Search query, defaults to the crawler keywords
+            page: Search results page number
+
         Returns:
             Tuple of (base_url, params_dict)
         """
-        query = " ".join(self.keywords)
+        if query is None:
+            query = " ".join(self.keywords)
         params = {"q": query, "type": self.search_type}
+        if page > 1:
+            params["p"] = page
         return get_normalized_url("search"), params
 
+    async def fetch_search_page(self, query: str, page: int = 1) -> str | None:
+        """
+        Fetch one search results page, None if it could not be fetched
+        """
+        search_url, search_params = self.get_search_url_with_params(query, page)
+        search_data = await self.fetch_url(search_url, params=search_params)
+        if not search_data or not search_data.text:
+            return None
+        return search_data.text
+
+    def has_enough_results(self) -> bool:
+        """Whether the search already found max_results distinct results"""
+        return self.max_results is not None and len(self.found) >= self.max_results
+
+    def parse_results_page(self, page: str) -> list[dict]:
+        """Parse a search results page, counting the distinct results found"""
+        with self.stage("parse"):
+            results = parse_search_results(page)
+        self.found.update(record["url"] for record in results)
+        return results
+
+    async def crawl_shard(self, shard: Shard) -> list[dict] | None:
+        """
+        Fetch all pages of a shard. If sharding is enabled and the shard reports more
+        results than GitHub returns, it is split and the parts are crawled concurrently.
+        With max_results, pages are fetched in batches and shards one after another,
+        and no more are fetched once enough results were found.
+
+        Returns:
+            List of results, None if the first page could not be fetched
+        """
+        if self.has_enough_results():
+            return []
+        first_page = await self.fetch_search_page(shard.query)
+        if first_page is None:
+            return None
+
+        with self.stage("parse"):
+            count = parse_result_count(first_page, self.logger)
+        if self.shard_by and count is not None and count > SEARCH_RESULT_CAP:
+            children = shard.split(self.shard_by) if shard.depth < SHARD_MAX_DEPTH else []
+            if children:
+                self.logger.info(
+                    f"Splitting {shard} with {count} results into {len(children)} shards"
+                )
+                if self.max_results is None:
+                    parts = await asyncio.gather(*(self.crawl_shard(c) for c in children))
+                else:
+                    parts = [await self.crawl_shard(c) for c in children]
+                results = []
+                for child, part in zip(children, parts):
+                    if part is None:
+                        self.logger.error(f"Could not get search results for {child}")
+                        self.missing_pages += 1
+                        continue
+                    results.extend(part)
+                return results
+            self.logger.warning(
+                f"{shard} has {count} results and cannot be split further, "
+                f"only the first {SEARCH_RESULT_CAP} are reachable"
+            )
+
+        results = self.parse_results_page(first_page)
+        last_page = self.pages
+        if count is not None:
+            last_page = min(last_page, math.ceil(count / RESULTS_PER_PAGE))
+        # Without a result budget all pages are fetched at once
+        batch = last_page if self.max_results is None else MAX_CONCURRENT_REQUESTS
+        missing = 0
+        for start in range(2, last_page + 1, max(batch, 1)):
+            if self.has_enough_results():
+                break
+            pages = await asyncio.gather(
+                *(
+                    self.fetch_search_page(shard.query, p)
+                    for p in range(start, min(start + batch, last_page + 1))
+                )
+            )
+            for page in pages:
+                if page:
+                    results.extend(self.parse_results_page(page))
+            missing += pages.count(None)
+        if missing:
+            self.logger.warning(f"{missing} search pages of {shard} could not be fetched")
+            self.missing_pages += missing
+        return results
+
     def owner_from_url(self, url: str) -> str | None:
         """
         Extract the repository owner from a GitHub URL
         """
-        parts = urlparse(url).path.strip("/").split("/")
-        if len(parts) >= 2:
-            return parts[-2]
+        owner = owner_from_url(url)
+        if owner is None:
+            self.logger.error(f"Could not extract owner from repository url: {url}")
+        return owner
 
-        self.logger.error(f"Could not extract owner from repository url: {url}")
-        return None
+    def aggregate(self, url: str, extra: dict) -> None:
+        """Feed the language stats of a page into the aggregator, if any"""
+        if self.aggregator is not None:
+            self.aggregator.add_extra(url, extra)
 
-    async def fetch_and_parse_repo(self, repo: dict) -> None:
+    @staticmethod
+    def move(record: dict, url: str) -> None:
+        """Point a record at the final URL of its moved page, keeping the original"""
+        record.setdefault("redirected_from", record["url"])
+        record["url"] = url
+
+    def rewrite_moved(self, record: dict) -> str | None:
+        """Rewrite a record's URL if it is known to have moved; returns its URL"""
+        url = record.get("url")
+        if url:
+            final_url = self.redirects.resolve(url)
+            if final_url != url:
+                self.move(record, final_url)
+                url = final_url
+        return url
+
+    async def fetch_and_parse_page(self, record: dict) -> None:
         """
-        Fetch repository page and parse extra info (owner, language stats).
+        Fetch the page of a search result and run the extractors of the search type
+        over it in a single parse, then add the owner profile if requested.
         """
-        repo_url = repo.get("url")
-        if not repo_url:
-            self.logger.error("Repository dict missing 'url' key.")
+        page_url = record.get("url")
+        if not page_url:
+            self.logger.error("Result dict missing 'url' key.")
             return None
         try:
-            repo_data = await self.fetch_url(repo_url)
-            if not repo_data or not repo_data.text:
-                self.logger.error(f"Could not get details for repository {repo_url}")
+            page_data = await self.fetch_url(page_url)
+            if not page_data or not page_data.text:
+                self.logger.error(f"Could not get details for {page_url}")
                 return None
-            language_stats = parse_language_stats(repo_data.text)
-            owner = self.owner_from_url(repo_url)
-            repo["extra"] = {"language_stats": language_stats, "owner": owner}
+            # Parse under the final URL, so the owner of a moved repository is current
+            final_url = self.redirects.record_response(page_url, page_data)
+            if final_url != page_url:
+                self.move(record, final_url)
+                page_url = final_url
+            with self.stage("parse"):
+                record["extra"] = extract_fields(
+                    page_data.text, page_url, self.search_type, self.fields, self.logger
+                )
+            owner = owner_from_url(page_url)
+            if self.owner_profiles is not None and owner:
+                record["extra"]["owner_profile"] = await self.owner_profiles.get(
+                    owner, self.fetch_url
+                )
+            self.extra_cache[page_url] = record["extra"]
+            self.aggregate(page_url, record["extra"])
+            if self.seen is not None:
+                self.seen.add(page_url)
+                if "redirected_from" in record:
+                    self.seen.add(record["redirected_from"])
         except Exception as e:
-            self.logger.error(f"Error parsing repo {repo_url}: {type(e).__name__}: {e}")
+            self.logger.error(f"Error parsing page {page_url}: {type(e).__name__}: {e}")
 
-    async def get_extra_info(self, repos: list[dict]) -> None:
+    async def fetch_and_parse_repo(self, repo: dict) -> None:
+        """Former name of fetch_and_parse_page, kept for library users"""
+        await self.fetch_and_parse_page(repo)
+
+    async def get_extra_info(self, records: list[dict]) -> None:
+        """
+        Fetch and parse extra info for all search results in parallel.
+        Known moved URLs are rewritten first, cached pages are filled in
+        without creating a coroutine, each distinct URL is fetched once, and
+        URLs in the seen filter are marked "seen" instead of being fetched.
+        """
+        if not records:
+            return
+
+        misses: dict[str | None, list[dict]] = {}
+        skipped = 0
+        for record in records:
+            url = self.rewrite_moved(record)
+            if url in self.extra_cache:
+                record["extra"] = dict(self.extra_cache[url])
+                self.aggregate(url, record["extra"])
+            elif url and self.seen is not None and url in self.seen:
+                record["seen"] = True
+                skipped += 1
+            else:
+                misses.setdefault(url, []).append(record)
+        if skipped:
+            self.logger.info(f"Skipping {skipped} results enriched by earlier runs")
+        if not misses:
+            return
+
+        await self.fetch_extra_pages([group[0] for group in misses.values()])
+
+        for first, *duplicates in misses.values():
+            for record in duplicates:
+                if "redirected_from" in first:
+                    self.move(record, first["url"])
+                if "extra" in first:
+                    record["extra"] = dict(first["extra"])
+
+    async def fetch_extra_pages(self, records: list[dict]) -> None:
         """
-        Fetch and parse extra info for all repositories in parallel.
+        Fetch and parse the pages of the records concurrently, cancelling the
+        outstanding ones when the crawl deadline is reached.
         """
-        if not repos:
+        remaining = get_remaining_time(self.deadline_at)
+        if remaining is None:
+            tasks = [self.fetch_and_parse_page(record) for record in records]
+            await asyncio.gather(*tasks)
             return
 
-        tasks = [self.fetch_and_parse_repo(repo) for repo in repos]
-        await asyncio.gather(*tasks)
+        tasks = [asyncio.ensure_future(self.fetch_and_parse_page(r)) for r in records]
+        _, pending = await asyncio.wait(tasks, timeout=remaining)
+        if pending:
+            self.logger.warning(
+                f"Deadline reached, cancelling {len(pending)} outstanding enrichment tasks"
+            )
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def mark_completeness(self, results: list[dict]) -> list[dict]:
+        """
+        Mark every record as partial when extra info was requested but not fetched,
+        and all of them when search pages are missing, since results are then missing
+        too. Only applied when a crawl budget is set or pages are missing, so the
+        default output is unchanged.
+        """
+        if not self.has_budget and not self.missing_pages:
+            return results
+        for record in results:
+            record["partial"] = bool(self.missing_pages) or (
+                self.with_extra and "extra" not in record and not record.get("seen")
+            )
+        return results
+
+    async def search(self) -> list[dict] | None:
+        """
+        Search and parse results: crawl the query, rewrite known moved URLs,
+        dedupe and apply max_results. Starts the deadline if there is one.
+        """
+        if self.deadline is not None:
+            self.deadline_at = time.monotonic() + self.deadline
+        self.missing_pages = 0
+        self.found.clear()
+        parsed_data = await self.crawl_shard(Shard(" ".join(self.keywords)))
+        if parsed_data is None:
+            self.logger.error(
+                f"Could not get search results for {self.keywords} and type {self.search_type} "
+                f"with {self.proxy} proxy"
+            )
+            return None
+        for record in parsed_data:
+            self.rewrite_moved(record)
+        parsed_data = dedupe_results(parsed_data)
+        if self.max_results is not None:
+            parsed_data = parsed_data[: self.max_results]
+        return parsed_data
 
     async def run(self) -> list[dict] | None:
         """
         Run the crawler: search, parse results, and optionally fetch extra info.
         """
+        parsed_data = None
         try:
-            search_url, search_params = self.get_search_url_with_params()
-            search_data = await self.fetch_url(search_url, params=search_params)
-            if not search_data or not search_data.text:
-                self.logger.error(
-                    f"Could not get search results for {self.keywords} and type {self.search_type} "
-                    f"with {self.proxy} proxy"
-                )
+            parsed_data = await self.search()
+            if parsed_data is None:
                 return None
-            parsed_data = parse_search_results(search_data.text)
-            if parsed_data and self.search_type == "Repositories" and self.with_extra:
-                await self.get_extra_info(parsed_data)
+            if parsed_data and self.with_extra:
+                with self.stage("enrich"):
+                    await self.get_extra_info(parsed_data)
+                # Redirects found while enriching can reveal more duplicates
+                parsed_data = dedupe_results(parsed_data)
 
-            return parsed_data
+            return self.mark_completeness(parsed_data)
         except Exception as e:
             self.logger.error(f"Crawler run failed: {type(e).__name__}: {e}")
+            if parsed_data and self.has_budget:
+                return self.mark_completeness(parsed_data)
             return None
         finally:
-            await self.client.aclose()
+            await self.aclose()
+
+    async def run_lazy(self, prefetch: int = LAZY_PREFETCH) -> LazyResults | None:
+        """
+        Search without fetching extra info up front. The extra info of each
+        result is fetched when first awaited, prefetching the next results, so
+        the client stays open until aclose:
+
+            async with Crawler(...) as crawler:
+                results = await crawler.run_lazy()
+                extra = await results[0].extra
+
+        Args:
+            prefetch: Results enriched together, starting at the awaited one
+
+        Returns:
+            LazyResults, None if the search failed
+        """
+        try:
+            records = await self.search()
+        except Exception as e:
+            self.logger.error(f"Crawler run failed: {type(e).__name__}: {e}")
+            return None
+        if records is None:
+            return None
+        return LazyResults(self, records, prefetch)
+
+    def track(self, coro) -> asyncio.Task:
+        """Run enrichment of lazy results as a task cancelled on aclose"""
+        task = asyncio.ensure_future(coro)
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+        return task
+
+    async def aclose(self) -> None:
+        """Cancel outstanding lazy enrichment and close the HTTP client"""
+        if self.pending:
+            for task in self.pending:
+                task.cancel()
+            await asyncio.gather(*self.pending, return_exceptions=True)
+        await self.own_client.aclose()
+
+    async def __aenter__(self) -> "Crawler":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
@@ -0,0 +1,152 @@
+import logging
+from typing import Any, Callable
+
+from lxml import html
+
+from .parsers import extract_language_stats, parse_count_label
+from .settings import (
+    SEARCH_TYPES,
+    STARS_COUNTER_XPATH,
+    STARS_XPATH,
+    TOPICS_XPATH,
+    LICENSE_XPATH,
+    ISSUE_TITLE_XPATH,
+    ISSUE_STATE_XPATH,
+    ISSUE_LABELS_XPATH,
+    ISSUE_AUTHOR_XPATH,
+    WIKI_TITLE_XPATH,
+    WIKI_UPDATED_XPATH,
+    WIKI_REVISIONS_XPATH,
+)
+from .utils import owner_from_url
+
+# An extractor gets the parsed page and its URL and returns one field value
+Extractor = Callable[[html.HtmlElement, str], Any]
+
+# search type -> field name -> extractor
+EXTRACTORS: dict[str, dict[str, Extractor]] = {t: {} for t in SEARCH_TYPES}
+
+
+def register_extractor(
+    search_type: str, field: str
+) -> Callable[[Extractor], Extractor]:
+    """
+    Decorator registering a field extractor for pages found by a search type
+    """
+    if search_type not in EXTRACTORS:
+        raise ValueError(f"Unknown search type: {search_type}")
+
+    def decorator(func: Extractor) -> Extractor:
+        EXTRACTORS[search_type][field] = func
+        return func
+
+    return decorator
+
+
+def get_fields(search_type: str) -> list[str]:
+    """Names of all fields registered for a search type"""
+    return list(EXTRACTORS[search_type])
+
+
+def extract_fields(
+    data: str,
+    url: str,
+    search_type: str,
+    fields: list[str] | None = None,
+    logger: logging.Logger | None = None,
+) -> dict[str, Any]:
+    """
+    Parse the page once and run the selected extractors of the search type over it.
+    A failing extractor is logged and its field left out.
+
+    Args:
+        data: Page HTML
+        url: Page URL
+        search_type: Search type the page was found by
+        fields: Field names to extract, all registered fields if None
+        logger: Optional logger instance, creates default if None
+
+    Returns:
+        Dict of field name to extracted value
+    """
+    logger = logger or logging.getLogger(__name__)
+    tree = html.fromstring(data)
+    extra = {}
+    for name, extractor in EXTRACTORS[search_type].items():
+        if fields is not None and name not in fields:
+            continue
+        try:
+            extra[name] = extractor(tree, url)
+        except Exception as e:
+            logger.error(f"Error extracting {name} from {url}: {type(e).__name__}: {e}")
+    return extra
+
+
+def _texts(tree: html.HtmlElement, xpath: str) -> list[str]:
+    return [t for t in (el.text_content().strip() for el in tree.xpath(xpath)) if t]
+
+
+def page_owner(tree: html.HtmlElement, url: str) -> str | None:
+    return owner_from_url(url)
+
+
+for _search_type in SEARCH_TYPES:
+    register_extractor(_search_type, "owner")(page_owner)
+
+
+@register_extractor("Repositories", "language_stats")
+def repo_language_stats(tree: html.HtmlElement, url: str) -> dict[str, float]:
+    return extract_language_stats(tree)
+
+
+@register_extractor("Repositories", "stars")
+def repo_stars(tree: html.HtmlElement, url: str) -> int | None:
+    stars = parse_count_label(tree.xpath(STARS_COUNTER_XPATH))
+    if stars is None:
+        stars = parse_count_label(tree.xpath(STARS_XPATH))
+    return stars
+
+
+@register_extractor("Repositories", "topics")
+def repo_topics(tree: html.HtmlElement, url: str) -> list[str]:
+    return _texts(tree, TOPICS_XPATH)
+
+
+@register_extractor("Repositories", "license")
+def repo_license(tree: html.HtmlElement, url: str) -> str | None:
+    return tree.xpath(LICENSE_XPATH) or None
+
+
+@register_extractor("Issues", "title")
+def issue_title(tree: html.HtmlElement, url: str) -> str | None:
+    return tree.xpath(ISSUE_TITLE_XPATH) or None
+
+
+@register_extractor("Issues", "state")
+def issue_state(tree: html.HtmlElement, url: str) -> str | None:
+    return tree.xpath(ISSUE_STATE_XPATH).lower() or None
+
+
+@register_extractor("Issues", "labels")
+def issue_labels(tree: html.HtmlElement, url: str) -> list[str]:
+    return _texts(tree, ISSUE_LABELS_XPATH)
+
+
+@register_extractor("Issues", "author")
+def issue_author(tree: html.HtmlElement, url: str) -> str | None:
+    return tree.xpath(ISSUE_AUTHOR_XPATH) or None
+
+
+@register_extractor("Wikis", "title")
+def wiki_title(tree: html.HtmlElement, url: str) -> str | None:
+    return tree.xpath(WIKI_TITLE_XPATH) or None
+
+
+@register_extractor("Wikis", "last_updated")
+def wiki_last_updated(tree: html.HtmlElement, url: str) -> str | None:
+    return tree.xpath(WIKI_UPDATED_XPATH) or None
+
+
+@register_extractor("Wikis", "revisions")
+def wiki_revisions(tree: html.HtmlElement, url: str) -> int | None:
+    return parse_count_label(tree.xpath(WIKI_REVISIONS_XPATH))
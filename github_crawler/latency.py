@@ -0,0 +1,143 @@
+import math
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+import httpx
+
+from .settings import (
+    CONNECT_TIMEOUT_BOUNDS,
+    LATENCY_MIN_SAMPLES,
+    LATENCY_PERCENTILE,
+    LATENCY_RETRY_FACTOR,
+    LATENCY_TIMEOUT_FACTOR,
+    LATENCY_WINDOW,
+    READ_TIMEOUT_BOUNDS,
+    TIMEOUT,
+)
+
+# httpcore trace events timed for each phase
+TRACED_PHASES: dict[str, str] = {
+    "connect_tcp": "connect",
+    "start_tls": "connect",
+    "receive_response_headers": "read",
+}
+
+# Phase a timeout exception cut short
+TIMEOUT_PHASES: dict[type[httpx.TimeoutException], str] = {
+    httpx.ConnectTimeout: "connect",
+    httpx.ReadTimeout: "read",
+}
+
+
+def endpoint_of(url: str) -> str:
+    """Endpoint a URL's latency is tracked under: search pages or result pages"""
+    return "search" if urlparse(url).path.rstrip("/") == "/search" else "page"
+
+
+class RequestTrace:
+    """
+    httpx trace extension timing the connect (TCP and TLS) and read (waiting
+    for response headers) phases of one request
+    """
+
+    def __init__(self):
+        self.started: dict[str, float] = {}
+        self.phases: dict[str, float] = {}
+        # Whole request, set by the caller; used when no read phase was traced
+        self.elapsed: float | None = None
+
+    async def __call__(self, event_name: str, info: dict) -> None:
+        # e.g. "connection.connect_tcp.started", "http11.receive_response_headers.complete"
+        name, _, stage = event_name.rpartition(".")
+        name = name.rpartition(".")[2]
+        phase = TRACED_PHASES.get(name)
+        if phase is None:
+            return
+        if stage == "started":
+            self.started[name] = time.monotonic()
+        elif stage == "complete" and name in self.started:
+            elapsed = time.monotonic() - self.started.pop(name)
+            self.phases[phase] = self.phases.get(phase, 0.0) + elapsed
+
+
+class LatencyTracker:
+    """
+    Rolling latency samples per proxy, endpoint and phase. Once a phase has
+    enough samples, its timeout is a high percentile of them times a factor,
+    clamped to bounds, so requests on fast proxies fail fast and slow but
+    healthy proxies are not cut off. Timed out requests are recorded at their
+    timeout, so a proxy that slows down raises its own timeouts.
+    """
+
+    def __init__(
+        self,
+        window: int = LATENCY_WINDOW,
+        min_samples: int = LATENCY_MIN_SAMPLES,
+        percentile: float = LATENCY_PERCENTILE,
+        factor: float = LATENCY_TIMEOUT_FACTOR,
+        connect_bounds: tuple[float, float] = CONNECT_TIMEOUT_BOUNDS,
+        read_bounds: tuple[float, float] = READ_TIMEOUT_BOUNDS,
+    ):
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.factor = factor
+        self.bounds = {"connect": connect_bounds, "read": read_bounds}
+        self.samples: dict[tuple[str, str, str], deque[float]] = {}
+
+    def _add(self, proxy: str, endpoint: str, phase: str, seconds: float) -> None:
+        key = (proxy, endpoint, phase)
+        if key not in self.samples:
+            self.samples[key] = deque(maxlen=self.window)
+        self.samples[key].append(seconds)
+
+    def record(self, proxy: str, url: str, trace: RequestTrace) -> None:
+        """Record the phases of a request that got a response"""
+        endpoint = endpoint_of(url)
+        phases = dict(trace.phases)
+        if "read" not in phases and trace.elapsed is not None:
+            phases["read"] = trace.elapsed - phases.get("connect", 0.0)
+        for phase, seconds in phases.items():
+            self._add(proxy, endpoint, phase, seconds)
+
+    def record_timeout(
+        self, proxy: str, url: str, error: httpx.TimeoutException, timeout: httpx.Timeout
+    ) -> None:
+        """
+        Record a timed out phase at the timeout it hit: the real latency is at
+        least that (a censored sample)
+        """
+        phase = TIMEOUT_PHASES.get(type(error))
+        if phase is not None:
+            self._add(proxy, endpoint_of(url), phase, getattr(timeout, phase))
+
+    def phase_timeout(
+        self, proxy: str, endpoint: str, phase: str, scale: float = 1.0
+    ) -> float | None:
+        """Adaptive timeout of a phase, None until it has enough samples"""
+        samples = self.samples.get((proxy, endpoint, phase))
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        rank = max(0, math.ceil(self.percentile / 100 * len(ordered)) - 1)
+        low, high = self.bounds[phase]
+        return round(min(high, max(low, ordered[rank] * self.factor) * scale), 3)
+
+    def timeout(self, proxy: str, url: str, attempt: int = 0) -> httpx.Timeout | None:
+        """
+        Per-request timeout for the proxy and URL, widened by LATENCY_RETRY_FACTOR
+        on each retry. Phases without enough samples keep the fixed TIMEOUT; None
+        if neither phase has one yet.
+        """
+        endpoint = endpoint_of(url)
+        scale = LATENCY_RETRY_FACTOR**attempt
+        connect = self.phase_timeout(proxy, endpoint, "connect", scale)
+        read = self.phase_timeout(proxy, endpoint, "read", scale)
+        if connect is None and read is None:
+            return None
+        return httpx.Timeout(
+            TIMEOUT,
+            connect=TIMEOUT if connect is None else connect,
+            read=TIMEOUT if read is None else read,
+        )
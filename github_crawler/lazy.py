@@ -0,0 +1,85 @@
+import asyncio
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+from .settings import LAZY_PREFETCH
+
+if TYPE_CHECKING:
+    from .crawler import Crawler
+
+
+class LazyResult:
+    """
+    A search result whose extra info is fetched when first awaited:
+
+        extra = await result.extra
+    """
+
+    def __init__(self, record: dict, results: "LazyResults", index: int):
+        self.record = record
+        self._results = results
+        self._index = index
+
+    @property
+    def url(self) -> str | None:
+        return self.record.get("url")
+
+    @property
+    def extra(self) -> asyncio.Future:
+        """Awaitable extra info, None if the page could not be fetched"""
+        return self._results.enrich(self._index)
+
+    def __repr__(self) -> str:
+        return f"LazyResult({self.record!r})"
+
+
+class LazyResults(Sequence):
+    """
+    Search results of Crawler.run_lazy. Awaiting the extra info of a result
+    fetches it together with the extra info of the next results, through the
+    crawler's semaphore, caches, seen filter and redirect map.
+    """
+
+    def __init__(self, crawler: "Crawler", records: list[dict], prefetch: int = LAZY_PREFETCH):
+        self.crawler = crawler
+        self.records = records
+        self.prefetch = max(1, prefetch)
+        self.items = [LazyResult(record, self, i) for i, record in enumerate(records)]
+        # Index -> task fetching the batch the result belongs to
+        self.batches: dict[int, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    async def _fetch_batch(self, indices: list[int]) -> None:
+        await self.crawler.get_extra_info([self.records[i] for i in indices])
+
+    async def _extra(self, index: int) -> dict | None:
+        # Shielded: a cancelled consumer must not cancel the results it prefetched
+        await asyncio.shield(self.batches[index])
+        return self.records[index].get("extra")
+
+    def enrich(self, index: int) -> asyncio.Future:
+        """
+        Schedule the extra info of a result and of the next ones not scheduled yet
+        """
+        if index < 0:
+            index += len(self)
+        if index not in self.batches:
+            indices = [
+                i
+                for i in range(index, min(index + self.prefetch, len(self)))
+                if i not in self.batches
+            ]
+            task = self.crawler.track(self._fetch_batch(indices))
+            for i in indices:
+                self.batches[i] = task
+        return asyncio.ensure_future(self._extra(index))
+
+    async def materialize(self) -> list[dict]:
+        """Fetch the extra info of all results and return them like Crawler.run"""
+        await asyncio.gather(*(self.enrich(i) for i in range(len(self))))
+        return self.records
@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Callable, Coroutine
+
+# Event loop implementations selectable with --loop
+LOOP_BACKENDS: list[str] = ["asyncio", "uvloop"]
+
+
+def get_loop_factory(backend: str = "asyncio") -> Callable[[], asyncio.AbstractEventLoop]:
+    """
+    Return a factory for the event loop backend. Raises RuntimeError if uvloop
+    is requested but not installed.
+    """
+    if backend == "uvloop":
+        try:
+            import uvloop
+        except ImportError as e:
+            raise RuntimeError(
+                "The uvloop backend requires the uvloop package: pip install uvloop"
+            ) from e
+        return uvloop.new_event_loop
+    if backend != "asyncio":
+        raise ValueError(f"Unknown event loop backend: {backend}")
+    return asyncio.new_event_loop
+
+
+def enable_eager_tasks(loop: asyncio.AbstractEventLoop | None = None) -> bool:
+    """
+    Make new tasks run eagerly until their first suspension (Python 3.12+), so
+    coroutines that finish without awaiting I/O are never scheduled on the loop.
+    Returns False if the running Python does not support it.
+    """
+    factory = getattr(asyncio, "eager_task_factory", None)
+    if factory is None:
+        return False
+    (loop or asyncio.get_running_loop()).set_task_factory(factory)
+    return True
+
+
+def run_with_loop(coro: Coroutine[Any, Any, Any], backend: str = "asyncio") -> Any:
+    """
+    Run a coroutine to completion on a new event loop of the given backend
+    """
+    loop_factory = get_loop_factory(backend)
+    if hasattr(asyncio, "Runner"):
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            return runner.run(coro)
+
+    # Python 3.10
+    loop = loop_factory()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coro)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        asyncio.set_event_loop(None)
+        loop.close()
@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable
+
+import httpx
+
+from .parsers import parse_owner_profile
+from .settings import OWNER_CACHE_TTL
+from .utils import get_normalized_url, write_json_atomic
+
+# Fetches a URL, e.g. Crawler.fetch_url
+Fetch = Callable[[str], Awaitable[httpx.Response | None]]
+
+
+class OwnerProfiles:
+    """
+    Owner profiles shared by all repositories of a run: each distinct owner is
+    fetched once, concurrent lookups of the same owner wait for that single
+    fetch, and profiles are optionally persisted to a directory with a TTL.
+    """
+
+    def __init__(
+        self,
+        directory: str | None = None,
+        ttl: float = OWNER_CACHE_TTL,
+        logger: logging.Logger | None = None,
+    ):
+        self.directory = directory
+        self.ttl = ttl
+        self.logger = logger or logging.getLogger(__name__)
+        # Profiles of this run keyed by case-folded login; None if the fetch failed
+        self.profiles: dict[str, dict | None] = {}
+        self.inflight: dict[str, asyncio.Task] = {}
+        self.fetched = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.json")
+
+    def load(self, key: str) -> dict | None:
+        """Persisted profile of an owner if it is younger than the TTL"""
+        if not self.directory:
+            return None
+        try:
+            with open(self.path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(
+                f"Ignoring unreadable owner cache entry for {key}: {type(e).__name__}: {e}"
+            )
+            return None
+        if time.time() - entry["stored_at"] >= self.ttl:
+            return None
+        return entry["profile"]
+
+    def store(self, key: str, profile: dict) -> None:
+        """Persist a profile for later runs and other workers"""
+        if not self.directory:
+            return
+        write_json_atomic(self.path(key), {"stored_at": time.time(), "profile": profile})
+
+    async def fetch(self, key: str, login: str, fetch: Fetch) -> dict | None:
+        profile = self.load(key)
+        if profile is not None:
+            return profile
+        url = get_normalized_url(login)
+        response = await fetch(url)
+        if not response or not response.text:
+            self.logger.error(f"Could not get owner profile {url}")
+            return None
+        try:
+            profile = parse_owner_profile(response.text)
+        except Exception as e:
+            self.logger.error(f"Error parsing owner profile {url}: {type(e).__name__}: {e}")
+            return None
+        self.fetched += 1
+        self.store(key, profile)
+        return profile
+
+    async def resolve(self, key: str, login: str, fetch: Fetch) -> dict | None:
+        profile = await self.fetch(key, login, fetch)
+        self.profiles[key] = profile
+        return profile
+
+    async def get(self, login: str, fetch: Fetch) -> dict | None:
+        """
+        Profile of an owner, fetched with fetch at most once per run.
+
+        Args:
+            login: Owner login
+            fetch: Coroutine function fetching a URL
+
+        Returns:
+            Dict with type, followers, location and public_repos, None if the
+            profile could not be fetched
+        """
+        key = login.casefold()
+        if key in self.profiles:
+            return self.profiles[key]
+        task = self.inflight.get(key)
+        if task is None:
+            task = self.inflight[key] = asyncio.ensure_future(self.resolve(key, login, fetch))
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        # Shielded: a waiter cancelled by its deadline must not cancel the others
+        return await asyncio.shield(task)
+
+    async def cancel(self) -> None:
+        """Cancel fetches whose waiters were all cancelled"""
+        tasks = list(self.inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,8 +1,24 @@
+import re
+
 from lxml import html
 import logging
 
 from github_crawler.utils import get_normalized_url
-from .settings import RESULT_XPATH, LANGUAGES_XPATH
+from .settings import (
+    RESULT_XPATH,
+    LANGUAGES_XPATH,
+    RESULT_COUNT_PATTERN,
+    RESULT_COUNT_XPATH,
+    OWNER_SUBJECT_XPATH,
+    OWNER_ORG_XPATH,
+    OWNER_FOLLOWERS_XPATH,
+    OWNER_LOCATION_XPATH,
+    OWNER_REPOS_XPATH,
+)
+
+# The suffix must end a word, so "2 matches" is 2, not 2M
+COUNT_LABEL_RE = re.compile(r"(\d[\d.,]*)\s*([kKmM])?\b")
+COUNT_MULTIPLIERS = {"": 1, "k": 1_000, "m": 1_000_000}
 
 
 def parse_search_results(data: str, logger: logging.Logger | None = None) -> list[dict]:
@@ -22,6 +38,36 @@ def parse_search_results(data: str, logger: logging.Logger | None = None) -> lis
     return results
 
 
+def parse_result_count(data: str, logger: logging.Logger | None = None) -> int | None:
+    """
+    Parse the total number of results reported by a search page.
+    Returns None if the page does not report it.
+    """
+    logger = logger or logging.getLogger(__name__)
+    match = re.search(RESULT_COUNT_PATTERN, data)
+    if match:
+        return int(match.group(1))
+    try:
+        return parse_count_label(html.fromstring(data).xpath(RESULT_COUNT_XPATH))
+    except Exception as e:
+        logger.error(f"Error parsing result count: {type(e).__name__}: {e}")
+    return None
+
+
+def parse_count_label(label: str) -> int | None:
+    """
+    Parse a GitHub count label such as "1,234", "11.7k" or "2M results"
+    """
+    match = COUNT_LABEL_RE.search(label)
+    if not match:
+        return None
+    try:
+        number = float(match.group(1).rstrip(".").replace(",", ""))
+    except ValueError:  # e.g. "1.2.3"
+        return None
+    return int(number * COUNT_MULTIPLIERS[(match.group(2) or "").lower()])
+
+
 def parse_language_stats(
     data: str, logger: logging.Logger | None = None
 ) -> dict[str, float]:
@@ -29,26 +75,57 @@ def parse_language_stats(
     Parse the repository page HTML and extract language stats
     """
     logger = logger or logging.getLogger(__name__)
-    results = {}
     try:
-        tree = html.fromstring(data)
-        language_elements = tree.xpath(LANGUAGES_XPATH)
-        if not language_elements:
-            return results
-        for el in language_elements:
-            lang = el.xpath("normalize-space(span[1]/text())")
-            pct_str = el.xpath("normalize-space(span[last()]/text())")
-            if not lang or not pct_str:
-                continue
-            try:
-                results[lang] = float(
-                    pct_str.replace("%", "").replace(",", ".").strip()
-                )
-            except ValueError:
-                logger.warning(
-                    f"Could not parse percentage for language '{lang}': '{pct_str}'"
-                )
-                continue
+        return extract_language_stats(html.fromstring(data), logger)
     except Exception as e:
         logger.error(f"Error parsing language stats: {type(e).__name__}: {e}")
+    return {}
+
+
+def extract_language_stats(
+    tree: html.HtmlElement, logger: logging.Logger | None = None
+) -> dict[str, float]:
+    """
+    Extract language stats from an already parsed repository page
+    """
+    logger = logger or logging.getLogger(__name__)
+    results = {}
+    for el in tree.xpath(LANGUAGES_XPATH):
+        lang = el.xpath("normalize-space(span[1]/text())")
+        pct_str = el.xpath("normalize-space(span[last()]/text())")
+        if not lang or not pct_str:
+            continue
+        try:
+            results[lang] = float(pct_str.replace("%", "").replace(",", ".").strip())
+        except ValueError:
+            logger.warning(
+                f"Could not parse percentage for language '{lang}': '{pct_str}'"
+            )
     return results
+
+
+def parse_owner_profile(data: str) -> dict:
+    """
+    Parse a user or organization profile page into its type ("user" or
+    "organization"), follower count, location and public repository count.
+    Values the page does not show are None.
+    """
+    tree = html.fromstring(data)
+    subject = tree.xpath(OWNER_SUBJECT_XPATH)
+    if subject:
+        owner_type = "organization" if subject.startswith("organization:") else "user"
+    else:
+        owner_type = "organization" if tree.xpath(OWNER_ORG_XPATH) else "user"
+
+    repos = None
+    counters = tree.xpath(OWNER_REPOS_XPATH)
+    if counters:
+        # The title holds the exact count, the text may be abbreviated
+        repos = parse_count_label(counters[0].get("title") or counters[0].text_content())
+
+    return {
+        "type": owner_type,
+        "followers": parse_count_label(tree.xpath(OWNER_FOLLOWERS_XPATH)),
+        "location": tree.xpath(OWNER_LOCATION_XPATH) or None,
+        "public_repos": repos,
+    }
@@ -0,0 +1,212 @@
+import asyncio
+import cProfile
+import json
+import logging
+import pstats
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterator
+
+from .settings import (
+    PROFILE_LAG_INTERVAL,
+    PROFILE_SLOW_CALLBACK,
+    PROFILE_TOP_N,
+)
+
+
+class SlowCallbackHandler(logging.Handler):
+    """
+    Collects the "Executing <callback> took N seconds" warnings asyncio logs in
+    debug mode, which names slow callbacks
+    """
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.callbacks: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        message = record.getMessage()
+        if message.startswith("Executing "):
+            self.callbacks.append(message)
+
+
+class Profiler:
+    """
+    Profiles a crawl: event loop lag, slow callbacks, per-stage wall/CPU time
+    and optionally cProfile and tracemalloc.
+
+    Slow callbacks are counted from lag samples: a sample later than the
+    threshold means a callback blocked the loop at least that long. asyncio
+    debug mode, which also names them, records a traceback for every handle
+    and task and slows the loop several times, so it is opt-in and reported.
+
+    Stage CPU time is process CPU time while the stage was open, so stages that
+    await overlap with whatever else ran on the loop meanwhile.
+    """
+
+    def __init__(
+        self,
+        lag_interval: float = PROFILE_LAG_INTERVAL,
+        slow_callback: float = PROFILE_SLOW_CALLBACK,
+        cprofile: bool = False,
+        trace_memory: bool = False,
+        debug: bool = False,
+        logger: logging.Logger | None = None,
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.lag_interval = lag_interval
+        self.slow_callback = slow_callback
+        self.lag_samples: list[float] = []
+        # Lag samples over the slow callback threshold
+        self.stalls = 0
+        self.debug = debug
+        self.stages: dict[str, dict[str, float]] = {}
+        self.slow_callbacks = SlowCallbackHandler()
+        self.cprofile = cProfile.Profile() if cprofile else None
+        self.trace_memory = trace_memory
+        self.memory: dict | None = None
+        self._sampler: asyncio.Task | None = None
+        self._started = 0.0
+        self._wall = 0.0
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Accumulate wall and CPU time of a pipeline stage"""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            stats = self.stages.setdefault(name, {"calls": 0, "wall": 0.0, "cpu": 0.0})
+            stats["calls"] += 1
+            stats["wall"] += time.perf_counter() - wall
+            stats["cpu"] += time.process_time() - cpu
+
+    async def sample_lag(self) -> None:
+        """Measure how late the loop wakes up from a fixed sleep"""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            lag = max(0.0, loop.time() - start - self.lag_interval)
+            self.lag_samples.append(lag)
+            if lag >= self.slow_callback:
+                self.stalls += 1
+
+    async def start(self) -> None:
+        if self.debug:
+            loop = asyncio.get_running_loop()
+            # Debug mode makes asyncio log every callback slower than the threshold
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.slow_callback
+            logging.getLogger("asyncio").addHandler(self.slow_callbacks)
+
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.cprofile:
+            self.cprofile.enable()
+        self._sampler = asyncio.create_task(self.sample_lag())
+        self._started = time.perf_counter()
+
+    async def stop(self) -> None:
+        self._wall = time.perf_counter() - self._started
+        if self._sampler:
+            self._sampler.cancel()
+            await asyncio.gather(self._sampler, return_exceptions=True)
+        if self.cprofile:
+            self.cprofile.disable()
+        if self.trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.memory = {
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top": [
+                    {"location": str(stat.traceback), "bytes": stat.size, "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:PROFILE_TOP_N]
+                ],
+            }
+
+        if self.debug:
+            logging.getLogger("asyncio").removeHandler(self.slow_callbacks)
+            asyncio.get_running_loop().set_debug(False)
+
+    def lag_report(self) -> dict[str, float | int]:
+        samples = sorted(self.lag_samples)
+        if not samples:
+            return {"samples": 0}
+        quantiles = (
+            statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+        )
+        return {
+            "samples": len(samples),
+            "mean": statistics.fmean(samples),
+            "p50": quantiles[49],
+            "p95": quantiles[94],
+            "p99": quantiles[98],
+            "max": samples[-1],
+        }
+
+    def cprofile_report(self) -> list[dict] | None:
+        if not self.cprofile:
+            return None
+        stats = pstats.Stats(self.cprofile)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        return [
+            {
+                "function": f"{path}:{line}({func})",
+                "calls": calls,
+                "total_time": total,
+                "cumulative_time": cumulative,
+            }
+            for (path, line, func), (_, calls, total, cumulative, _) in rows[:PROFILE_TOP_N]
+        ]
+
+    def report(self) -> dict:
+        """Machine-readable profile of the run"""
+        return {
+            "wall_time": self._wall,
+            "loop_lag": self.lag_report(),
+            "slow_callbacks": {
+                "threshold": self.slow_callback,
+                "count": self.stalls,
+                # Only named in debug mode
+                "examples": self.slow_callbacks.callbacks[:PROFILE_TOP_N],
+            },
+            # Debug mode inflates loop lag and stage timings
+            "debug_mode": self.debug,
+            "stages": self.stages,
+            "cprofile": self.cprofile_report(),
+            "memory": self.memory,
+        }
+
+    def summary(self) -> str:
+        """Human-readable summary of the run"""
+        lag = self.lag_report()
+        lines = [f"Profile: {self._wall:.3f}s wall time"]
+        if lag["samples"]:
+            lines.append(
+                f"  loop lag: p50 {lag['p50'] * 1000:.1f}ms, p99 {lag['p99'] * 1000:.1f}ms, "
+                f"max {lag['max'] * 1000:.1f}ms over {lag['samples']} samples"
+            )
+        lines.append(f"  slow callbacks (>{self.slow_callback * 1000:.0f}ms): {self.stalls}")
+        if self.debug:
+            lines.append("  asyncio debug mode was on: loop lag and stage timings are inflated")
+        for name, stats in self.stages.items():
+            lines.append(
+                f"  {name}: {stats['calls']} calls, {stats['wall']:.3f}s wall, "
+                f"{stats['cpu']:.3f}s cpu"
+            )
+        if self.memory:
+            lines.append(f"  peak traced memory: {self.memory['peak_bytes'] / 2**20:.1f} MiB")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path: str) -> None:
+        """Write the JSON report, and the raw cProfile stats next to it if enabled"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        if self.cprofile:
+            self.cprofile.dump_stats(path + ".prof")
+        self.logger.info(f"Profile report written to {path}")
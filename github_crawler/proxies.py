@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import math
+import time
+
+import httpx
+
+from .settings import (
+    PROXY_HEALTH_URL,
+    PROXY_MAX_BLOCKS,
+    PROXY_PROBE_TIMEOUT,
+    PREWARM_CONNECTIONS,
+)
+from .utils import get_request_client
+
+
+class ProxyStatus:
+    """
+    A proxy that answered the preflight probe, with its measured latency and
+    the client holding the connection opened by the probe. Proxies that were
+    not probed have an infinite latency and get a client when first used.
+    """
+
+    def __init__(
+        self, proxy: str, latency: float, client: httpx.AsyncClient | None = None
+    ):
+        self.proxy = proxy
+        self.latency = latency
+        self.client = client
+        # Block pages served through this proxy
+        self.blocks = 0
+
+    def __repr__(self) -> str:
+        return f"ProxyStatus({self.proxy!r}, latency={self.latency:.3f}, blocks={self.blocks})"
+
+
+class ProxyPool:
+    """
+    Healthy proxies ranked by preflight latency, fastest first
+    """
+
+    def __init__(self, statuses: list[ProxyStatus]):
+        self.statuses = sorted(statuses, key=lambda s: s.latency)
+
+    @classmethod
+    def from_proxies(cls, proxies: list[str]) -> "ProxyPool":
+        """Pool of proxies that were not probed, in the given order"""
+        return cls([ProxyStatus(proxy, math.inf) for proxy in proxies])
+
+    def __len__(self) -> int:
+        return len(self.statuses)
+
+    @property
+    def proxies(self) -> list[str]:
+        return [s.proxy for s in self.statuses]
+
+    @property
+    def best(self) -> ProxyStatus | None:
+        return self.statuses[0] if self.statuses else None
+
+    def client_for(self, status: ProxyStatus) -> httpx.AsyncClient:
+        """The client of a proxy, created on first use"""
+        if status.client is None:
+            status.client = get_request_client(status.proxy)
+        return status.client
+
+    def record_block(self, proxy: str, logger: logging.Logger | None = None) -> None:
+        """Count a block page against a proxy's health"""
+        for status in self.statuses:
+            if status.proxy != proxy:
+                continue
+            status.blocks += 1
+            if status.blocks == PROXY_MAX_BLOCKS:
+                (logger or logging.getLogger(__name__)).warning(
+                    f"Proxy {proxy} served {status.blocks} block pages, "
+                    "taking it out of rotation"
+                )
+
+    def next_proxy(self, exclude: str) -> ProxyStatus | None:
+        """
+        Healthiest proxy other than exclude: fewest block pages, then lowest
+        latency. None if every other proxy is out of rotation.
+        """
+        candidates = [
+            s for s in self.statuses if s.proxy != exclude and s.blocks < PROXY_MAX_BLOCKS
+        ]
+        return min(candidates, key=lambda s: (s.blocks, s.latency), default=None)
+
+    async def aclose(self, keep: ProxyStatus | None = None) -> None:
+        """Close the clients of all proxies except the one in use"""
+        await asyncio.gather(
+            *(s.client.aclose() for s in self.statuses if s is not keep and s.client)
+        )
+
+
+async def probe_proxy(
+    proxy: str,
+    health_url: str = PROXY_HEALTH_URL,
+    timeout: float = PROXY_PROBE_TIMEOUT,
+    logger: logging.Logger | None = None,
+) -> ProxyStatus | None:
+    """
+    Send one HEAD request through the proxy and measure its latency.
+    Returns None if the proxy is dead or the health URL does not answer with success.
+    """
+    logger = logger or logging.getLogger(__name__)
+    client = get_request_client(proxy)
+    start = time.perf_counter()
+    try:
+        response = await client.head(health_url, timeout=timeout)
+    except Exception as e:
+        logger.warning(f"Proxy {proxy} failed preflight: {type(e).__name__} {e}")
+        await client.aclose()
+        return None
+
+    if not response.is_success:
+        logger.warning(f"Proxy {proxy} failed preflight: HTTP {response.status_code}")
+        await client.aclose()
+        return None
+
+    return ProxyStatus(proxy, time.perf_counter() - start, client)
+
+
+async def prewarm_client(
+    client: httpx.AsyncClient,
+    url: str = PROXY_HEALTH_URL,
+    connections: int = PREWARM_CONNECTIONS,
+    logger: logging.Logger | None = None,
+) -> None:
+    """
+    Open up to `connections` keep-alive connections by sending concurrent HEAD requests,
+    so the first real requests skip TCP/TLS/CONNECT setup
+    """
+    logger = logger or logging.getLogger(__name__)
+    results = await asyncio.gather(
+        *(client.head(url) for _ in range(connections)), return_exceptions=True
+    )
+    failed = sum(isinstance(r, Exception) for r in results)
+    if failed:
+        logger.warning(f"{failed} of {connections} prewarm requests failed")
+
+
+async def preflight_proxies(
+    proxies: list[str],
+    health_url: str = PROXY_HEALTH_URL,
+    timeout: float = PROXY_PROBE_TIMEOUT,
+    prewarm: int = PREWARM_CONNECTIONS,
+    logger: logging.Logger | None = None,
+) -> ProxyPool:
+    """
+    Probe all proxies concurrently, drop dead ones, rank the rest by latency
+    and prewarm connections on the fastest one.
+    """
+    logger = logger or logging.getLogger(__name__)
+    statuses = await asyncio.gather(
+        *(probe_proxy(p, health_url, timeout, logger) for p in proxies)
+    )
+    pool = ProxyPool([s for s in statuses if s is not None])
+
+    dropped = len(proxies) - len(pool)
+    if dropped:
+        logger.warning(f"Dropped {dropped} of {len(proxies)} proxies after preflight")
+
+    if pool.best and prewarm > 1:
+        await prewarm_client(pool.best.client, health_url, prewarm, logger)
+
+    return pool
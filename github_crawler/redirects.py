@@ -0,0 +1,116 @@
+import json
+import logging
+from contextlib import contextmanager
+from typing import Iterator
+
+import httpx
+
+from .settings import BASE_URL, PERMANENT_REDIRECT_CODES, REDIRECT_MAX_HOPS
+from .utils import get_normalized_url, write_json_atomic
+
+try:
+    import fcntl
+except ImportError:  # Windows: no locking between processes
+    fcntl = None
+
+
+class RedirectMap:
+    """
+    Map of moved URLs to where they permanently redirect, so renamed and
+    transferred repositories are fetched at their final URL without redirect
+    round-trips. Optionally persisted as a JSON file; saving merges with
+    entries other runs or workers saved meanwhile.
+    """
+
+    def __init__(self, path: str | None = None, logger: logging.Logger | None = None):
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+        self.moved: dict[str, str] = {}
+        # Entries recorded by this process, merged into the file on save
+        self.recorded: dict[str, str] = {}
+        if path:
+            self.moved = self.load()
+
+    def __len__(self) -> int:
+        return len(self.moved)
+
+    def load(self) -> dict[str, str]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(
+                f"Ignoring unreadable redirect map {self.path}: {type(e).__name__}: {e}"
+            )
+            return {}
+
+    def resolve(self, url: str) -> str:
+        """Final URL of a URL, following recorded redirects"""
+        # Called for every result: skip the work when nothing has moved, and
+        # parsed result URLs are already normalized
+        if not self.moved:
+            return url
+        if not url.startswith(BASE_URL) or "#" in url:
+            url = get_normalized_url(url)
+        for _ in range(REDIRECT_MAX_HOPS):
+            target = self.moved.get(url)
+            if target is None or target == url:
+                break
+            url = target
+        return url
+
+    def record(self, source: str, target: str) -> None:
+        source = get_normalized_url(source)
+        target = get_normalized_url(target)
+        if source != target and self.moved.get(source) != target:
+            self.moved[source] = self.recorded[source] = target
+
+    def record_response(self, url: str, response: httpx.Response) -> str:
+        """
+        Record where a request for url ended up, if every hop was a permanent
+        redirect.
+
+        Returns:
+            Final URL of the response, url if it was not redirected
+        """
+        history = getattr(response, "history", None) or []
+        if not history:
+            return url
+        final = str(response.url)
+        if all(hop.status_code in PERMANENT_REDIRECT_CODES for hop in history):
+            self.record(url, final)
+            for hop in history:
+                self.record(str(hop.request.url), final)
+        return final
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Exclusive lock on a sidecar file while the map is merged and saved"""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def save(self) -> None:
+        """
+        Merge the redirects recorded by this process into the file. Failures are
+        logged, losing only this run's new redirects.
+        """
+        if not self.path or not self.recorded:
+            return
+        try:
+            with self.lock():
+                moved = {**self.load(), **self.recorded}
+                write_json_atomic(self.path, moved, indent=0, sort_keys=True)
+        except OSError as e:
+            self.logger.error(
+                f"Failed to save redirect map {self.path}: {type(e).__name__}: {e}"
+            )
+            return
+        self.logger.info(f"Recorded {len(self.recorded)} redirects in {self.path}")
+        self.moved = moved
+        self.recorded = {}
@@ -0,0 +1,129 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse, parse_qs
+
+from .archive import read_warc
+from .extractors import extract_fields
+from .parsers import parse_owner_profile, parse_search_results
+from .settings import REPARSE_CHUNKSIZE, SEARCH_TYPES
+from .utils import dedupe_results, get_normalized_url, owner_from_url
+
+
+def is_search_page(url: str) -> bool:
+    return urlparse(url).path.rstrip("/") == "/search"
+
+
+def owner_page_login(url: str) -> str | None:
+    """Login of an owner profile page (a single path segment), None for other pages"""
+    path = urlparse(url).path.strip("/")
+    if path and "/" not in path and not is_search_page(url):
+        return path
+    return None
+
+
+def page_search_type(url: str) -> str:
+    """
+    Infer which search type a result page belongs to from its URL
+    """
+    parts = urlparse(url).path.strip("/").split("/")
+    if len(parts) > 2 and parts[2] in ("issues", "pull"):
+        return "Issues"
+    if len(parts) > 2 and parts[2] == "wiki":
+        return "Wikis"
+    return "Repositories"
+
+
+def reparse_page(job: tuple[str, str, str, list[str] | None]) -> tuple:
+    """
+    Parse one archived page. Runs in worker processes, so it only takes and
+    returns picklable values.
+
+    Returns:
+        ("search", url, search_type, results) for search pages,
+        ("owner", url, login, profile) for owner profile pages,
+        ("page", url, requested_url, extra) for result pages
+    """
+    url, requested_url, text, fields = job
+    if is_search_page(url):
+        search_type = parse_qs(urlparse(url).query).get("type", [None])[0]
+        return "search", url, search_type, parse_search_results(text)
+    login = owner_page_login(url)
+    if login:
+        return "owner", url, login, parse_owner_profile(text)
+    extra = extract_fields(text, url, page_search_type(url), fields)
+    return "page", url, requested_url, extra
+
+
+def reparse_archive(
+    path: str,
+    fields: list[str] | None = None,
+    workers: int | None = None,
+    search_type: str | None = None,
+    logger: logging.Logger | None = None,
+) -> list[dict]:
+    """
+    Re-run the parsers over every successful response in a WARC archive,
+    without any network access.
+
+    Args:
+        path: WARC archive path
+        fields: Extra fields to extract, all registered fields if None
+        workers: Number of parser processes, one per core if None, in-process if 1
+        search_type: Only keep results of search pages of this type
+        logger: Optional logger instance, creates default if None
+
+    Returns:
+        Search results with extra info attached where the result page is archived,
+        and the owner profile where the owner's page is archived too
+    """
+    logger = logger or logging.getLogger(__name__)
+    if search_type is not None and search_type not in SEARCH_TYPES:
+        raise ValueError(f"Unknown search type: {search_type}")
+
+    jobs = (
+        (get_normalized_url(r.url), get_normalized_url(r.requested_url), r.text, fields)
+        for r in read_warc(path)
+        if 200 <= r.status_code < 300
+    )
+    if workers == 1:
+        parsed = [reparse_page(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            parsed = list(pool.map(reparse_page, jobs, chunksize=REPARSE_CHUNKSIZE))
+
+    results = []
+    extras = {}
+    # Owner profiles keyed by case-folded login, as the crawler looks them up
+    owners = {}
+    for kind, url, detail, payload in parsed:
+        if kind == "search":
+            if search_type is None or (detail or "").lower() == search_type.lower():
+                results.extend(payload)
+        elif kind == "owner":
+            owners[detail.casefold()] = payload
+        else:
+            extras[url] = extras[detail] = (url, payload)
+
+    results = dedupe_results(results)
+    linked = set()
+    for record in results:
+        if record["url"] in extras:
+            page_url, extra = extras[record["url"]]
+            record["extra"] = extra
+            linked.add(page_url)
+
+    # Archived pages whose search page is not in the archive
+    if search_type is None:
+        for page_url, extra in dict(extras.values()).items():
+            if page_url not in linked:
+                results.append({"url": page_url, "extra": extra})
+
+    for record in results:
+        owner = owner_from_url(record["url"])
+        if "extra" in record and owner and owner.casefold() in owners:
+            record["extra"]["owner_profile"] = owners[owner.casefold()]
+
+    logger.info(
+        f"Re-parsed {len(parsed)} archived pages into {len(results)} results"
+    )
+    return results
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from typing import Iterator
+
+from .settings import SEEN_CAPACITY, SEEN_FP_RATE
+from .utils import get_normalized_url
+
+try:
+    import fcntl
+except ImportError:  # Windows: no locking between processes
+    fcntl = None
+
+MAGIC = b"GHCSEEN1"
+# magic, capacity, false positive rate, number of bits, number of hashes, count
+HEADER = struct.Struct("<8sQdQIQ")
+COUNT_OFFSET = HEADER.size - 8
+
+
+def filter_size(capacity: int, fp_rate: float) -> tuple[int, int]:
+    """
+    Optimal Bloom filter size for the capacity and false positive rate
+
+    Returns:
+        Tuple of (number of bits, number of hash functions)
+    """
+    bits = math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+class SeenFilter:
+    """
+    Persistent Bloom filter of enriched URLs, memory-mapped from a file so it is
+    shared between runs and worker processes. Membership may report false
+    positives at about fp_rate but never false negatives, and costs
+    -ln(fp_rate) / ln(2)^2 bits per URL: 1.8 MB per million URLs at 0.1%.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = SEEN_CAPACITY,
+        fp_rate: float = SEEN_FP_RATE,
+        logger: logging.Logger | None = None,
+    ):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < fp_rate < 1:
+            raise ValueError("fp_rate must be between 0 and 1")
+        self.path = path
+        self.logger = logger or logging.getLogger(__name__)
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            with self.lock():
+                self._init_file(capacity, fp_rate)
+            self.mm = mmap.mmap(self.fd, 0)
+        except BaseException:
+            os.close(self.fd)
+            raise
+        self.warned_full = False
+
+    def _init_file(self, capacity: int, fp_rate: float) -> None:
+        size = os.fstat(self.fd).st_size
+        if size == 0:
+            bits, hashes = filter_size(capacity, fp_rate)
+            os.ftruncate(self.fd, HEADER.size + (bits + 7) // 8)
+            os.pwrite(self.fd, HEADER.pack(MAGIC, capacity, fp_rate, bits, hashes, 0), 0)
+        elif size < HEADER.size:
+            raise ValueError(f"Not a seen-URL filter file: {self.path}")
+
+        header = HEADER.unpack(os.pread(self.fd, HEADER.size, 0))
+        magic, self.capacity, self.fp_rate, self.bits, self.hashes, _ = header
+        if magic != MAGIC or (size and size != HEADER.size + (self.bits + 7) // 8):
+            raise ValueError(f"Not a seen-URL filter file: {self.path}")
+        if (self.capacity, self.fp_rate) != (capacity, fp_rate):
+            self.logger.info(
+                f"Using the sizing of existing seen-URL filter {self.path}: "
+                f"capacity {self.capacity}, false positive rate {self.fp_rate}"
+            )
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Exclusive lock on the file while bits are set by this process"""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def _positions(self, url: str) -> list[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(
+            get_normalized_url(url).encode("utf-8"), digest_size=16
+        ).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        h2 |= 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def __contains__(self, url: str) -> bool:
+        # Bits are only ever set, so reading without the lock can at worst miss
+        # a URL that is being added concurrently
+        mm = self.mm
+        return all(
+            mm[HEADER.size + (pos >> 3)] & (1 << (pos & 7)) for pos in self._positions(url)
+        )
+
+    def __len__(self) -> int:
+        """Approximate number of distinct URLs added"""
+        return struct.unpack_from("<Q", self.mm, COUNT_OFFSET)[0]
+
+    def add(self, url: str) -> bool:
+        """
+        Add a URL.
+
+        Returns:
+            True if the URL was not in the filter yet
+        """
+        positions = self._positions(url)
+        mm = self.mm
+        added = False
+        with self.lock():
+            for pos in positions:
+                index = HEADER.size + (pos >> 3)
+                mask = 1 << (pos & 7)
+                if not mm[index] & mask:
+                    mm[index] |= mask
+                    added = True
+            if added:
+                count = len(self) + 1
+                struct.pack_into("<Q", mm, COUNT_OFFSET, count)
+        if added and count > self.capacity and not self.warned_full:
+            self.warned_full = True
+            self.logger.warning(
+                f"Seen-URL filter {self.path} holds more than its capacity of "
+                f"{self.capacity} URLs, false positives will exceed {self.fp_rate}"
+            )
+        return added
+
+    def close(self) -> None:
+        if self.mm.closed:
+            return
+        self.mm.flush()
+        self.mm.close()
+        os.close(self.fd)
+
+    def __enter__(self) -> "SeenFilter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
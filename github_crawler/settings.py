@@ -26,27 +26,232 @@ HEADERS: dict[str, str] = {
 # Maximum number of concurrent requests
 MAX_CONCURRENT_REQUESTS: int = 5
 
+# Results whose extra info is fetched together when a lazy result is awaited:
+# the awaited one and the ones after it
+LAZY_PREFETCH: int = MAX_CONCURRENT_REQUESTS
+
+# Maximum number of queries crawled concurrently by one worker in batch mode
+MAX_CONCURRENT_QUERIES: int = 4
+
 # Timeout for requests (seconds)
 TIMEOUT: int = 15
 
+# Adaptive timeouts: each request gets connect and read timeouts derived from
+# the latency recently observed for its proxy and endpoint, instead of TIMEOUT
+ADAPTIVE_TIMEOUTS: bool = True
+
+# Latency samples kept per proxy, endpoint and phase
+LATENCY_WINDOW: int = 200
+
+# Samples needed before a phase gets an adaptive timeout
+LATENCY_MIN_SAMPLES: int = 20
+
+# Adaptive timeout = this percentile of observed latency x LATENCY_TIMEOUT_FACTOR
+LATENCY_PERCENTILE: float = 99
+LATENCY_TIMEOUT_FACTOR: float = 3.0
+
+# Bounds of adaptive connect and read timeouts (seconds)
+CONNECT_TIMEOUT_BOUNDS: tuple[float, float] = (1.0, 10.0)
+READ_TIMEOUT_BOUNDS: tuple[float, float] = (2.0, TIMEOUT)
+
+# Adaptive timeouts grow by this factor on each retry of a request; the last
+# attempt always gets the fixed TIMEOUT
+LATENCY_RETRY_FACTOR: float = 2.0
+
 # Whether to follow redirects in requests
 FOLLOW_REDIRECTS: bool = True
 
+# Bytes at the start of a 200 response searched for the page title; the title
+# of GitHub pages comes well within them
+BLOCK_SNIFF_BYTES: int = 16384
+
+# Lowercase title prefixes of block pages served with status 200, by kind.
+# Only titles are matched: repository descriptions in the page head may
+# mention rate limits or challenges
+BLOCK_TITLES: dict[str, list[str]] = {
+    "rate_limit": ["rate limit", "too many requests"],
+    "abuse": ["whoa there", "abuse detection"],
+    "login": ["sign in to github", "sign in · github"],
+    "challenge": ["just a moment", "attention required"],
+}
+
+# Paths of pages a blocked request is redirected to, by kind
+BLOCK_REDIRECT_PATHS: dict[str, str] = {
+    "/login": "login",
+    "/session": "login",
+}
+
+# Times a request is moved to another proxy after a block page before giving up
+BLOCK_MAX_REROUTES: int = 3
+
+# Proxies that served this many block pages are taken out of rotation
+PROXY_MAX_BLOCKS: int = 3
+
+# Redirects recorded in the redirect map; renamed and transferred repositories
+# answer 301, temporary redirects (e.g. to the login page) are not recorded
+PERMANENT_REDIRECT_CODES: set[int] = {301, 308}
+
+# Longest chain of recorded redirects followed when rewriting a URL
+REDIRECT_MAX_HOPS: int = 10
+
 # HTTP status codes that should trigger a retry
 RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
 
+# Boolean operators of GitHub search; queries using them (or quoted phrases)
+# depend on term order and case, so their cache key keeps the query as written
+SEARCH_OPERATORS: set[str] = {"AND", "OR", "NOT"}
+
+# Query results cached for less than this are returned without crawling (seconds)
+QUERY_CACHE_TTL: float = 3600
+
+# Expired query results are still returned for this long while being refreshed
+# in the background (seconds)
+QUERY_CACHE_STALE_TTL: float = 86400
+
+# Number of languages listed in language reports
+LANGUAGE_REPORT_TOP_N: int = 10
+
+# Percentiles of per-repository language percentage in language reports
+LANGUAGE_REPORT_PERCENTILES: list[int] = [25, 50, 75, 90]
+
+# Initial number of rows of the language report matrix
+LANGUAGE_REPORT_INITIAL_ROWS: int = 1024
+
+# Number of URLs the seen-URL filter is sized for; past it the false positive
+# rate grows beyond the configured one
+SEEN_CAPACITY: int = 10_000_000
+
+# False positive rate of the seen-URL filter at capacity
+SEEN_FP_RATE: float = 0.001
+
+# Owner profiles persisted with --owner-cache-dir are refetched after this (seconds)
+OWNER_CACHE_TTL: float = 7 * 86400
+
+# Pages handed to a worker process at once when re-parsing an archive
+REPARSE_CHUNKSIZE: int = 16
+
+# Interval of the event loop lag sampler in profile mode (seconds)
+PROFILE_LAG_INTERVAL: float = 0.05
+
+# Callbacks blocking the event loop longer than this are reported in profile mode (seconds)
+PROFILE_SLOW_CALLBACK: float = 0.05
+
+# Number of entries in the top lists of the profile report
+PROFILE_TOP_N: int = 20
+
+# Default path of the profile report
+PROFILE_REPORT_PATH: str = "profile.json"
+
 # Maximum number of retry attempts
 MAX_RETRIES: int = 5
 
+# URL probed through every proxy during preflight; GitHub itself by default so
+# the probe also opens a keep-alive connection the crawl can reuse
+PROXY_HEALTH_URL: str = BASE_URL
+
+# Timeout for a single proxy preflight probe (seconds)
+PROXY_PROBE_TIMEOUT: float = 5.0
+
+# Number of keep-alive connections opened on the selected proxy before crawling
+PREWARM_CONNECTIONS: int = MAX_CONCURRENT_REQUESTS
+
 # Exponential backoff base and cap for retries (seconds)
 BACKOFF_BASE: float = 0.5
 BACKOFF_CAP: float = 20.0
 
+# GitHub search returns at most this many results per query
+SEARCH_RESULT_CAP: int = 1000
+
+# Number of results on one search page
+RESULTS_PER_PAGE: int = 10
+
+# Last reachable search page for a single query
+MAX_SEARCH_PAGES: int = SEARCH_RESULT_CAP // RESULTS_PER_PAGE
+
+# Qualifiers a query can be sharded by
+SHARD_QUALIFIERS: list[str] = ["created", "stars", "language"]
+
+# First day covered by created: shards (GitHub launch)
+SHARD_CREATED_START: str = "2008-01-01"
+
+# Upper bound of the closed stars: range; everything above is one shard
+SHARD_STARS_MAX: int = 100_000
+
+# Languages that get their own shard when sharding by language:
+SHARD_LANGUAGES: list[str] = [
+    "JavaScript",
+    "Python",
+    "Java",
+    "TypeScript",
+    "C#",
+    "C++",
+    "PHP",
+    "Go",
+    "Ruby",
+    "C",
+    "Shell",
+    "HTML",
+    "Rust",
+    "Kotlin",
+    "Swift",
+]
+
+# Maximum recursion depth when subdividing shards
+SHARD_MAX_DEPTH: int = 24
+
 
 # XPath for extracting search result URLs
 RESULT_XPATH: str = "//div[contains(@class, 'search-title')]/a/@href"
 
+# Pattern for the total result count in the search page embedded data
+RESULT_COUNT_PATTERN: str = r'"result_count"\s*:\s*(\d+)'
+
+# XPath for the rendered total result count label, e.g. "1.2k results"
+RESULT_COUNT_XPATH: str = "normalize-space(//*[@data-testid='resolved-count-label'])"
+
 # XPath for extracting language statistics from repository page
 LANGUAGES_XPATH: str = (
     "//div[@class='Layout-sidebar']//h2[contains(text(), 'Languages')]/..//a"
 )
+
+# XPaths for repository page fields
+STARS_COUNTER_XPATH: str = "string(//*[@id='repo-stars-counter-star']/@title)"
+STARS_XPATH: str = "normalize-space(//a[contains(@href, '/stargazers')]/strong)"
+TOPICS_XPATH: str = "//a[contains(@class, 'topic-tag')]"
+LICENSE_XPATH: str = (
+    "normalize-space(//h3[normalize-space()='License']/following-sibling::div[1]//a)"
+)
+
+# XPaths for issue page fields
+ISSUE_TITLE_XPATH: str = (
+    "normalize-space((//*[@data-testid='issue-title'] | //bdi[contains(@class, 'js-issue-title')])[1])"
+)
+ISSUE_STATE_XPATH: str = (
+    "normalize-space((//*[@data-testid='header-state'] | //span[contains(@class, 'State')])[1])"
+)
+ISSUE_LABELS_XPATH: str = "//a[contains(@class, 'IssueLabel')]"
+ISSUE_AUTHOR_XPATH: str = (
+    "normalize-space((//*[@data-testid='issue-body-header-author'] | //a[contains(@class, 'author')])[1])"
+)
+
+# XPaths for wiki page fields
+WIKI_TITLE_XPATH: str = "normalize-space(//h1[contains(@class, 'gh-header-title')])"
+WIKI_UPDATED_XPATH: str = "string((//div[contains(@class, 'gh-header-meta')]//relative-time)[1]/@datetime)"
+WIKI_REVISIONS_XPATH: str = "normalize-space(//a[contains(@href, '/_history')])"
+
+# XPaths for owner profile page fields. The hovercard subject tag reads
+# "user:<id>" or "organization:<id>"
+OWNER_SUBJECT_XPATH: str = "string(//meta[@name='hovercard-subject-tag']/@content)"
+OWNER_ORG_XPATH: str = (
+    "boolean(//*[@itemtype='http://schema.org/Organization'] | //*[contains(@class, 'orghead')])"
+)
+OWNER_FOLLOWERS_XPATH: str = (
+    "normalize-space((//a[contains(@href, 'tab=followers') or contains(@href, '/followers')]/span)[1])"
+)
+OWNER_LOCATION_XPATH: str = (
+    "normalize-space((//*[@itemprop='homeLocation'] | //*[@itemprop='location'])[1])"
+)
+OWNER_REPOS_XPATH: str = (
+    "(//a[contains(@href, 'tab=repositories') or contains(@href, '/repositories')]"
+    "/span[contains(@class, 'Counter')])[1]"
+)
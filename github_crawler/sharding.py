@@ -0,0 +1,108 @@
+from datetime import date, timedelta
+
+from .settings import SHARD_CREATED_START, SHARD_STARS_MAX, SHARD_LANGUAGES
+
+# A language shard is either one language or every language not in SHARD_LANGUAGES
+OTHER_LANGUAGES = "other"
+
+
+def created_qualifier(value: tuple[date, date]) -> str:
+    start, end = value
+    return f"created:{start.isoformat()}..{end.isoformat()}"
+
+
+def split_created(value: tuple[date, date]) -> list[tuple[date, date]]:
+    """Bisect a date range, a single day cannot be split"""
+    start, end = value
+    if start >= end:
+        return []
+    mid = start + (end - start) // 2
+    return [(start, mid), (mid + timedelta(days=1), end)]
+
+
+def stars_qualifier(value: tuple[int, int | None]) -> str:
+    lo, hi = value
+    if hi is None:
+        return f"stars:>={lo}"
+    return f"stars:{lo}..{hi}"
+
+
+def split_stars(value: tuple[int, int | None]) -> list[tuple[int, int | None]]:
+    """
+    Bisect a stars range. The open-ended root range is first cut at SHARD_STARS_MAX,
+    everything above it stays one shard.
+    """
+    lo, hi = value
+    if hi is None:
+        if lo > SHARD_STARS_MAX:
+            return []
+        return [(lo, SHARD_STARS_MAX), (SHARD_STARS_MAX + 1, None)]
+    if lo >= hi:
+        return []
+    mid = lo + (hi - lo) // 2
+    return [(lo, mid), (mid + 1, hi)]
+
+
+def language_qualifier(value: str | None) -> str:
+    if value == OTHER_LANGUAGES:
+        return " ".join(f"-language:{_quote(lang)}" for lang in SHARD_LANGUAGES)
+    return f"language:{_quote(value)}"
+
+
+def split_language(value: str | None) -> list[str]:
+    """Split all languages into one shard per known language plus the rest"""
+    if value is not None:
+        return []
+    return [*SHARD_LANGUAGES, OTHER_LANGUAGES]
+
+
+def _quote(value: str) -> str:
+    return f'"{value}"' if " " in value else value
+
+
+# qualifier name -> (format function, split function, root value factory)
+QUALIFIERS = {
+    "created": (
+        created_qualifier,
+        split_created,
+        # Resolved lazily so long-running crawls include today
+        lambda: (date.fromisoformat(SHARD_CREATED_START), date.today()),
+    ),
+    "stars": (stars_qualifier, split_stars, lambda: (0, None)),
+    "language": (language_qualifier, split_language, lambda: None),
+}
+
+
+class Shard:
+    """
+    A search query narrowed down by range qualifiers, which can be split into
+    smaller disjoint shards covering the same results
+    """
+
+    def __init__(self, keywords: str, ranges: dict | None = None, depth: int = 0):
+        self.keywords = keywords
+        self.ranges = ranges or {}
+        self.depth = depth
+
+    @property
+    def query(self) -> str:
+        qualifiers = [QUALIFIERS[name][0](value) for name, value in self.ranges.items()]
+        return " ".join([self.keywords, *qualifiers])
+
+    def split(self, qualifiers: list[str]) -> list["Shard"]:
+        """
+        Split the shard by the first qualifier in the list that can still be split.
+        Returns an empty list if none can.
+        """
+        for name in qualifiers:
+            value = self.ranges[name] if name in self.ranges else QUALIFIERS[name][2]()
+            parts = QUALIFIERS[name][1](value)
+            if parts:
+                return [
+                    Shard(self.keywords, {**self.ranges, name: part}, self.depth + 1)
+                    for part in parts
+                ]
+        return []
+
+    def __repr__(self) -> str:
+        return f"Shard({self.query!r})"
@@ -1,11 +1,20 @@
 import asyncio
+import json
 import logging
+import os
 import random
+import tempfile
+import time
 from asyncio import Semaphore
+from contextlib import nullcontext
 from urllib.parse import urlparse, urljoin, urldefrag
 
 import httpx
 
+from .archive import WarcWriter
+from .blocks import BlockedPageError, classify_block
+from .latency import LatencyTracker, RequestTrace
+from .profiling import Profiler
 from .settings import (
     BASE_URL,
     TIMEOUT,
@@ -15,9 +24,19 @@ from .settings import (
     BACKOFF_CAP,
     BACKOFF_BASE,
     MAX_RETRIES,
+    MAX_SEARCH_PAGES,
 )
 
 
+def setup_logging(level: str = "INFO") -> None:
+    """Configure logging with proper formatting."""
+    logging.basicConfig(
+        level=getattr(logging, level.upper()),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+
 def get_request_client(proxy: str) -> httpx.AsyncClient:
     """
     Create and return an AsyncClient configured with proxy and default settings
@@ -30,6 +49,22 @@ def get_request_client(proxy: str) -> httpx.AsyncClient:
     )
 
 
+def write_json_atomic(path: str, data, **kwargs) -> None:
+    """
+    Write data as JSON to a temporary file next to path and move it in place,
+    so concurrent readers never see a partial file. kwargs go to json.dump.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, **kwargs)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
 def get_normalized_url(url: str) -> str:
     """
     Normalize a relative or absolute URL to a full GitHub URL
@@ -38,6 +73,41 @@ def get_normalized_url(url: str) -> str:
     return absu
 
 
+def owner_from_url(url: str) -> str | None:
+    """
+    Extract the owner from a GitHub repository, issue or wiki URL
+    """
+    parts = urlparse(url).path.strip("/").split("/")
+    if len(parts) >= 2:
+        return parts[0]
+    return None
+
+
+def resolve_pages(pages: int | None, shard_by: list[str] | None = None) -> int:
+    """
+    Number of search pages to fetch per query or shard: all of them for sharded
+    crawls and one otherwise, unless given
+    """
+    if pages is None:
+        pages = MAX_SEARCH_PAGES if shard_by else 1
+    return min(pages, MAX_SEARCH_PAGES)
+
+
+def dedupe_results(results: list[dict]) -> list[dict]:
+    """
+    Drop results with an already seen URL, keeping the first occurrence and order
+    """
+    seen = set()
+    unique = []
+    for result in results:
+        url = result.get("url")
+        if url in seen:
+            continue
+        seen.add(url)
+        unique.append(result)
+    return unique
+
+
 def normalize_proxy(p: str) -> str:
     """
     Normalize a proxy string to a full URL. Raises ValueError if invalid
@@ -58,6 +128,54 @@ def get_expo_backoff(
     return round(delay, 2)
 
 
+def get_remaining_time(deadline: float | None) -> float | None:
+    """
+    Seconds left until a time.monotonic() deadline, None if there is no deadline
+    """
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def fits_deadline(delay: float, deadline: float | None) -> bool:
+    """Check whether sleeping for delay seconds still leaves time before the deadline"""
+    remaining = get_remaining_time(deadline)
+    return remaining is None or delay < remaining
+
+
+def profile_stage(profiler: Profiler | None, name: str):
+    """Time a pipeline stage when profiling, no-op otherwise"""
+    return profiler.stage(name) if profiler else nullcontext()
+
+
+async def _get_with_semaphore(
+    url: str,
+    client: httpx.AsyncClient,
+    sem: Semaphore,
+    params: dict | None,
+    timeout: httpx.Timeout | None = None,
+    trace: RequestTrace | None = None,
+    profiler: Profiler | None = None,
+) -> httpx.Response:
+    kwargs = {}
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    if trace is not None:
+        kwargs["extensions"] = {"trace": trace}
+    # Waiting for a free slot is timed apart from the request itself
+    with profile_stage(profiler, "semaphore"):
+        await sem.acquire()
+    try:
+        with profile_stage(profiler, "fetch"):
+            started = time.monotonic()
+            response = await client.get(url, params=params, **kwargs)
+            if trace is not None:
+                trace.elapsed = time.monotonic() - started
+            return response
+    finally:
+        sem.release()
+
+
 async def make_request(
     url: str,
     client: httpx.AsyncClient,
@@ -65,6 +183,11 @@ async def make_request(
     params: dict | None = None,
     max_retries: int = MAX_RETRIES,
     logger: logging.Logger | None = None,
+    deadline: float | None = None,
+    archive: WarcWriter | None = None,
+    latency: LatencyTracker | None = None,
+    proxy: str = "",
+    profiler: Profiler | None = None,
 ) -> httpx.Response | None:
     """
     Make an async GET request with semaphore and retries.
@@ -76,26 +199,61 @@ async def make_request(
         params: Optional query parameters dict
         max_retries: Maximum number of retry attempts
         logger: Optional logger instance, creates default if None
+        deadline: Optional time.monotonic() value after which no more attempts,
+            waits or backoff sleeps are made
+        archive: Optional WARC archive successful responses are written to
+        latency: Optional tracker that sets adaptive connect and read timeouts
+            for each attempt but the last, widening them on retries, and records
+            the latency of every response and timeout
+        proxy: Proxy the client uses, the key of latency samples
+        profiler: Optional profiler timing semaphore waits, network time and
+            backoff sleeps as separate stages
 
     Returns:
         httpx.Response object if successful, None if failed
+
+    Raises:
+        BlockedPageError: The response is a block page served as success; retrying
+            through the same client is pointless, so the caller decides where to go
     """
     if not logger:
         logger = logging.getLogger(__name__)
 
     for attempt in range(max_retries + 1):
+        remaining = get_remaining_time(deadline)
+        if remaining is not None and remaining <= 0:
+            logger.warning(f"Deadline exceeded before requesting {url}")
+            return None
+        timeout = trace = None
+        if latency is not None:
+            # The last attempt falls back to the fixed TIMEOUT, so a proxy that
+            # got slower than its samples still gets through
+            if attempt < max_retries:
+                timeout = latency.timeout(proxy, url, attempt)
+            trace = RequestTrace()
         try:
-            async with sem:
-                response = await client.get(url, params=params)
+            request = _get_with_semaphore(url, client, sem, params, timeout, trace, profiler)
+            if remaining is None:
+                response = await request
+            else:
+                response = await asyncio.wait_for(request, remaining)
+            if latency is not None:
+                latency.record(proxy, url, trace)
 
             # Check for HTTP error status codes that should be retried
             if response.status_code in RETRY_STATUS_CODES:
                 if attempt < max_retries:
                     delay = get_expo_backoff(attempt)
+                    if not fits_deadline(delay, deadline):
+                        logger.warning(
+                            f"HTTP {response.status_code} for {url}. No time left to retry"
+                        )
+                        return None
                     logger.warning(
                         f"HTTP {response.status_code} for {url}. Retrying in {delay}s"
                     )
-                    await asyncio.sleep(delay)
+                    with profile_stage(profiler, "backoff"):
+                        await asyncio.sleep(delay)
                     continue
                 else:
                     logger.error(
@@ -108,15 +266,41 @@ async def make_request(
                 logger.error(f"HTTP {response.status_code} for {url} - not retrying")
                 return None
 
+            kind = classify_block(response)
+            if kind:
+                raise BlockedPageError(kind, url)
+
+            if archive:
+                archive.write_response(response)
             return response
 
+        except BlockedPageError:
+            raise
+
+        except asyncio.TimeoutError:
+            logger.warning(f"Deadline exceeded while requesting {url}")
+            return None
+
         except (httpx.TimeoutException, httpx.NetworkError) as e:
+            if latency is not None and isinstance(e, httpx.TimeoutException):
+                latency.record_timeout(proxy, url, e, timeout or httpx.Timeout(TIMEOUT))
+            if timeout is not None and isinstance(e, httpx.TimeoutException):
+                logger.debug(
+                    f"{type(e).__name__} for {url} with adaptive timeouts "
+                    f"connect={timeout.connect}s read={timeout.read}s"
+                )
             if attempt < max_retries:
                 delay = get_expo_backoff(attempt)
+                if not fits_deadline(delay, deadline):
+                    logger.warning(
+                        f"Request failed for {url}: {type(e).__name__} {e}. No time left to retry"
+                    )
+                    return None
                 logger.warning(
                     f"Request failed for {url}: {type(e).__name__} {e}. Retrying in {delay}s"
                 )
-                await asyncio.sleep(delay)
+                with profile_stage(profiler, "backoff"):
+                    await asyncio.sleep(delay)
                 continue
             else:
                 logger.error(
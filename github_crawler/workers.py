@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import multiprocessing
+import queue as queue_module
+import random
+from typing import Callable
+
+from .aggregate import LanguageAggregator
+from .cache import QueryCache
+from .crawler import Crawler
+from .latency import LatencyTracker
+from .loops import enable_eager_tasks, run_with_loop
+from .owners import OwnerProfiles
+from .proxies import ProxyPool
+from .redirects import RedirectMap
+from .seen import SeenFilter
+from .settings import ADAPTIVE_TIMEOUTS, MAX_CONCURRENT_QUERIES
+from .utils import setup_logging
+
+# How often the parent checks for dead workers while waiting for results (seconds)
+POLL_INTERVAL = 0.5
+
+
+def split_proxies(proxies: list[str], workers: int) -> list[list[str]]:
+    """
+    Give every worker its own share of the proxies. With fewer proxies than
+    workers, proxies are shared round-robin.
+    """
+    if len(proxies) < workers:
+        return [[proxies[i % len(proxies)]] for i in range(workers)]
+    return [proxies[i::workers] for i in range(workers)]
+
+
+async def crawl_queries(
+    jobs: list[tuple[int, list[str]]],
+    proxies: list[str],
+    options: dict,
+    emit: Callable[[int, list[dict] | None, dict | None], None],
+    cache: dict | None = None,
+    logger: logging.Logger | None = None,
+    language_report: bool = False,
+    seen: dict | None = None,
+    owner_profiles: dict | None = None,
+    redirect_map: str | None = None,
+    eager_tasks: bool = False,
+) -> None:
+    """
+    Crawl the queries of one worker concurrently, emitting (index, results,
+    language report) as each query finishes. The seen-URL filter file is
+    mapped once per worker and shared by its crawlers, as are the latency
+    tracker, since crawlers of a worker share its proxies, owner profiles
+    and the redirect map, which is saved when the worker is done. Requests
+    answered with block pages are rerouted within the worker's proxies, and
+    pages found by several queries are fetched once per worker.
+    """
+    logger = logger or logging.getLogger(__name__)
+    if eager_tasks and not enable_eager_tasks():
+        logger.warning("Eager task execution requires Python 3.12+, using regular tasks")
+    query_cache = QueryCache(**cache, logger=logger) if cache else None
+    seen_filter = SeenFilter(**seen, logger=logger) if seen else None
+    latency = LatencyTracker() if ADAPTIVE_TIMEOUTS else None
+    owners = OwnerProfiles(**owner_profiles, logger=logger) if owner_profiles else None
+    redirects = RedirectMap(redirect_map, logger=logger) if redirect_map else None
+    pool = ProxyPool.from_proxies(proxies)
+    extra_cache: dict[str, dict] = {}
+    limit = asyncio.Semaphore(MAX_CONCURRENT_QUERIES)
+
+    async def crawl_one(index: int, keywords: list[str]) -> None:
+        report = None
+        async with limit:
+            try:
+                crawler = Crawler(
+                    keywords=keywords,
+                    proxy=random.choice(proxies),
+                    logger=logger,
+                    aggregator=LanguageAggregator() if language_report else None,
+                    seen=seen_filter,
+                    latency=latency,
+                    owner_profiles=owners,
+                    redirects=redirects,
+                    proxy_pool=pool,
+                    extra_cache=extra_cache,
+                    **options,
+                )
+                if query_cache:
+                    results = await query_cache.run_cached(crawler)
+                else:
+                    results = await crawler.run()
+                if language_report and results is not None:
+                    crawler.aggregator.add_results(results)
+                    report = crawler.aggregator.report()
+            except Exception as e:
+                logger.error(f"Query {keywords} failed: {type(e).__name__}: {e}")
+                results = None
+        emit(index, results, report)
+
+    try:
+        await asyncio.gather(*(crawl_one(i, k) for i, k in jobs))
+        if query_cache:
+            await query_cache.drain()
+    finally:
+        if seen_filter:
+            seen_filter.close()
+        if owners:
+            await owners.cancel()
+        if redirects:
+            redirects.save()
+        await pool.aclose()
+
+
+def worker_process(
+    worker_id: int,
+    jobs: list[tuple[int, list[str]]],
+    proxies: list[str],
+    options: dict,
+    cache: dict | None,
+    loop_backend: str,
+    results_queue: multiprocessing.Queue,
+    language_report: bool = False,
+    seen: dict | None = None,
+    owner_profiles: dict | None = None,
+    redirect_map: str | None = None,
+    eager_tasks: bool = False,
+) -> None:
+    """Entry point of a worker process: its own event loop and crawlers"""
+    setup_logging()
+    logger = logging.getLogger(f"{__name__}.{worker_id}")
+    try:
+        run_with_loop(
+            crawl_queries(
+                jobs,
+                proxies,
+                options,
+                lambda index, results, report: results_queue.put(
+                    ("result", index, (results, report))
+                ),
+                cache,
+                logger,
+                language_report,
+                seen,
+                owner_profiles,
+                redirect_map,
+                eager_tasks,
+            ),
+            loop_backend,
+        )
+    finally:
+        results_queue.put(("done", worker_id, None))
+
+
+def collect_results(
+    results_queue: multiprocessing.Queue,
+    processes: list,
+) -> dict[int, tuple[list[dict] | None, dict | None]]:
+    """
+    Blocking: gather streamed results until every worker is done or has died
+    """
+    collected = {}
+    running = len(processes)
+    while running:
+        try:
+            kind, key, payload = results_queue.get(timeout=POLL_INTERVAL)
+        except queue_module.Empty:
+            if not any(p.is_alive() for p in processes):
+                break
+            continue
+        if kind == "done":
+            running -= 1
+        else:
+            collected[key] = payload
+    return collected
+
+
+def merge_batch(
+    queries: list[list[str]],
+    collected: dict[int, tuple[list[dict] | None, dict | None]],
+    logger: logging.Logger,
+) -> tuple[list[dict], dict[str, dict]]:
+    """
+    Merge per-query results in query order, tagging each record with its query
+
+    Returns:
+        Tuple of (merged results, language reports by query)
+    """
+    merged = []
+    reports = {}
+    for index, keywords in enumerate(queries):
+        query = " ".join(keywords)
+        results, report = collected.get(index, (None, None))
+        if results is None:
+            logger.error(f"No results for query '{query}'")
+            continue
+        merged.extend({**record, "query": query} for record in results)
+        if report is not None:
+            reports[query] = report
+    return merged, reports
+
+
+async def run_batch(
+    queries: list[list[str]],
+    proxies: list[str],
+    options: dict,
+    workers: int = 1,
+    cache: dict | None = None,
+    loop_backend: str = "asyncio",
+    logger: logging.Logger | None = None,
+    language_report: bool = False,
+    seen: dict | None = None,
+    owner_profiles: dict | None = None,
+    redirect_map: str | None = None,
+    eager_tasks: bool = False,
+) -> tuple[list[dict], dict[str, dict]]:
+    """
+    Crawl a batch of queries, split across worker processes that each run their
+    own event loop and crawlers on their share of the proxies.
+
+    Args:
+        queries: Keywords of each query
+        proxies: Normalized proxies
+        options: Crawler options shared by all queries
+        workers: Number of processes; 1 crawls in this process
+        cache: Optional QueryCache arguments
+        loop_backend: Event loop backend of the worker processes
+        logger: Optional logger instance, creates default if None
+        language_report: Compute a language report per query
+        seen: Optional SeenFilter arguments; the filter file is shared by all workers
+        owner_profiles: Optional OwnerProfiles arguments to add owner profiles
+        redirect_map: Optional path of the redirect map shared by all workers
+        eager_tasks: Run tasks eagerly in every worker (Python 3.12+)
+
+    Returns:
+        Tuple of (results of all queries in query order, each tagged with a
+        "query" key; language reports by query)
+    """
+    logger = logger or logging.getLogger(__name__)
+    workers = max(1, min(workers, len(queries)))
+    jobs = list(enumerate(queries))
+
+    if workers == 1:
+        collected = {}
+
+        def emit(index: int, results: list[dict] | None, report: dict | None) -> None:
+            collected[index] = (results, report)
+
+        await crawl_queries(
+            jobs,
+            proxies,
+            options,
+            emit,
+            cache,
+            logger,
+            language_report,
+            seen,
+            owner_profiles,
+            redirect_map,
+            eager_tasks,
+        )
+        return merge_batch(queries, collected, logger)
+
+    # spawn: forking a process with a running event loop is unsafe
+    ctx = multiprocessing.get_context("spawn")
+    results_queue = ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=worker_process,
+            args=(
+                i,
+                jobs[i::workers],
+                share,
+                options,
+                cache,
+                loop_backend,
+                results_queue,
+                language_report,
+                seen,
+                owner_profiles,
+                redirect_map,
+                eager_tasks,
+            ),
+            daemon=True,
+        )
+        for i, share in enumerate(split_proxies(proxies, workers))
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"Crawling {len(queries)} queries with {workers} worker processes")
+
+    try:
+        collected = await asyncio.to_thread(collect_results, results_queue, processes)
+    finally:
+        for process in processes:
+            process.join(timeout=POLL_INTERVAL)
+            if process.is_alive():
+                process.terminate()
+
+    return merge_batch(queries, collected, logger)
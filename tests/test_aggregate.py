@@ -0,0 +1,54 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from github_crawler.aggregate import LanguageAggregator
+
+
+def test_report_shares_counts_and_cooccurrence():
+    agg = LanguageAggregator()
+    agg.add("https://github.com/a/1", {"Python": 80.0, "Shell": 20.0}, weight=3)
+    agg.add("https://github.com/a/2", {"Python": 40.0, "C": 60.0}, weight=1)
+    agg.add("https://github.com/a/3", {"C": 100.0}, weight=0)
+
+    report = agg.report(top_n=2)
+
+    assert report["repos"] == 3
+    assert report["languages"] == 3
+    assert report["top"] == ["C", "Python"]
+    assert report["shares"] == {"C": 53.33, "Python": 40.0}
+    assert report["weighted_shares"] == {"C": 15.0, "Python": 70.0}
+    assert report["repo_counts"] == {"C": 2, "Python": 2}
+    assert report["cooccurrence"]["Python"] == {"Python": 2, "C": 1}
+    assert report["percentiles"]["Python"]["p50"] == 60.0
+
+
+def test_add_ignores_duplicates_and_grows():
+    agg = LanguageAggregator(capacity=1)
+    for i in range(20):
+        agg.add(f"https://github.com/a/{i}", {f"Lang{i}": 100.0})
+    agg.add("https://github.com/a/0", {"Other": 100.0})
+
+    report = agg.report(top_n=50)
+    assert len(agg) == 20
+    assert report["languages"] == 20
+    assert all(count == 1 for count in report["repo_counts"].values())
+
+
+def test_add_results_weights_by_stars_and_skips_missing_stats():
+    agg = LanguageAggregator()
+    agg.add_results(
+        [
+            {"url": "u1", "extra": {"language_stats": {"Go": 100.0}, "stars": 0}},
+            {"url": "u2", "extra": {"language_stats": {"Rust": 100.0}, "stars": 10}},
+            {"url": "u3", "extra": {"owner": "o"}},
+            {"url": "u4"},
+        ]
+    )
+    report = agg.report()
+    assert report["repos"] == 2
+    assert report["weighted_shares"] == {"Rust": 100.0, "Go": 0.0}
+
+
+def test_empty_report():
+    assert LanguageAggregator().report() == {"repos": 0, "languages": 0}
@@ -0,0 +1,131 @@
+import httpx
+import pytest
+
+from github_crawler.archive import WarcWriter, read_warc
+from github_crawler.reparse import owner_page_login, page_search_type, reparse_archive
+
+SEARCH_URL = "https://github.com/search?q=python&type=Repositories"
+
+
+def make_response(url: str, text: str, **kwargs) -> httpx.Response:
+    return httpx.Response(200, text=text, request=httpx.Request("GET", url), **kwargs)
+
+
+@pytest.fixture
+def crawl_archive(tmp_path, load_fixture):
+    path = str(tmp_path / "crawl.warc.gz")
+    with WarcWriter(path) as archive:
+        archive.write_response(
+            make_response(SEARCH_URL, load_fixture("search_repos_page.html"))
+        )
+        archive.write_response(
+            make_response(
+                "https://github.com/atuldjadhav/DropBox-Cloud-Storage",
+                load_fixture("repo_with_langs.html"),
+            )
+        )
+    return path
+
+
+def test_archive_roundtrip(tmp_path):
+    path = str(tmp_path / "a.warc.gz")
+    with WarcWriter(path) as archive:
+        archive.write_response(
+            make_response(
+                "https://github.com/a/b",
+                "Привіт",
+                headers={"content-type": "text/html; charset=utf-8"},
+            )
+        )
+    with WarcWriter(path) as archive:
+        archive.write_response(make_response("https://github.com/c/d", "second"))
+
+    records = list(read_warc(path))
+    assert [r.url for r in records] == ["https://github.com/a/b", "https://github.com/c/d"]
+    assert records[0].status_code == 200
+    assert records[0].text == "Привіт"
+    assert records[1].text == "second"
+
+
+def test_archive_records_requested_url_of_redirect(tmp_path):
+    old = httpx.Response(301, request=httpx.Request("GET", "https://github.com/old/repo"))
+    final = make_response("https://github.com/new/repo", "moved", history=[old])
+    path = str(tmp_path / "a.warc.gz")
+    with WarcWriter(path) as archive:
+        archive.write_response(final)
+
+    (record,) = read_warc(path)
+    assert record.url == "https://github.com/new/repo"
+    assert record.requested_url == "https://github.com/old/repo"
+
+
+def test_archive_without_gz_extension_roundtrip(tmp_path):
+    path = str(tmp_path / "crawl.warc")
+    with WarcWriter(path) as archive:
+        archive.write_response(make_response("https://github.com/a/b", "body"))
+
+    assert [r.text for r in read_warc(path)] == ["body"]
+
+
+def test_read_warc_rejects_garbage(tmp_path):
+    path = tmp_path / "bad.warc"
+    path.write_bytes(b"not a warc\r\n")
+    with pytest.raises(ValueError):
+        list(read_warc(str(path)))
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("https://github.com/o/r", "Repositories"),
+        ("https://github.com/o/r/issues/3", "Issues"),
+        ("https://github.com/o/r/wiki/Home", "Wikis"),
+    ],
+)
+def test_page_search_type(url, expected):
+    assert page_search_type(url) == expected
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_reparse_archive_joins_extra(crawl_archive, workers):
+    results = reparse_archive(crawl_archive, workers=workers)
+
+    assert [r["url"] for r in results] == [
+        "https://github.com/atuldjadhav/DropBox-Cloud-Storage",
+        "https://github.com/michealbalogun/Horizon-dashboard",
+    ]
+    assert results[0]["extra"]["language_stats"]["Python"] == pytest.approx(99.0)
+    assert "extra" not in results[1]
+
+
+def test_reparse_archive_filters_search_type(crawl_archive):
+    assert reparse_archive(crawl_archive, workers=1, search_type="Issues") == []
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("https://github.com/octocat", "octocat"),
+        ("https://github.com/octocat/", "octocat"),
+        ("https://github.com/o/r", None),
+        ("https://github.com/search?q=x", None),
+    ],
+)
+def test_owner_page_login(url, expected):
+    assert owner_page_login(url) == expected
+
+
+def test_reparse_archive_attaches_owner_profiles(crawl_archive, load_fixture):
+    with WarcWriter(crawl_archive) as archive:
+        archive.write_response(
+            make_response("https://github.com/AtulDJadhav", load_fixture("owner_user.html"))
+        )
+
+    results = reparse_archive(crawl_archive, workers=1)
+
+    assert [r["url"] for r in results] == [
+        "https://github.com/atuldjadhav/DropBox-Cloud-Storage",
+        "https://github.com/michealbalogun/Horizon-dashboard",
+    ]
+    assert results[0]["extra"]["owner_profile"]["type"] == "user"
+    assert results[0]["extra"]["owner_profile"]["followers"] == 18100
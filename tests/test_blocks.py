@@ -0,0 +1,39 @@
+import httpx
+
+from github_crawler.blocks import classify_block
+
+
+def make_response(text: str = "", url: str = "https://github.com/a/b", **kwargs) -> httpx.Response:
+    return httpx.Response(200, text=text, request=httpx.Request("GET", url), **kwargs)
+
+
+def test_rate_limit_title():
+    resp = make_response("<html><head><title>Rate limit &middot; GitHub</title></head></html>")
+    assert classify_block(resp) == "rate_limit"
+
+
+def test_challenge_title():
+    resp = make_response("<html><head><title>Just a moment...</title></head></html>")
+    assert classify_block(resp) == "challenge"
+
+
+def test_retry_after_header():
+    resp = make_response("ok", headers={"Retry-After": "60"})
+    assert classify_block(resp) == "rate_limit"
+
+
+def test_login_redirect():
+    resp = make_response("<title>GitHub</title>", url="https://github.com/login?return_to=%2Fa%2Fb")
+    assert classify_block(resp) == "login"
+
+
+def test_repository_page_is_not_blocked(load_fixture):
+    assert classify_block(make_response(load_fixture("repo_with_langs.html"))) is None
+
+
+def test_description_mentioning_rate_limit_is_not_blocked():
+    resp = make_response(
+        "<html><head><title>GitHub - a/b: Rate limit middleware</title>"
+        '<meta name="description" content="Too many requests? Whoa there."></head></html>'
+    )
+    assert classify_block(resp) is None
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from github_crawler.cache import (
+    FRESH,
+    MISS,
+    STALE,
+    QueryCache,
+    canonical_query,
+    query_key,
+)
+from github_crawler.crawler import Crawler
+
+
+def test_keyword_order_and_case_share_key():
+    a = query_key(keywords=["nova", "OpenStack"], search_type="Repositories")
+    b = query_key(keywords=["openstack nova"], search_type="Repositories")
+    c = query_key(keywords=["openstack", "nova", "nova"], search_type="Repositories")
+    assert a == b == c
+
+
+@pytest.mark.parametrize(
+    "a,b",
+    [
+        (["nova", "NOT", "openstack"], ["openstack", "NOT", "nova"]),
+        (["nova OR openstack", "css"], ["css", "nova OR openstack"]),
+        (['"Open Stack"', "nova"], ['"open stack"', "nova"]),
+        (['"open stack" nova'], ['nova "open stack"']),
+    ],
+)
+def test_operators_and_phrases_keep_order_and_case(a, b):
+    assert query_key(keywords=a, search_type="Repositories") != query_key(
+        keywords=b, search_type="Repositories"
+    )
+
+
+def test_key_differs_by_type_extra_and_pages():
+    base = {"keywords": ["nova"], "search_type": "Repositories"}
+    keys = {
+        query_key(**base),
+        query_key(**{**base, "search_type": "Issues"}),
+        query_key(**{**base, "with_extra": True}),
+        query_key(**{**base, "pages": 3}),
+        query_key(**{**base, "owner_profiles": True}),
+        query_key(**{**base, "max_results": 5}),
+    }
+    assert len(keys) == 6
+
+
+def test_canonical_query_resolves_default_pages():
+    assert canonical_query(["x"], "Wikis")["pages"] == 1
+    assert canonical_query(["x"], "Wikis", pages=1) == canonical_query(["x"], "Wikis")
+
+
+def test_lookup_states(tmp_path):
+    cache = QueryCache(str(tmp_path), ttl=10, stale_ttl=10)
+    assert cache.lookup("k") == (None, MISS)
+
+    cache.store("k", [{"url": "u"}])
+    assert cache.lookup("k") == ([{"url": "u"}], FRESH)
+
+    path = cache.path("k")
+    entry = json.loads(open(path).read())
+    entry["stored_at"] = time.time() - 15
+    open(path, "w").write(json.dumps(entry))
+    assert cache.lookup("k") == ([{"url": "u"}], STALE)
+
+    entry["stored_at"] = time.time() - 25
+    open(path, "w").write(json.dumps(entry))
+    assert cache.lookup("k") == (None, MISS)
+
+
+def test_store_leaves_no_temp_files(tmp_path):
+    cache = QueryCache(str(tmp_path))
+    cache.store("k", [])
+    assert os.listdir(tmp_path) == ["k.json"]
+
+
+def _crawler(keywords):
+    return Crawler(keywords=keywords, search_type="Repositories", proxy="http://p:1")
+
+
+@pytest.mark.asyncio
+async def test_run_cached_miss_then_fresh_hit(tmp_path, monkeypatch):
+    runs = {"n": 0}
+
+    async def fake_run(self):
+        runs["n"] += 1
+        return [{"url": "https://github.com/a/b"}]
+
+    monkeypatch.setattr(Crawler, "run", fake_run)
+    cache = QueryCache(str(tmp_path))
+
+    first = await cache.run_cached(_crawler(["nova", "openstack"]))
+    crawler = _crawler(["OpenStack", "Nova"])
+    second = await cache.run_cached(crawler)
+
+    assert first == second
+    assert runs["n"] == 1
+    assert crawler.client.closed is True
+
+
+@pytest.mark.asyncio
+async def test_run_cached_stale_returns_immediately_and_refreshes(tmp_path, monkeypatch):
+    refreshed = asyncio.Event()
+
+    async def fake_run(self):
+        await asyncio.sleep(0.01)
+        refreshed.set()
+        return [{"url": "https://github.com/new/result"}]
+
+    monkeypatch.setattr(Crawler, "run", fake_run)
+    cache = QueryCache(str(tmp_path), ttl=0, stale_ttl=60)
+    crawler = _crawler(["nova"])
+    key = cache.key_for(crawler)
+    cache.store(key, [{"url": "https://github.com/old/result"}])
+
+    results = await cache.run_cached(crawler)
+    assert results == [{"url": "https://github.com/old/result"}]
+    assert not refreshed.is_set()
+
+    await cache.drain()
+    assert refreshed.is_set()
+    assert cache.lookup(key)[0] == [{"url": "https://github.com/new/result"}]
+
+
+@pytest.mark.asyncio
+async def test_partial_results_are_not_cached(tmp_path, monkeypatch):
+    async def fake_run(self):
+        return [{"url": "https://github.com/a/b", "partial": True}]
+
+    monkeypatch.setattr(Crawler, "run", fake_run)
+    cache = QueryCache(str(tmp_path))
+    crawler = _crawler(["nova"])
+    await cache.run_cached(crawler)
+    assert cache.lookup(cache.key_for(crawler)) == (None, MISS)
+
+
+@pytest.mark.asyncio
+async def test_results_skipped_by_seen_filter_are_not_cached(tmp_path, monkeypatch):
+    async def fake_run(self):
+        return [{"url": "https://github.com/a/b", "seen": True}]
+
+    monkeypatch.setattr(Crawler, "run", fake_run)
+    cache = QueryCache(str(tmp_path))
+    crawler = _crawler(["nova"])
+    await cache.run_cached(crawler)
+    assert cache.lookup(cache.key_for(crawler)) == (None, MISS)
+
+
+@pytest.mark.asyncio
+async def test_store_failure_still_returns_results(tmp_path, monkeypatch, caplog):
+    async def fake_run(self):
+        return [{"url": "https://github.com/a/b"}]
+
+    def failing_store(self, key, results):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(Crawler, "run", fake_run)
+    monkeypatch.setattr(QueryCache, "store", failing_store)
+    cache = QueryCache(str(tmp_path))
+
+    assert await cache.run_cached(_crawler(["nova"])) == [{"url": "https://github.com/a/b"}]
+    assert "Could not cache results" in caplog.text
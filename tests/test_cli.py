@@ -28,8 +28,8 @@ def test_proxy_validation_error_exits_2(capsys):
     assert "Invalid proxy format" in err
 
 
-def test_with_extra_error_for_non_repos(capsys):
-    """Test that --with-extra with non-repository search types exits with error"""
+def test_with_extra_allowed_for_issues():
+    """Test that --with-extra is accepted for non-repository search types"""
     argv = [
         "--type",
         "Issues",
@@ -38,12 +38,31 @@ def test_with_extra_error_for_non_repos(capsys):
         "--keywords",
         "python",
         "--with-extra",
+        "--fields",
+        "state",
+    ]
+    cfg, _ = parse_and_normalize_args(argv)
+    assert cfg["with_extra"] is True
+    assert cfg["fields"] == ["state"]
+
+
+def test_unknown_field_for_type_exits_2(capsys):
+    """Test that a field not registered for the search type exits with error"""
+    argv = [
+        "--type",
+        "Wikis",
+        "--proxies",
+        "host:8080",
+        "--keywords",
+        "python",
+        "--with-extra",
+        "--fields",
+        "language_stats",
     ]
     with pytest.raises(SystemExit) as e:
         parse_and_normalize_args(argv)
     assert e.value.code == 2
-    err = capsys.readouterr().err
-    assert "--with-extra can only be used with Repositories type" in err
+    assert "Unknown fields for Wikis: language_stats" in capsys.readouterr().err
 
 
 def test_output_dir_nonexistent_exits_2(tmp_path, capsys):
@@ -145,3 +164,291 @@ async def test_main_logs_error_when_results_none(caplog, monkeypatch):
     await main(argv)
 
     assert assert_log_contains(caplog.records, "Crawler returned no results")
+
+
+@pytest.mark.asyncio
+async def test_main_preflight_without_working_proxies(caplog, monkeypatch):
+    """Test that the crawl is not started when every proxy fails preflight"""
+    from github_crawler.proxies import ProxyPool
+
+    async def fake_preflight(proxies, health_url, logger=None):
+        return ProxyPool([])
+
+    async def fake_run(self):
+        raise AssertionError("crawler must not run")
+
+    monkeypatch.setattr("github_crawler.__main__.preflight_proxies", fake_preflight)
+    monkeypatch.setattr(crawler_mod.Crawler, "run", fake_run)
+
+    caplog.set_level(logging.ERROR, logger="github_crawler.__main__")
+
+    argv = [
+        "--type",
+        "Repositories",
+        "--proxies",
+        "host:8080",
+        "--keywords",
+        "py",
+        "--preflight",
+    ]
+
+    await main(argv)
+
+    assert assert_log_contains(caplog.records, "No working proxies after preflight")
+
+
+@pytest.mark.asyncio
+async def test_main_reparse_writes_results(tmp_path, capsys, load_fixture):
+    """Test that the reparse command outputs results from an archive"""
+    import httpx
+
+    from github_crawler.archive import WarcWriter
+
+    archive_path = str(tmp_path / "crawl.warc.gz")
+    url = "https://github.com/search?q=python&type=Repositories"
+    with WarcWriter(archive_path) as archive:
+        archive.write_response(
+            httpx.Response(
+                200,
+                text=load_fixture("search_repos_page.html"),
+                request=httpx.Request("GET", url),
+            )
+        )
+
+    outfile = tmp_path / "out.json"
+    await main(["reparse", archive_path, "--workers", "1", "--output", str(outfile)])
+
+    data = json.loads(capsys.readouterr().out)
+    assert len(data) == 2
+    assert json.loads(outfile.read_text(encoding="utf-8")) == data
+
+
+def test_reparse_missing_archive_exits_2(tmp_path, capsys):
+    """Test that reparse of a non-existent archive exits with code 2"""
+    from github_crawler.__main__ import parse_reparse_args
+
+    with pytest.raises(SystemExit) as e:
+        parse_reparse_args([str(tmp_path / "missing.warc.gz")])
+    assert e.value.code == 2
+    assert "Archive does not exist" in capsys.readouterr().err
+
+
+@pytest.mark.asyncio
+async def test_main_profile_writes_report(tmp_path, capsys, monkeypatch):
+    """Test that --profile prints a summary and writes the JSON report"""
+
+    def fake_init(self, **kwargs):
+        assert kwargs["profiler"] is not None
+
+    async def fake_run(self):
+        return [{"url": "https://github.com/name/repo"}]
+
+    monkeypatch.setattr(crawler_mod.Crawler, "__init__", fake_init)
+    monkeypatch.setattr(crawler_mod.Crawler, "run", fake_run)
+
+    report = tmp_path / "profile.json"
+    argv = [
+        "--type",
+        "Repositories",
+        "--proxies",
+        "host:8080",
+        "--keywords",
+        "python",
+        "--profile",
+        "--profile-report",
+        str(report),
+    ]
+
+    await main(argv)
+
+    assert "Profile:" in capsys.readouterr().err
+    data = json.loads(report.read_text(encoding="utf-8"))
+    assert data["stages"]["serialize"]["calls"] == 1
+
+
+def test_cprofile_without_profile_exits_2(capsys):
+    """Test that --cprofile requires --profile"""
+    argv = ["--type", "Repositories", "--proxies", "h:1", "--keywords", "k", "--cprofile"]
+    with pytest.raises(SystemExit) as e:
+        parse_and_normalize_args(argv)
+    assert e.value.code == 2
+    assert "can only be used with --profile" in capsys.readouterr().err
+
+
+def test_run_reports_missing_uvloop(monkeypatch, capsys):
+    """Test that selecting an unavailable uvloop backend exits with code 2"""
+    import sys
+
+    from github_crawler.__main__ import run
+
+    monkeypatch.setitem(sys.modules, "uvloop", None)
+    argv = ["--type", "Repositories", "--proxies", "h:1", "--keywords", "k", "--loop", "uvloop"]
+    with pytest.raises(SystemExit) as e:
+        run(argv)
+    assert e.value.code == 2
+    assert "pip install uvloop" in capsys.readouterr().err
+
+
+@pytest.mark.asyncio
+async def test_main_fresh_cache_hit_skips_crawl(tmp_path, capsys, monkeypatch):
+    """Test that a fresh cached query is served without running the crawler"""
+    runs = {"n": 0}
+
+    def fake_init(self, **kwargs):
+        self.keywords = kwargs["keywords"]
+        self.search_type = kwargs["search_type"]
+        self.with_extra = kwargs["with_extra"]
+        self.pages = kwargs["pages"]
+        self.fields = kwargs["fields"]
+        self.shard_by = kwargs["shard_by"]
+        self.max_results = kwargs["max_results"]
+        self.owner_profiles = kwargs.get("owner_profiles")
+
+    async def fake_run(self):
+        runs["n"] += 1
+        return [{"url": "https://github.com/name/repo"}]
+
+    monkeypatch.setattr(crawler_mod.Crawler, "__init__", fake_init)
+    monkeypatch.setattr(crawler_mod.Crawler, "run", fake_run)
+
+    base = ["--type", "Repositories", "--proxies", "host:8080", "--cache-dir", str(tmp_path)]
+    await main([*base, "--keywords", "nova", "openstack"])
+    first = json.loads(capsys.readouterr().out)
+    await main([*base, "--keywords", "OpenStack", "Nova"])
+    second = json.loads(capsys.readouterr().out)
+
+    assert first == second
+    assert runs["n"] == 1
+
+
+def test_queries_file_parsed(tmp_path):
+    """Test that a queries file becomes a list of keyword lists"""
+    queries = tmp_path / "queries.txt"
+    queries.write_text("nova openstack\n\ncss\n", encoding="utf-8")
+    argv = ["--type", "Issues", "--proxies", "h:1", "--queries", str(queries), "--workers", "2"]
+    cfg, _ = parse_and_normalize_args(argv)
+    assert cfg["queries"] == [["nova", "openstack"], ["css"]]
+    assert cfg["workers"] == 2
+
+
+def test_workers_without_queries_exits_2(capsys):
+    """Test that --workers requires a batch of queries"""
+    argv = ["--type", "Issues", "--proxies", "h:1", "--keywords", "k", "--workers", "2"]
+    with pytest.raises(SystemExit) as e:
+        parse_and_normalize_args(argv)
+    assert e.value.code == 2
+    assert "--workers can only be used with --queries" in capsys.readouterr().err
+
+
+@pytest.mark.asyncio
+async def test_main_batch_writes_merged_results(tmp_path, capsys, monkeypatch):
+    """Test that a batch of queries produces one merged output"""
+
+    def fake_init(self, **kwargs):
+        self.keywords = kwargs["keywords"]
+
+    async def fake_run(self):
+        return [{"url": f"https://github.com/{self.keywords[0]}/repo"}]
+
+    monkeypatch.setattr(crawler_mod.Crawler, "__init__", fake_init)
+    monkeypatch.setattr(crawler_mod.Crawler, "run", fake_run)
+
+    queries = tmp_path / "queries.txt"
+    queries.write_text("nova\ncss\n", encoding="utf-8")
+    await main(["--type", "Repositories", "--proxies", "h:1", "--queries", str(queries)])
+
+    data = json.loads(capsys.readouterr().out)
+    assert [r["query"] for r in data] == ["nova", "css"]
+
+
+def test_language_report_requires_with_extra(capsys):
+    with pytest.raises(SystemExit) as e:
+        parse_and_normalize_args(
+            ["--type", "Repositories", "--proxies", "h:1", "--keywords", "x", "--language-report"]
+        )
+    assert e.value.code == 2
+    assert "--language-report requires --with-extra" in capsys.readouterr().err
+
+
+@pytest.mark.asyncio
+async def test_main_language_report_output(capsys, monkeypatch):
+    pytest.importorskip("numpy")
+
+    def fake_init(self, **kwargs):
+        self.aggregator = kwargs["aggregator"]
+
+    async def fake_run(self):
+        extra = {"language_stats": {"Python": 100.0}, "stars": 5}
+        self.aggregator.add_extra("https://github.com/a/b", extra)
+        return [{"url": "https://github.com/a/b", "extra": extra}]
+
+    monkeypatch.setattr(crawler_mod.Crawler, "__init__", fake_init)
+    monkeypatch.setattr(crawler_mod.Crawler, "run", fake_run)
+    await main(
+        [
+            "--type",
+            "Repositories",
+            "--proxies",
+            "h:1",
+            "--keywords",
+            "x",
+            "--with-extra",
+            "--language-report",
+        ]
+    )
+
+    data = json.loads(capsys.readouterr().out)
+    assert data["results"][0]["url"] == "https://github.com/a/b"
+    assert data["language_report"]["repos"] == 1
+    assert data["language_report"]["top"] == ["Python"]
+
+
+def test_seen_file_requires_with_extra(tmp_path, capsys):
+    with pytest.raises(SystemExit) as e:
+        parse_and_normalize_args(
+            [
+                "--type",
+                "Repositories",
+                "--proxies",
+                "h:1",
+                "--keywords",
+                "x",
+                "--seen-file",
+                str(tmp_path / "seen"),
+            ]
+        )
+    assert e.value.code == 2
+    assert "--seen-file can only be used with --with-extra" in capsys.readouterr().err
+
+
+def test_seen_file_parsed(tmp_path):
+    cfg, _ = parse_and_normalize_args(
+        [
+            "--type",
+            "Repositories",
+            "--proxies",
+            "h:1",
+            "--keywords",
+            "x",
+            "--with-extra",
+            "--seen-file",
+            str(tmp_path / "seen"),
+            "--seen-fp-rate",
+            "0.01",
+        ]
+    )
+    assert cfg["seen"]["path"] == str(tmp_path / "seen")
+    assert cfg["seen"]["fp_rate"] == 0.01
+
+
+def test_owner_profiles_parsed_and_validated(tmp_path, capsys):
+    base = ["--type", "Repositories", "--proxies", "h:1", "--keywords", "x"]
+    cfg, _ = parse_and_normalize_args(
+        [*base, "--with-extra", "--owner-profiles", "--owner-cache-dir", str(tmp_path)]
+    )
+    assert cfg["owner_profiles"]["directory"] == str(tmp_path)
+
+    with pytest.raises(SystemExit) as e:
+        parse_and_normalize_args([*base, "--owner-profiles"])
+    assert e.value.code == 2
+    assert "--owner-profiles can only be used with --with-extra" in capsys.readouterr().err
@@ -1,7 +1,11 @@
+import asyncio
 import logging
 import pytest
 
+from github_crawler.blocks import BlockedPageError
 from github_crawler.crawler import Crawler
+from github_crawler.proxies import ProxyPool
+from github_crawler.settings import MAX_CONCURRENT_REQUESTS
 from tests.conftest import assert_log_contains
 
 
@@ -39,7 +43,7 @@ def test_owner_from_url_fail_logs_error(caplog):
 
 
 @pytest.mark.asyncio
-async def test_fetch_and_parse_repo(monkeypatch, load_fixture, fake_resp):
+async def test_fetch_and_parse_page(monkeypatch, load_fixture, fake_resp):
     async def mock_fetch(self, url):
         return fake_resp(text=load_fixture("repo_with_langs.html"))
 
@@ -48,24 +52,78 @@ async def test_fetch_and_parse_repo(monkeypatch, load_fixture, fake_resp):
         keywords=["x"], search_type="Repositories", proxy="http://p:1", with_extra=True
     )
     repo = {"url": "https://github.com/seleniumbase/repo"}
-    await c.fetch_and_parse_repo(repo)
+    await c.fetch_and_parse_page(repo)
     assert repo["extra"]["owner"] == "seleniumbase"
     assert repo["extra"]["language_stats"]["Python"] == pytest.approx(99.0)
+    assert repo["extra"]["stars"] == 11700
+    assert repo["extra"]["license"] == "MIT license"
+    assert "selenium" in repo["extra"]["topics"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_repo_alias(monkeypatch, load_fixture, fake_resp):
+    async def mock_fetch(self, url):
+        return fake_resp(text=load_fixture("repo_with_langs.html"))
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+    c = Crawler(
+        keywords=["x"], search_type="Repositories", proxy="http://p:1", with_extra=True
+    )
+    repo = {"url": "https://github.com/seleniumbase/repo"}
+    await c.fetch_and_parse_repo(repo)
+    assert repo["extra"]["language_stats"]["Python"] == pytest.approx(99.0)
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_page_selected_fields(monkeypatch, load_fixture, fake_resp):
+    async def mock_fetch(self, url):
+        return fake_resp(text=load_fixture("repo_with_langs.html"))
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+    c = Crawler(
+        keywords=["x"],
+        search_type="Repositories",
+        proxy="http://p:1",
+        with_extra=True,
+        fields=["stars"],
+    )
+    repo = {"url": "https://github.com/seleniumbase/repo"}
+    await c.fetch_and_parse_page(repo)
+    assert repo["extra"] == {"stars": 11700}
+
+
+@pytest.mark.asyncio
+async def test_run_with_extra_for_issues(monkeypatch, load_fixture, fake_resp):
+    issue_html = (
+        '<html><body><bdi class="js-issue-title">Crash on start</bdi>'
+        '<span class="State State--open">Open</span></body></html>'
+    )
+
+    async def mock_fetch(self, url, **kw):
+        if "search" in url:
+            return fake_resp(text=load_fixture("search_repos_page.html"))
+        return fake_resp(text=issue_html)
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+    c = Crawler(keywords=["x"], search_type="Issues", proxy="http://p:1", with_extra=True)
+    data = await c.run()
+    assert data[0]["extra"]["title"] == "Crash on start"
+    assert data[0]["extra"]["state"] == "open"
 
 
 @pytest.mark.asyncio
-async def test_fetch_and_parse_repo_missing_url_logs(caplog):
+async def test_fetch_and_parse_page_missing_url_logs(caplog):
     caplog.set_level(logging.ERROR, logger="github_crawler.crawler")
     c = Crawler(
         keywords=["x"], search_type="Repositories", proxy="http://p:1", with_extra=True
     )
     repo = {}
-    await c.fetch_and_parse_repo(repo)
+    await c.fetch_and_parse_page(repo)
     assert assert_log_contains(caplog.records, "missing 'url' key")
 
 
 @pytest.mark.asyncio
-async def test_fetch_and_parse_repo_empty_response_logs(monkeypatch, caplog, fake_resp):
+async def test_fetch_and_parse_page_empty_response_logs(monkeypatch, caplog, fake_resp):
     caplog.set_level(logging.ERROR, logger="github_crawler.crawler")
 
     async def mock_fetch(self, url, **kw):
@@ -76,12 +134,12 @@ async def test_fetch_and_parse_repo_empty_response_logs(monkeypatch, caplog, fak
         keywords=["x"], search_type="Repositories", proxy="http://p:1", with_extra=True
     )
     repo = {"url": "https://github.com/name/repo"}
-    await c.fetch_and_parse_repo(repo)
-    assert assert_log_contains(caplog.records, "Could not get details for repository")
+    await c.fetch_and_parse_page(repo)
+    assert assert_log_contains(caplog.records, "Could not get details for")
 
 
 @pytest.mark.asyncio
-async def test_fetch_and_parse_repo_exception_logs(monkeypatch, caplog):
+async def test_fetch_and_parse_page_exception_logs(monkeypatch, caplog):
     caplog.set_level(logging.ERROR, logger="github_crawler.crawler")
 
     async def mock_fetch(self, url, **kw):
@@ -92,8 +150,8 @@ async def test_fetch_and_parse_repo_exception_logs(monkeypatch, caplog):
         keywords=["x"], search_type="Repositories", proxy="http://p:1", with_extra=True
     )
     repo = {"url": "https://github.com/org/repo"}
-    await c.fetch_and_parse_repo(repo)
-    assert assert_log_contains(caplog.records, "Error parsing repo")
+    await c.fetch_and_parse_page(repo)
+    assert assert_log_contains(caplog.records, "Error parsing page")
 
 
 @pytest.mark.asyncio
@@ -108,7 +166,7 @@ async def test_get_extra_info_runs_tasks(monkeypatch):
         called["n"] += 1
         repo["extra"] = {"owner": "o", "language_stats": {}}
 
-    monkeypatch.setattr(Crawler, "fetch_and_parse_repo", mock_fetch_and_parse)
+    monkeypatch.setattr(Crawler, "fetch_and_parse_page", mock_fetch_and_parse)
 
     repos = [{"url": "https://github.com/a/b"}, {"url": "https://github.com/c/d"}]
     await c.get_extra_info(repos)
@@ -180,3 +238,416 @@ async def test_run_catches_exception_and_closes_client(monkeypatch, caplog):
     assert res is None
     assert c.client.closed is True
     assert assert_log_contains(caplog.records, "Crawler run failed")
+
+
+@pytest.mark.asyncio
+async def test_run_max_results_truncates_and_marks(monkeypatch, load_fixture, fake_resp):
+    search_html = load_fixture("search_repos_page.html")
+
+    async def mock_fetch(self, url, **kw):
+        return fake_resp(text=search_html)
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+
+    c = Crawler(
+        keywords=["python"], search_type="Repositories", proxy="http://p:1", max_results=1
+    )
+    data = await c.run()
+
+    assert data == [
+        {"url": "https://github.com/atuldjadhav/DropBox-Cloud-Storage", "partial": False}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_deadline_returns_partial_results(
+    monkeypatch, load_fixture, fake_resp, caplog
+):
+    caplog.set_level(logging.WARNING, logger="github_crawler.crawler")
+    search_html = load_fixture("search_repos_page.html")
+    repo_html = load_fixture("repo_with_langs.html")
+
+    async def mock_fetch(self, url, **kw):
+        if "search" in url:
+            return fake_resp(text=search_html)
+        if url.endswith("Horizon-dashboard"):
+            await asyncio.sleep(5)
+        return fake_resp(text=repo_html)
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+
+    c = Crawler(
+        keywords=["python"],
+        search_type="Repositories",
+        proxy="http://p:1",
+        with_extra=True,
+        deadline=0.2,
+    )
+    data = await c.run()
+
+    assert c.client.closed is True
+    assert [r["partial"] for r in data] == [False, True]
+    assert "extra" in data[0] and "extra" not in data[1]
+    assert assert_log_contains(caplog.records, "cancelling 1 outstanding")
+
+
+def test_get_search_params_with_page():
+    c = Crawler(keywords=["x"], search_type="Issues", proxy="http://p:1")
+    _, params = c.get_search_url_with_params("x stars:1..2", page=3)
+    assert params == {"q": "x stars:1..2", "type": "Issues", "p": 3}
+
+
+def _search_page(count: int, urls: list[str]) -> str:
+    links = "".join(f'<div class="search-title"><a href="{u}">r</a></div>' for u in urls)
+    return f'<html><body><script>{{"result_count": {count}}}</script>{links}</body></html>'
+
+
+@pytest.mark.asyncio
+async def test_run_sharded_splits_over_cap_and_merges(monkeypatch, fake_resp):
+    requested = []
+
+    async def mock_fetch(self, url, params=None, **kw):
+        requested.append((params["q"], params.get("p", 1)))
+        q = params["q"]
+        if q == "nova":
+            return fake_resp(text=_search_page(1500, ["/a/root"]))
+        if q == "nova stars:0..100000":
+            return fake_resp(text=_search_page(1200, ["/a/low"]))
+        if q.startswith("nova stars:0..50000"):
+            page = params.get("p", 1)
+            return fake_resp(text=_search_page(15, [f"/a/low{page}", "/a/dup"]))
+        return fake_resp(text=_search_page(5, ["/a/dup", "/a/high"]))
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+    c = Crawler(
+        keywords=["nova"], search_type="Repositories", proxy="http://p:1", shard_by=["stars"]
+    )
+    data = await c.run()
+
+    assert [r["url"] for r in data] == [
+        "https://github.com/a/low1",
+        "https://github.com/a/dup",
+        "https://github.com/a/low2",
+        "https://github.com/a/high",
+    ]
+    assert ("nova stars:0..50000", 2) in requested
+    assert ("nova stars:50001..100000", 2) not in requested
+    assert ("nova stars:>=100001", 1) in requested
+
+
+@pytest.mark.asyncio
+async def test_max_results_stops_fetching_search_pages(monkeypatch, fake_resp):
+    requested = []
+
+    async def mock_fetch(self, url, params=None, **kw):
+        page = params.get("p", 1)
+        requested.append(page)
+        return fake_resp(text=_search_page(900, [f"/a/r{page}", f"/b/r{page}"]))
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+    c = Crawler(
+        keywords=["nova"], search_type="Repositories", proxy="http://p:1", pages=90, max_results=5
+    )
+    data = await c.run()
+
+    assert len(data) == 5
+    # The first page and one batch of pages, not all 90
+    assert sorted(requested) == list(range(1, MAX_CONCURRENT_REQUESTS + 2))
+
+
+@pytest.mark.asyncio
+async def test_max_results_stops_crawling_shards(monkeypatch, fake_resp):
+    requested = []
+
+    async def mock_fetch(self, url, params=None, **kw):
+        q = params["q"]
+        requested.append(q)
+        if q == "nova":
+            return fake_resp(text=_search_page(1500, ["/a/root"]))
+        return fake_resp(text=_search_page(3, [f"/{i}/{len(requested)}" for i in range(3)]))
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+    c = Crawler(
+        keywords=["nova"],
+        search_type="Repositories",
+        proxy="http://p:1",
+        shard_by=["stars"],
+        max_results=3,
+    )
+    data = await c.run()
+
+    assert len(data) == 3
+    assert requested == ["nova", "nova stars:0..100000"]
+
+
+@pytest.mark.asyncio
+async def test_run_without_sharding_fetches_requested_pages(monkeypatch, fake_resp):
+    requested = []
+
+    async def mock_fetch(self, url, params=None, **kw):
+        requested.append(params.get("p", 1))
+        return fake_resp(text=_search_page(25, [f"/a/r{params.get('p', 1)}"]))
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+    c = Crawler(keywords=["nova"], search_type="Repositories", proxy="http://p:1", pages=10)
+    data = await c.run()
+
+    assert sorted(requested) == [1, 2, 3]
+    assert len(data) == 3
+
+
+@pytest.mark.asyncio
+async def test_run_marks_results_partial_when_search_pages_fail(monkeypatch, fake_resp):
+    async def mock_fetch(self, url, params=None, **kw):
+        if params.get("p") == 2:
+            return None
+        return fake_resp(text=_search_page(25, [f"/a/r{params.get('p', 1)}"]))
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+    c = Crawler(keywords=["nova"], search_type="Repositories", proxy="http://p:1", pages=10)
+    data = await c.run()
+
+    assert c.missing_pages == 1
+    assert len(data) == 2
+    assert all(record["partial"] for record in data)
+
+
+@pytest.mark.asyncio
+async def test_get_extra_info_cache_hits_and_duplicates(monkeypatch):
+    c = Crawler(
+        keywords=["x"], search_type="Repositories", proxy="http://p:1", with_extra=True
+    )
+    c.extra_cache["https://github.com/a/cached"] = {"owner": "a"}
+    fetched = []
+
+    async def mock_fetch_and_parse(self, record):
+        fetched.append(record["url"])
+        record["extra"] = {"owner": "c"}
+
+    monkeypatch.setattr(Crawler, "fetch_and_parse_page", mock_fetch_and_parse)
+
+    records = [
+        {"url": "https://github.com/a/cached"},
+        {"url": "https://github.com/c/d"},
+        {"url": "https://github.com/c/d"},
+    ]
+    await c.get_extra_info(records)
+
+    assert fetched == ["https://github.com/c/d"]
+    assert [r["extra"]["owner"] for r in records] == ["a", "c", "c"]
+    assert records[1]["extra"] is not records[2]["extra"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_page_fills_cache(monkeypatch, load_fixture, fake_resp):
+    async def mock_fetch(self, url):
+        return fake_resp(text=load_fixture("repo_no_langs.html"))
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+    c = Crawler(
+        keywords=["x"], search_type="Repositories", proxy="http://p:1", with_extra=True
+    )
+    await c.fetch_and_parse_page({"url": "https://github.com/a/b"})
+    assert c.extra_cache["https://github.com/a/b"]["owner"] == "a"
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_page_feeds_aggregator(monkeypatch, load_fixture, fake_resp):
+    pytest.importorskip("numpy")
+    from github_crawler.aggregate import LanguageAggregator
+
+    async def mock_fetch(self, url):
+        return fake_resp(text=load_fixture("repo_with_langs.html"))
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+    aggregator = LanguageAggregator()
+    c = Crawler(
+        keywords=["x"],
+        search_type="Repositories",
+        proxy="http://p:1",
+        with_extra=True,
+        aggregator=aggregator,
+    )
+    await c.get_extra_info([{"url": "https://github.com/a/b"}, {"url": "https://github.com/a/b"}])
+    report = aggregator.report()
+    assert report["repos"] == 1
+    assert report["shares"]["Python"] == pytest.approx(99.0, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_get_extra_info_skips_seen_urls(monkeypatch, tmp_path):
+    from github_crawler.seen import SeenFilter
+
+    fetched = []
+
+    async def mock_fetch_and_parse(self, record):
+        fetched.append(record["url"])
+        record["extra"] = {"owner": "c"}
+
+    monkeypatch.setattr(Crawler, "fetch_and_parse_page", mock_fetch_and_parse)
+    with SeenFilter(str(tmp_path / "seen"), capacity=100) as seen:
+        seen.add("https://github.com/a/b")
+        c = Crawler(
+            keywords=["x"],
+            search_type="Repositories",
+            proxy="http://p:1",
+            with_extra=True,
+            deadline=10,
+            seen=seen,
+        )
+        records = [{"url": "https://github.com/a/b"}, {"url": "https://github.com/c/d"}]
+        await c.get_extra_info(records)
+
+    assert fetched == ["https://github.com/c/d"]
+    assert records[0] == {"url": "https://github.com/a/b", "seen": True}
+    assert [r["partial"] for r in c.mark_completeness(records)] == [False, False]
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_page_adds_to_seen(monkeypatch, load_fixture, fake_resp, tmp_path):
+    from github_crawler.seen import SeenFilter
+
+    async def mock_fetch(self, url):
+        return fake_resp(text=load_fixture("repo_no_langs.html"))
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+    with SeenFilter(str(tmp_path / "seen"), capacity=100) as seen:
+        c = Crawler(
+            keywords=["x"],
+            search_type="Repositories",
+            proxy="http://p:1",
+            with_extra=True,
+            seen=seen,
+        )
+        await c.fetch_and_parse_page({"url": "https://github.com/a/b"})
+        assert "https://github.com/a/b" in seen
+
+
+@pytest.mark.asyncio
+async def test_get_extra_info_fetches_each_owner_once(monkeypatch, load_fixture, fake_resp):
+    from github_crawler.owners import OwnerProfiles
+
+    fetched = []
+
+    async def mock_fetch(self, url):
+        fetched.append(url)
+        if url == "https://github.com/octocat":
+            return fake_resp(text=load_fixture("owner_user.html"))
+        return fake_resp(text=load_fixture("repo_no_langs.html"))
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+    c = Crawler(
+        keywords=["x"],
+        search_type="Repositories",
+        proxy="http://p:1",
+        with_extra=True,
+        owner_profiles=OwnerProfiles(),
+    )
+    records = [{"url": f"https://github.com/octocat/repo{i}"} for i in range(3)]
+    await c.get_extra_info(records)
+
+    assert fetched.count("https://github.com/octocat") == 1
+    assert len(fetched) == 4
+    assert all(r["extra"]["owner_profile"]["followers"] == 18100 for r in records)
+
+
+@pytest.mark.asyncio
+async def test_fetch_and_parse_page_follows_moved_repository(monkeypatch, load_fixture):
+    class MovedResp:
+        text = load_fixture("repo_no_langs.html")
+        url = "https://github.com/new-owner/repo"
+
+        class Hop:
+            status_code = 301
+
+            class request:
+                url = "https://github.com/old-owner/repo"
+
+        history = [Hop]
+
+    async def mock_fetch(self, url):
+        return MovedResp()
+
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+    c = Crawler(
+        keywords=["x"], search_type="Repositories", proxy="http://p:1", with_extra=True
+    )
+    record = {"url": "https://github.com/old-owner/repo"}
+    await c.fetch_and_parse_page(record)
+
+    assert record["url"] == "https://github.com/new-owner/repo"
+    assert record["redirected_from"] == "https://github.com/old-owner/repo"
+    assert record["extra"]["owner"] == "new-owner"
+    assert c.redirects.resolve("https://github.com/old-owner/repo") == record["url"]
+
+
+@pytest.mark.asyncio
+async def test_run_rewrites_known_moved_urls(monkeypatch, fake_resp):
+    from github_crawler.redirects import RedirectMap
+
+    redirects = RedirectMap()
+    redirects.record("https://github.com/old/repo", "https://github.com/new/repo")
+    fetched = []
+
+    async def mock_crawl_shard(self, shard):
+        return [{"url": "https://github.com/old/repo"}, {"url": "https://github.com/new/repo"}]
+
+    async def mock_fetch(self, url):
+        fetched.append(url)
+        return fake_resp(text="<html></html>")
+
+    monkeypatch.setattr(Crawler, "crawl_shard", mock_crawl_shard)
+    monkeypatch.setattr(Crawler, "fetch_url", mock_fetch)
+    c = Crawler(
+        keywords=["x"],
+        search_type="Repositories",
+        proxy="http://p:1",
+        with_extra=True,
+        redirects=redirects,
+    )
+    results = await c.run()
+
+    assert fetched == ["https://github.com/new/repo"]
+    assert [r["url"] for r in results] == ["https://github.com/new/repo"]
+    assert results[0]["redirected_from"] == "https://github.com/old/repo"
+    assert results[0]["extra"]["owner"] == "new"
+
+
+@pytest.mark.asyncio
+async def test_fetch_url_reroutes_after_block_page(monkeypatch, caplog, fake_resp):
+    pool = ProxyPool.from_proxies(["http://a:1", "http://b:1"])
+    c = Crawler(keywords=["x"], search_type="Repositories", proxy="http://a:1", proxy_pool=pool)
+    used = []
+
+    async def mock_make_request(url, client, semaphore, proxy=None, **kwargs):
+        used.append(proxy)
+        if proxy == "http://a:1":
+            raise BlockedPageError("rate_limit", url)
+        return fake_resp("ok")
+
+    monkeypatch.setattr("github_crawler.crawler.make_request", mock_make_request)
+    monkeypatch.setattr("github_crawler.crawler.get_expo_backoff", lambda attempt: 0)
+
+    resp = await c.fetch_url("https://github.com/a/b")
+
+    assert resp.text == "ok"
+    assert used == ["http://a:1", "http://b:1"]
+    assert c.proxy == "http://b:1"
+    assert pool.statuses[0].blocks == 1
+    assert assert_log_contains(caplog.records, "Retrying via http://b:1")
+    await c.aclose()
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_fetch_url_gives_up_after_reroutes(monkeypatch, caplog):
+    c = Crawler(keywords=["x"], search_type="Repositories", proxy="http://a:1")
+
+    async def mock_make_request(url, client, semaphore, proxy=None, **kwargs):
+        raise BlockedPageError("challenge", url)
+
+    monkeypatch.setattr("github_crawler.crawler.make_request", mock_make_request)
+    monkeypatch.setattr("github_crawler.crawler.get_expo_backoff", lambda attempt: 0)
+
+    assert await c.fetch_url("https://github.com/a/b") is None
+    assert assert_log_contains(caplog.records, "giving up after")
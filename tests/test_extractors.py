@@ -0,0 +1,88 @@
+import logging
+
+import pytest
+
+from github_crawler.extractors import (
+    EXTRACTORS,
+    extract_fields,
+    get_fields,
+    register_extractor,
+)
+from tests.conftest import assert_log_contains
+
+
+def test_repo_fields_from_one_parse(load_fixture):
+    extra = extract_fields(
+        load_fixture("repo_with_langs.html"),
+        "https://github.com/seleniumbase/SeleniumBase",
+        "Repositories",
+    )
+    assert set(extra) == set(get_fields("Repositories"))
+    assert extra["owner"] == "seleniumbase"
+    assert extra["language_stats"]["Python"] == pytest.approx(99.0)
+
+
+def test_repo_stars_prefers_exact_counter(load_fixture):
+    extra = extract_fields(
+        load_fixture("repo_no_langs.html"),
+        "https://github.com/a/b",
+        "Repositories",
+        fields=["stars", "language_stats"],
+    )
+    assert extra == {"stars": 0, "language_stats": {}}
+
+
+def test_issue_fields():
+    page = (
+        "<html><body>"
+        '<h1><bdi class="js-issue-title markdown-title">Crash on start</bdi></h1>'
+        '<span title="Status: Closed" class="State State--merged">Closed</span>'
+        '<a class="author Link--secondary">octocat</a>'
+        '<a class="IssueLabel hx_IssueLabel">bug</a><a class="IssueLabel">help wanted</a>'
+        "</body></html>"
+    )
+    extra = extract_fields(page, "https://github.com/org/repo/issues/7", "Issues")
+    assert extra == {
+        "owner": "org",
+        "title": "Crash on start",
+        "state": "closed",
+        "labels": ["bug", "help wanted"],
+        "author": "octocat",
+    }
+
+
+def test_wiki_fields():
+    page = (
+        "<html><body>"
+        '<h1 class="gh-header-title instapaper_title">Home</h1>'
+        '<div class="gh-header-meta">edited this page '
+        '<relative-time datetime="2024-05-01T10:00:00Z">May 1</relative-time>'
+        '<a href="/org/repo/wiki/Home/_history">12 revisions</a></div>'
+        "</body></html>"
+    )
+    extra = extract_fields(page, "https://github.com/org/repo/wiki/Home", "Wikis")
+    assert extra == {
+        "owner": "org",
+        "title": "Home",
+        "last_updated": "2024-05-01T10:00:00Z",
+        "revisions": 12,
+    }
+
+
+def test_failing_extractor_is_logged_and_skipped(monkeypatch, caplog):
+    caplog.set_level(logging.ERROR)
+    monkeypatch.setitem(EXTRACTORS, "Wikis", dict(EXTRACTORS["Wikis"]))
+
+    @register_extractor("Wikis", "broken")
+    def broken(tree, url):
+        raise RuntimeError("-")
+
+    extra = extract_fields("<html><body></body></html>", "https://github.com/o/r", "Wikis")
+    assert "broken" not in extra
+    assert extra["owner"] == "o"
+    assert assert_log_contains(caplog.records, "Error extracting broken")
+
+
+def test_register_extractor_unknown_type():
+    with pytest.raises(ValueError):
+        register_extractor("Gists", "x")
@@ -0,0 +1,137 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import httpx
+import pytest
+
+from github_crawler.latency import LatencyTracker, RequestTrace, endpoint_of
+from github_crawler.settings import TIMEOUT
+import github_crawler.utils as utils
+from github_crawler.utils import make_request
+
+
+def make_trace(**phases) -> RequestTrace:
+    trace = RequestTrace()
+    trace.phases = phases
+    return trace
+
+
+def test_endpoint_of():
+    assert endpoint_of("https://github.com/search?q=x") == "search"
+    assert endpoint_of("https://github.com/a/b") == "page"
+
+
+def test_no_timeout_until_enough_samples():
+    tracker = LatencyTracker(min_samples=3)
+    for _ in range(2):
+        tracker.record("p", "https://github.com/a/b", make_trace(connect=0.1, read=0.2))
+    assert tracker.timeout("p", "https://github.com/a/b") is None
+
+
+def test_timeout_from_percentile_within_bounds():
+    tracker = LatencyTracker(
+        min_samples=3, percentile=99, factor=2, connect_bounds=(0.5, 4), read_bounds=(1, 5)
+    )
+    for read in (0.5, 0.8, 1.5):
+        tracker.record("p", "https://github.com/a/b", make_trace(connect=0.1, read=read))
+
+    timeout = tracker.timeout("p", "https://github.com/c/d")
+    assert timeout.connect == 0.5
+    assert timeout.read == 3.0
+    assert timeout.write == TIMEOUT
+
+    # Other proxies and endpoints keep the fixed timeout
+    assert tracker.timeout("other", "https://github.com/a/b") is None
+    assert tracker.timeout("p", "https://github.com/search") is None
+
+    tracker.record("p", "https://github.com/a/b", make_trace(read=10.0))
+    assert tracker.timeout("p", "https://github.com/a/b").read == 5
+
+
+def test_read_falls_back_to_elapsed():
+    tracker = LatencyTracker(min_samples=1, factor=1, read_bounds=(0, 10))
+    trace = make_trace(connect=0.5)
+    trace.elapsed = 2.0
+    tracker.record("p", "https://github.com/a/b", trace)
+    assert tracker.timeout("p", "https://github.com/a/b").read == 1.5
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = HTTPServer(("127.0.0.1", 0), OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_make_request_traces_connect_and_read(local_server, sem):
+    tracker = LatencyTracker(min_samples=1)
+    url = f"{local_server}/a/b"
+    async with httpx.AsyncClient() as client:
+        resp = await make_request(url, client, sem, latency=tracker, proxy="p")
+        assert resp.text == "ok"
+        await make_request(url, client, sem, latency=tracker, proxy="p")
+
+    # The second request reuses the keep-alive connection: no connect sample
+    assert len(tracker.samples[("p", "page", "connect")]) == 1
+    assert len(tracker.samples[("p", "page", "read")]) == 2
+    timeout = tracker.timeout("p", url)
+    assert timeout.connect == tracker.bounds["connect"][0]
+    assert timeout.read == tracker.bounds["read"][0]
+
+
+@pytest.mark.asyncio
+async def test_make_request_retries_with_adaptive_timeout(sem, monkeypatch):
+    monkeypatch.setattr(utils, "get_expo_backoff", lambda attempt: 0)
+    tracker = LatencyTracker(min_samples=1, factor=1, read_bounds=(0.2, 5))
+    tracker.record("p", "https://github.com/a/b", make_trace(read=0.1))
+    timeouts = []
+
+    async with httpx.AsyncClient() as client:
+
+        async def mock_get(url, **kw):
+            timeouts.append(kw.get("timeout"))
+            if len(timeouts) < 3:
+                raise httpx.ReadTimeout("stuck")
+            return httpx.Response(200, text="ok", request=httpx.Request("GET", url))
+
+        client.get = mock_get
+        resp = await make_request(
+            "https://github.com/a/b", client, sem, max_retries=2, latency=tracker, proxy="p"
+        )
+
+    assert resp.text == "ok"
+    # Widened on the retry, the fixed client timeout on the last attempt
+    assert [t.read for t in timeouts[:2]] == [0.2, 0.4]
+    assert timeouts[2] is None
+    # Both timeouts were recorded at the timeout they hit
+    assert list(tracker.samples[("p", "page", "read")])[:3] == [0.1, 0.2, 0.4]
+
+
+def test_timeouts_raise_the_adaptive_timeout():
+    tracker = LatencyTracker(min_samples=1, factor=1, read_bounds=(0.1, 5))
+    for _ in range(10):
+        tracker.record("p", "https://github.com/a/b", make_trace(read=0.1))
+    timeout = tracker.timeout("p", "https://github.com/a/b")
+    assert timeout.read == 0.1
+
+    tracker.record_timeout("p", "https://github.com/a/b", httpx.ReadTimeout("stuck"), timeout)
+    tracker.record_timeout(
+        "p", "https://github.com/a/b", httpx.ReadTimeout("stuck"), httpx.Timeout(3.0)
+    )
+    assert tracker.timeout("p", "https://github.com/a/b").read == 3.0
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from github_crawler.crawler import Crawler
+from github_crawler.lazy import LazyResults
+
+
+def make_crawler(monkeypatch, records_count=5, delay=0.0):
+    fetched = []
+
+    async def mock_search(self):
+        return [{"url": f"https://github.com/o/repo{i}"} for i in range(records_count)]
+
+    async def mock_fetch_and_parse(self, record):
+        fetched.append(record["url"])
+        await asyncio.sleep(delay)
+        record["extra"] = {"owner": "o", "n": int(record["url"][-1])}
+
+    monkeypatch.setattr(Crawler, "search", mock_search)
+    monkeypatch.setattr(Crawler, "fetch_and_parse_page", mock_fetch_and_parse)
+    crawler = Crawler(keywords=["x"], search_type="Repositories", proxy="http://p:1")
+    return crawler, fetched
+
+
+@pytest.mark.asyncio
+async def test_extra_fetched_on_demand_with_prefetch(monkeypatch):
+    crawler, fetched = make_crawler(monkeypatch)
+    async with crawler:
+        results = await crawler.run_lazy(prefetch=2)
+        assert isinstance(results, LazyResults)
+        assert len(results) == 5
+        assert results[0].url == "https://github.com/o/repo0"
+        assert fetched == []
+
+        assert (await results[0].extra)["n"] == 0
+        assert fetched == ["https://github.com/o/repo0", "https://github.com/o/repo1"]
+
+        # Prefetched: awaiting again does not fetch
+        assert (await results[1].extra)["n"] == 1
+        assert (await results[0].extra)["n"] == 0
+        assert len(fetched) == 2
+
+        assert (await results[-1].extra)["n"] == 4
+        assert fetched[2:] == ["https://github.com/o/repo4"]
+    assert crawler.client.closed
+
+
+@pytest.mark.asyncio
+async def test_materialize_fetches_everything_once(monkeypatch):
+    crawler, fetched = make_crawler(monkeypatch)
+    async with crawler:
+        results = await crawler.run_lazy(prefetch=3)
+        await results[1].extra
+        records = await results.materialize()
+    assert [r["extra"]["n"] for r in records] == [0, 1, 2, 3, 4]
+    assert sorted(fetched) == [f"https://github.com/o/repo{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_aclose_cancels_pending_enrichment(monkeypatch):
+    crawler, fetched = make_crawler(monkeypatch, delay=10)
+    results = await crawler.run_lazy(prefetch=5)
+    waiter = results[0].extra
+    await asyncio.sleep(0)
+    assert len(crawler.pending) == 1
+
+    await crawler.aclose()
+    assert not crawler.pending
+    assert crawler.client.closed
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+
+@pytest.mark.asyncio
+async def test_run_lazy_returns_none_when_search_fails(monkeypatch):
+    async def failed_search(self):
+        return None
+
+    monkeypatch.setattr(Crawler, "search", failed_search)
+    async with Crawler(keywords=["x"], search_type="Repositories", proxy="http://p:1") as c:
+        assert await c.run_lazy() is None
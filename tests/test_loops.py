@@ -0,0 +1,43 @@
+import asyncio
+import sys
+
+import pytest
+
+from github_crawler.loops import enable_eager_tasks, get_loop_factory, run_with_loop
+
+
+def test_run_with_loop_returns_result():
+    async def answer():
+        await asyncio.sleep(0)
+        return 42
+
+    assert run_with_loop(answer()) == 42
+
+
+def test_unknown_backend_raises():
+    with pytest.raises(ValueError):
+        get_loop_factory("trio")
+
+
+def test_uvloop_missing_raises_runtime_error(monkeypatch):
+    monkeypatch.setitem(sys.modules, "uvloop", None)
+    with pytest.raises(RuntimeError, match="pip install uvloop"):
+        get_loop_factory("uvloop")
+
+
+def test_uvloop_backend_when_installed():
+    pytest.importorskip("uvloop")
+
+    async def loop_module():
+        return type(asyncio.get_running_loop()).__module__
+
+    assert run_with_loop(loop_module(), "uvloop").startswith("uvloop")
+
+
+@pytest.mark.asyncio
+async def test_enable_eager_tasks_matches_python_version():
+    loop = asyncio.get_running_loop()
+    try:
+        assert enable_eager_tasks() is (sys.version_info >= (3, 12))
+    finally:
+        loop.set_task_factory(None)
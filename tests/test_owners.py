@@ -0,0 +1,83 @@
+import asyncio
+import json
+import logging
+import time
+
+import pytest
+
+from github_crawler.owners import OwnerProfiles
+from tests.conftest import assert_log_contains
+
+
+class FakeResp:
+    def __init__(self, text: str):
+        self.text = text
+
+
+@pytest.fixture
+def counting_fetch(load_fixture):
+    calls = []
+
+    async def fetch(url):
+        calls.append(url)
+        await asyncio.sleep(0.01)
+        return FakeResp(load_fixture("owner_user.html"))
+
+    fetch.calls = calls
+    return fetch
+
+
+@pytest.mark.asyncio
+async def test_single_flight_per_owner(counting_fetch):
+    owners = OwnerProfiles()
+    profiles = await asyncio.gather(
+        *(owners.get(login, counting_fetch) for login in ["octocat", "Octocat", "octocat"])
+    )
+    assert counting_fetch.calls == ["https://github.com/octocat"]
+    assert profiles[0]["followers"] == 18100
+    assert profiles[0] == profiles[1] == profiles[2]
+
+    await owners.get("octocat", counting_fetch)
+    assert len(counting_fetch.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_persisted_with_ttl(tmp_path, counting_fetch):
+    await OwnerProfiles(str(tmp_path), ttl=60).get("octocat", counting_fetch)
+    profile = await OwnerProfiles(str(tmp_path), ttl=60).get("octocat", counting_fetch)
+    assert profile["type"] == "user"
+    assert len(counting_fetch.calls) == 1
+
+    owners = OwnerProfiles(str(tmp_path), ttl=60)
+    path = owners.path("octocat")
+    entry = json.loads(open(path, encoding="utf-8").read())
+    entry["stored_at"] = time.time() - 120
+    open(path, "w", encoding="utf-8").write(json.dumps(entry))
+    await owners.get("octocat", counting_fetch)
+    assert len(counting_fetch.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_is_not_retried_in_run(caplog):
+    caplog.set_level(logging.ERROR)
+    calls = []
+
+    async def failing_fetch(url):
+        calls.append(url)
+        return None
+
+    owners = OwnerProfiles()
+    assert await owners.get("ghost", failing_fetch) is None
+    assert await owners.get("ghost", failing_fetch) is None
+    assert calls == ["https://github.com/ghost"]
+    assert assert_log_contains(caplog.records, "Could not get owner profile")
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_fetch(counting_fetch):
+    owners = OwnerProfiles()
+    first = asyncio.ensure_future(owners.get("octocat", counting_fetch))
+    second = asyncio.ensure_future(owners.get("octocat", counting_fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert (await second)["type"] == "user"
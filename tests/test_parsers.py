@@ -2,7 +2,13 @@ import logging
 
 import pytest
 
-from github_crawler.parsers import parse_search_results, parse_language_stats
+from github_crawler.parsers import (
+    parse_search_results,
+    parse_language_stats,
+    parse_result_count,
+    parse_count_label,
+    parse_owner_profile,
+)
 from tests.conftest import assert_log_contains
 
 
@@ -55,3 +61,66 @@ def test_parse_language_stats_logs_error_on_bad_html(caplog):
     langs = parse_language_stats("")  # Use empty string instead of None
     assert langs == {}
     assert assert_log_contains(caplog.records, "Error parsing language stats")
+
+
+@pytest.mark.parametrize(
+    "page,expected",
+    [
+        ('<script>{"payload":{"result_count": 4521}}</script>', 4521),
+        ('<div><span data-testid="resolved-count-label">1.2k results</span></div>', 1200),
+        ('<div><span data-testid="resolved-count-label">1,234 results</span></div>', 1234),
+        ("<div>no count here</div>", None),
+    ],
+)
+def test_parse_result_count(page, expected):
+    assert parse_result_count(page) == expected
+
+
+@pytest.mark.parametrize(
+    "label,expected",
+    [
+        ("11.7k", 11700),
+        ("2M results", 2_000_000),
+        ("2 matches", 2),
+        ("12 more", 12),
+        (".", None),
+        ("", None),
+    ],
+)
+def test_parse_count_label(label, expected):
+    assert parse_count_label(label) == expected
+
+
+def test_parse_result_count_fixture_without_count(load_fixture):
+    assert parse_result_count(load_fixture("search_repos_page.html")) is None
+
+
+@pytest.mark.parametrize(
+    "fixture,expected",
+    [
+        (
+            "owner_user.html",
+            {"type": "user", "followers": 18100, "location": "San Francisco", "public_repos": 8},
+        ),
+        (
+            "owner_org.html",
+            {
+                "type": "organization",
+                "followers": 42300,
+                "location": "San Francisco, CA",
+                "public_repos": 1187,
+            },
+        ),
+    ],
+)
+def test_parse_owner_profile(load_fixture, fixture, expected):
+    assert parse_owner_profile(load_fixture(fixture)) == expected
+
+
+def test_parse_owner_profile_missing_values():
+    assert parse_owner_profile("<html><body></body></html>") == {
+        "type": "user",
+        "followers": None,
+        "location": None,
+        "public_repos": None,
+    }
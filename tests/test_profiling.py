@@ -0,0 +1,84 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from github_crawler.profiling import Profiler
+
+
+@pytest.mark.asyncio
+async def test_profiler_detects_blocked_loop():
+    profiler = Profiler(lag_interval=0.01, slow_callback=0.02)
+    await profiler.start()
+    # Debug mode slows the loop down, so it is not used by default
+    assert not asyncio.get_running_loop().get_debug()
+    await asyncio.sleep(0.03)
+
+    async def blocking():
+        time.sleep(0.1)
+
+    await asyncio.create_task(blocking())
+    await asyncio.sleep(0.03)
+    await profiler.stop()
+
+    report = profiler.report()
+    assert report["loop_lag"]["samples"] > 0
+    assert report["loop_lag"]["max"] >= 0.05
+    assert report["slow_callbacks"]["count"] >= 1
+    assert report["debug_mode"] is False
+    assert not asyncio.get_running_loop().get_debug()
+
+
+@pytest.mark.asyncio
+async def test_profiler_debug_mode_names_slow_callbacks():
+    profiler = Profiler(lag_interval=0.01, slow_callback=0.02, debug=True)
+    await profiler.start()
+    assert asyncio.get_running_loop().get_debug()
+
+    async def blocking():
+        time.sleep(0.05)
+
+    await asyncio.create_task(blocking())
+    await asyncio.sleep(0.03)
+    await profiler.stop()
+
+    report = profiler.report()
+    assert report["debug_mode"] is True
+    assert report["slow_callbacks"]["examples"]
+    assert "debug mode was on" in profiler.summary()
+    assert not asyncio.get_running_loop().get_debug()
+
+
+@pytest.mark.asyncio
+async def test_profiler_stage_timers():
+    profiler = Profiler()
+    with profiler.stage("parse"):
+        sum(range(10000))
+    with profiler.stage("parse"):
+        pass
+    with profiler.stage("fetch"):
+        await asyncio.sleep(0.02)
+
+    assert profiler.stages["parse"]["calls"] == 2
+    assert profiler.stages["fetch"]["wall"] >= 0.02
+    assert profiler.stages["fetch"]["cpu"] < profiler.stages["fetch"]["wall"]
+
+
+@pytest.mark.asyncio
+async def test_profiler_report_with_cprofile_and_tracemalloc(tmp_path):
+    profiler = Profiler(cprofile=True, trace_memory=True)
+    await profiler.start()
+    data = [str(i) for i in range(1000)]
+    await asyncio.sleep(0)
+    await profiler.stop()
+
+    path = tmp_path / "profile.json"
+    profiler.write_report(str(path))
+
+    report = json.loads(path.read_text())
+    assert report["cprofile"]
+    assert report["memory"]["peak_bytes"] > 0
+    assert (tmp_path / "profile.json.prof").exists()
+    assert "wall time" in profiler.summary()
+    assert data
@@ -0,0 +1,90 @@
+import logging
+
+import httpx
+import pytest
+import respx
+
+from github_crawler.proxies import ProxyPool, ProxyStatus, preflight_proxies, probe_proxy
+from tests.conftest import assert_log_contains
+
+HEALTH_URL = "http://health.local/"
+
+
+@pytest.mark.asyncio
+async def test_probe_proxy_success():
+    with respx.mock() as router:
+        router.head(HEALTH_URL).mock(return_value=httpx.Response(200))
+        status = await probe_proxy("http://p:1", HEALTH_URL)
+
+    assert status is not None
+    assert status.proxy == "http://p:1"
+    assert status.latency >= 0
+    await status.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_probe_proxy_dead_returns_none(caplog):
+    caplog.set_level(logging.WARNING)
+    with respx.mock() as router:
+        router.head(HEALTH_URL).mock(side_effect=httpx.ConnectError("-"))
+        status = await probe_proxy("http://p:1", HEALTH_URL)
+
+    assert status is None
+    assert assert_log_contains(caplog.records, "failed preflight")
+
+
+@pytest.mark.asyncio
+async def test_preflight_drops_dead_and_ranks(monkeypatch, caplog):
+    caplog.set_level(logging.WARNING)
+    latencies = {"http://fast:1": 0.1, "http://slow:1": 0.9}
+    prewarmed = []
+
+    async def fake_probe(proxy, health_url, timeout, logger):
+        if proxy not in latencies:
+            return None
+        return ProxyStatus(proxy, latencies[proxy], httpx.AsyncClient())
+
+    async def fake_prewarm(client, url, connections, logger):
+        prewarmed.append((client, connections))
+
+    monkeypatch.setattr("github_crawler.proxies.probe_proxy", fake_probe)
+    monkeypatch.setattr("github_crawler.proxies.prewarm_client", fake_prewarm)
+
+    pool = await preflight_proxies(
+        ["http://slow:1", "http://dead:1", "http://fast:1"], HEALTH_URL, prewarm=3
+    )
+
+    assert pool.proxies == ["http://fast:1", "http://slow:1"]
+    assert prewarmed == [(pool.best.client, 3)]
+    assert assert_log_contains(caplog.records, "Dropped 1 of 3 proxies")
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_pool_aclose_keeps_selected_client():
+    fast = ProxyStatus("http://fast:1", 0.1, httpx.AsyncClient())
+    slow = ProxyStatus("http://slow:1", 0.5, httpx.AsyncClient())
+    pool = ProxyPool([slow, fast])
+
+    await pool.aclose(keep=pool.best)
+
+    assert pool.best is fast
+    assert not fast.client.is_closed
+    assert slow.client.is_closed
+    await fast.client.aclose()
+
+
+def test_pool_takes_blocked_proxies_out_of_rotation(caplog, monkeypatch):
+    monkeypatch.setattr("github_crawler.proxies.PROXY_MAX_BLOCKS", 2)
+    pool = ProxyPool.from_proxies(["http://a:1", "http://b:1", "http://c:1"])
+
+    pool.record_block("http://a:1", logging.getLogger("test"))
+    assert pool.next_proxy(exclude="http://b:1").proxy == "http://c:1"
+
+    pool.record_block("http://c:1", logging.getLogger("test"))
+    pool.record_block("http://c:1", logging.getLogger("test"))
+    assert assert_log_contains(caplog.records, "taking it out of rotation")
+    assert pool.next_proxy(exclude="http://b:1").proxy == "http://a:1"
+
+    pool.record_block("http://a:1", logging.getLogger("test"))
+    assert pool.next_proxy(exclude="http://b:1") is None
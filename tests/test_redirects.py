@@ -0,0 +1,76 @@
+import json
+
+import httpx
+import pytest
+import respx
+
+from github_crawler.redirects import RedirectMap
+
+
+def test_resolve_follows_chain_and_stops_on_cycle():
+    redirects = RedirectMap()
+    redirects.record("https://github.com/a/old", "https://github.com/a/mid")
+    redirects.record("https://github.com/a/mid", "https://github.com/b/new")
+    assert redirects.resolve("/a/old") == "https://github.com/b/new"
+    assert redirects.resolve("https://github.com/c/d") == "https://github.com/c/d"
+
+    redirects.record("https://github.com/b/new", "https://github.com/a/old")
+    assert redirects.resolve("https://github.com/a/old").startswith("https://github.com/")
+
+
+def test_resolve_skips_normalizing_when_not_needed(monkeypatch):
+    def fail(url):
+        raise AssertionError(f"normalized {url}")
+
+    redirects = RedirectMap()
+    monkeypatch.setattr("github_crawler.redirects.get_normalized_url", fail)
+    assert redirects.resolve("https://github.com/a/b") == "https://github.com/a/b"
+
+    redirects.moved["https://github.com/a/old"] = "https://github.com/a/new"
+    assert redirects.resolve("https://github.com/a/old") == "https://github.com/a/new"
+
+
+@pytest.mark.asyncio
+async def test_record_response_only_permanent_redirects():
+    redirects = RedirectMap()
+    with respx.mock() as router:
+        router.get("https://github.com/old/repo").mock(
+            return_value=httpx.Response(301, headers={"Location": "https://github.com/new/repo"})
+        )
+        router.get("https://github.com/new/repo").mock(return_value=httpx.Response(200))
+        router.get("https://github.com/private/repo").mock(
+            return_value=httpx.Response(302, headers={"Location": "https://github.com/login"})
+        )
+        router.get("https://github.com/login").mock(return_value=httpx.Response(200))
+        async with httpx.AsyncClient(follow_redirects=True) as client:
+            moved = await client.get("https://github.com/old/repo")
+            login = await client.get("https://github.com/private/repo")
+            direct = await client.get("https://github.com/new/repo")
+
+    assert redirects.record_response("https://github.com/old/repo", moved) == (
+        "https://github.com/new/repo"
+    )
+    assert redirects.record_response("https://github.com/private/repo", login) == (
+        "https://github.com/login"
+    )
+    assert redirects.record_response("https://github.com/new/repo", direct) == (
+        "https://github.com/new/repo"
+    )
+    assert redirects.moved == {"https://github.com/old/repo": "https://github.com/new/repo"}
+
+
+def test_save_merges_with_other_writers(tmp_path):
+    path = str(tmp_path / "redirects.json")
+    first = RedirectMap(path)
+    second = RedirectMap(path)
+    first.record("https://github.com/a/old", "https://github.com/a/new")
+    second.record("https://github.com/b/old", "https://github.com/b/new")
+    first.save()
+    second.save()
+
+    saved = json.loads(open(path, encoding="utf-8").read())
+    assert saved == {
+        "https://github.com/a/old": "https://github.com/a/new",
+        "https://github.com/b/old": "https://github.com/b/new",
+    }
+    assert RedirectMap(path).resolve("https://github.com/a/old") == "https://github.com/a/new"
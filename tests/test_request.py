@@ -1,9 +1,14 @@
+import asyncio
 import logging
+import time
 
 import pytest
 import httpx
 import respx
 
+from github_crawler.archive import WarcWriter, read_warc
+from github_crawler.blocks import BlockedPageError
+from github_crawler.profiling import Profiler
 from github_crawler.utils import make_request
 from tests.conftest import assert_log_contains
 
@@ -100,3 +105,109 @@ async def test_unexpected_exception_returns_none(caplog, sem):
 
     assert resp is None
     assert assert_log_contains(caplog.records, "Unexpected error")
+
+
+@pytest.mark.asyncio
+async def test_deadline_passed_skips_request(caplog, sem):
+    caplog.set_level(logging.WARNING)
+    url = "https://example.com/late"
+    with respx.mock(assert_all_called=False) as router:
+        route = router.get(url).mock(return_value=httpx.Response(200, text="ok"))
+        async with httpx.AsyncClient() as client:
+            resp = await make_request(
+                url, client, sem, deadline=time.monotonic() - 1
+            )
+
+    assert resp is None
+    assert not route.called
+    assert assert_log_contains(caplog.records, "Deadline exceeded before requesting")
+
+
+@pytest.mark.asyncio
+async def test_deadline_stops_backoff(caplog, sem):
+    caplog.set_level(logging.WARNING)
+    url = "https://example.com/retry-late"
+    with respx.mock() as router:
+        route = router.get(url).mock(return_value=httpx.Response(503))
+        async with httpx.AsyncClient() as client:
+            resp = await make_request(
+                url, client, sem, max_retries=5, deadline=time.monotonic() + 0.1
+            )
+
+    assert resp is None
+    assert route.call_count == 1
+    assert assert_log_contains(caplog.records, "No time left to retry")
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_slow_request(caplog, sem):
+    caplog.set_level(logging.WARNING)
+    url = "https://example.com/slow"
+
+    async with httpx.AsyncClient() as client:
+
+        async def mock_get(url_param, **kw):
+            await asyncio.sleep(5)
+            return httpx.Response(200, text="ok")
+
+        client.get = mock_get
+
+        resp = await make_request(url, client, sem, deadline=time.monotonic() + 0.05)
+
+    assert resp is None
+    assert assert_log_contains(caplog.records, "Deadline exceeded while requesting")
+
+
+@pytest.mark.asyncio
+async def test_successful_response_is_archived(tmp_path, sem):
+    url = "https://example.com/archived"
+    path = str(tmp_path / "out.warc.gz")
+    with respx.mock() as router:
+        router.get(url).mock(
+            side_effect=[httpx.Response(503), httpx.Response(200, text="ok")]
+        )
+        async with httpx.AsyncClient() as client:
+            with WarcWriter(path) as archive:
+                await make_request(url, client, sem, max_retries=1, archive=archive)
+
+    records = list(read_warc(path))
+    assert [(r.url, r.text) for r in records] == [(url, "ok")]
+
+
+@pytest.mark.asyncio
+async def test_block_page_raises_and_is_not_archived(tmp_path, sem):
+    url = "https://example.com/blocked"
+    path = str(tmp_path / "out.warc.gz")
+    with respx.mock() as router:
+        route = router.get(url).mock(
+            return_value=httpx.Response(200, text="<title>Too Many Requests</title>")
+        )
+        async with httpx.AsyncClient() as client:
+            with WarcWriter(path) as archive:
+                with pytest.raises(BlockedPageError) as info:
+                    await make_request(url, client, sem, max_retries=3, archive=archive)
+
+    assert info.value.kind == "rate_limit"
+    assert route.call_count == 1
+    assert list(read_warc(path)) == []
+
+
+@pytest.mark.asyncio
+async def test_profiler_separates_semaphore_wait_fetch_and_backoff(monkeypatch):
+    monkeypatch.setattr("github_crawler.utils.get_expo_backoff", lambda attempt: 0.01)
+    profiler = Profiler()
+    sem = asyncio.Semaphore(1)
+    await sem.acquire()
+    url = "https://example.com/profiled"
+    with respx.mock() as router:
+        router.get(url).mock(side_effect=[httpx.Response(503), httpx.Response(200, text="ok")])
+        async with httpx.AsyncClient() as client:
+            asyncio.get_running_loop().call_later(0.05, sem.release)
+            resp = await make_request(url, client, sem, max_retries=1, profiler=profiler)
+
+    assert resp.text == "ok"
+    assert profiler.stages["semaphore"]["calls"] == 2
+    assert profiler.stages["semaphore"]["wall"] >= 0.04
+    assert profiler.stages["fetch"]["calls"] == 2
+    assert profiler.stages["fetch"]["wall"] < profiler.stages["semaphore"]["wall"]
+    assert profiler.stages["backoff"]["calls"] == 1
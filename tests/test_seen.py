@@ -0,0 +1,66 @@
+import logging
+
+import pytest
+
+from github_crawler.seen import SeenFilter, filter_size
+from tests.conftest import assert_log_contains
+
+
+def test_filter_size():
+    bits, hashes = filter_size(1_000_000, 0.001)
+    # About 1.8 MB per million URLs at 0.1%
+    assert 14_000_000 < bits < 14_500_000
+    assert hashes == 10
+
+
+def test_add_and_contains_normalized(tmp_path):
+    with SeenFilter(str(tmp_path / "seen"), capacity=1000, fp_rate=0.01) as seen:
+        assert seen.add("https://github.com/a/b")
+        assert not seen.add("/a/b#readme")
+        assert "https://github.com/a/b" in seen
+        assert "https://github.com/a/c" not in seen
+        assert len(seen) == 1
+
+
+def test_persists_and_keeps_sizing(tmp_path, caplog):
+    caplog.set_level(logging.INFO)
+    path = str(tmp_path / "seen")
+    with SeenFilter(path, capacity=1000, fp_rate=0.01) as seen:
+        seen.add("https://github.com/a/b")
+
+    with SeenFilter(path, capacity=5000, fp_rate=0.001) as seen:
+        assert "https://github.com/a/b" in seen
+        assert seen.capacity == 1000
+    assert assert_log_contains(caplog.records, "Using the sizing of existing seen-URL filter")
+
+
+def test_shared_between_instances(tmp_path):
+    path = str(tmp_path / "seen")
+    with SeenFilter(path, capacity=1000) as first, SeenFilter(path) as second:
+        first.add("https://github.com/a/b")
+        assert "https://github.com/a/b" in second
+        second.add("https://github.com/c/d")
+        assert len(first) == 2
+
+
+def test_false_positive_rate(tmp_path):
+    with SeenFilter(str(tmp_path / "seen"), capacity=2000, fp_rate=0.01) as seen:
+        for i in range(2000):
+            seen.add(f"https://github.com/a/repo{i}")
+        false_positives = sum(f"https://github.com/b/repo{i}" in seen for i in range(20000))
+    assert false_positives / 20000 < 0.02
+
+
+def test_warns_past_capacity(tmp_path, caplog):
+    caplog.set_level(logging.WARNING)
+    with SeenFilter(str(tmp_path / "seen"), capacity=1) as seen:
+        seen.add("https://github.com/a/b")
+        seen.add("https://github.com/c/d")
+    assert assert_log_contains(caplog.records, "holds more than its capacity")
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "seen"
+    path.write_bytes(b"not a filter" * 10)
+    with pytest.raises(ValueError, match="Not a seen-URL filter file"):
+        SeenFilter(str(path))
@@ -0,0 +1,75 @@
+from datetime import date
+
+import pytest
+
+from github_crawler.settings import SHARD_LANGUAGES, SHARD_STARS_MAX
+from github_crawler.sharding import (
+    Shard,
+    OTHER_LANGUAGES,
+    split_created,
+    split_stars,
+    language_qualifier,
+)
+
+
+def test_root_shard_query_is_keywords():
+    assert Shard("nova openstack").query == "nova openstack"
+
+
+def test_split_created_bisects_and_covers_range():
+    start, end = date(2020, 1, 1), date(2020, 1, 10)
+    left, right = split_created((start, end))
+    assert left == (date(2020, 1, 1), date(2020, 1, 5))
+    assert right == (date(2020, 1, 6), date(2020, 1, 10))
+
+
+def test_split_created_single_day_is_final():
+    day = date(2020, 1, 1)
+    assert split_created((day, day)) == []
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ((0, None), [(0, SHARD_STARS_MAX), (SHARD_STARS_MAX + 1, None)]),
+        ((SHARD_STARS_MAX + 1, None), []),
+        ((0, 9), [(0, 4), (5, 9)]),
+        ((3, 3), []),
+    ],
+)
+def test_split_stars(value, expected):
+    assert split_stars(value) == expected
+
+
+def test_shard_split_formats_qualifiers():
+    shard = Shard("nova", {"stars": (0, 9)})
+    children = shard.split(["stars"])
+    assert [c.query for c in children] == ["nova stars:0..4", "nova stars:5..9"]
+    assert all(c.depth == 1 for c in children)
+
+
+def test_shard_split_falls_through_to_next_qualifier():
+    shard = Shard("nova", {"stars": (3, 3), "created": (date(2020, 1, 1), date(2020, 1, 2))})
+    children = shard.split(["stars", "created"])
+    assert [c.query for c in children] == [
+        "nova stars:3..3 created:2020-01-01..2020-01-01",
+        "nova stars:3..3 created:2020-01-02..2020-01-02",
+    ]
+
+
+def test_shard_split_by_language_adds_rest_shard():
+    children = Shard("nova").split(["language"])
+    assert len(children) == len(SHARD_LANGUAGES) + 1
+    assert children[0].query == f"nova language:{SHARD_LANGUAGES[0]}"
+    assert children[-1].ranges["language"] == OTHER_LANGUAGES
+    assert children[-1].split(["language"]) == []
+
+
+def test_language_qualifier_negates_known_languages():
+    assert language_qualifier(OTHER_LANGUAGES).startswith(f"-language:{SHARD_LANGUAGES[0]}")
+    assert language_qualifier("Visual Basic") == 'language:"Visual Basic"'
+
+
+def test_unsplittable_shard_returns_empty():
+    shard = Shard("nova", {"stars": (1, 1)})
+    assert shard.split(["stars"]) == []
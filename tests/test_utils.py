@@ -1,7 +1,7 @@
 import pytest
 
 # Adjust imports to your structure
-from github_crawler.utils import get_normalized_url, normalize_proxy
+from github_crawler.utils import get_normalized_url, normalize_proxy, dedupe_results
 
 
 @pytest.mark.parametrize(
@@ -35,3 +35,15 @@ def test_normalize_proxy_ok(inp, expected):
 def test_normalize_proxy_bad(bad):
     with pytest.raises(ValueError):
         normalize_proxy(bad)
+
+
+def test_dedupe_results_keeps_first_occurrence():
+    results = [
+        {"url": "https://github.com/a/b", "n": 1},
+        {"url": "https://github.com/c/d"},
+        {"url": "https://github.com/a/b", "n": 2},
+    ]
+    assert dedupe_results(results) == [
+        {"url": "https://github.com/a/b", "n": 1},
+        {"url": "https://github.com/c/d"},
+    ]
@@ -0,0 +1,126 @@
+import logging
+
+import pytest
+
+from github_crawler.crawler import Crawler
+from github_crawler.workers import merge_batch, run_batch, split_proxies
+from tests.conftest import assert_log_contains
+
+
+@pytest.mark.parametrize(
+    "proxies,workers,expected",
+    [
+        (["a", "b", "c", "d"], 2, [["a", "c"], ["b", "d"]]),
+        (["a"], 3, [["a"], ["a"], ["a"]]),
+        (["a", "b", "c"], 2, [["a", "c"], ["b"]]),
+    ],
+)
+def test_split_proxies(proxies, workers, expected):
+    assert split_proxies(proxies, workers) == expected
+
+
+def test_merge_batch_keeps_query_order_and_tags(caplog):
+    caplog.set_level(logging.ERROR)
+    queries = [["nova"], ["css", "html"], ["broken"]]
+    collected = {1: ([{"url": "u2"}], {"repos": 1}), 0: ([{"url": "u1"}], None), 2: (None, None)}
+    merged, reports = merge_batch(queries, collected, logging.getLogger("test"))
+    assert merged == [
+        {"url": "u1", "query": "nova"},
+        {"url": "u2", "query": "css html"},
+    ]
+    assert reports == {"css html": {"repos": 1}}
+    assert assert_log_contains(caplog.records, "No results for query 'broken'")
+
+
+@pytest.mark.asyncio
+async def test_run_batch_in_process(monkeypatch):
+    seen = []
+
+    async def fake_run(self):
+        seen.append((self.keywords, self.proxy, self.with_extra))
+        return [{"url": f"https://github.com/{self.keywords[0]}/repo"}]
+
+    monkeypatch.setattr(Crawler, "run", fake_run)
+    results, reports = await run_batch(
+        [["a"], ["b"]],
+        ["http://p:1"],
+        {"search_type": "Repositories", "with_extra": True},
+    )
+
+    assert results == [
+        {"url": "https://github.com/a/repo", "query": "a"},
+        {"url": "https://github.com/b/repo", "query": "b"},
+    ]
+    assert reports == {}
+    assert sorted(seen) == [(["a"], "http://p:1", True), (["b"], "http://p:1", True)]
+
+
+@pytest.mark.asyncio
+async def test_run_batch_worker_processes_report_failures(caplog):
+    """
+    Worker processes crawl through a proxy that refuses connections; each query
+    fails and the parent still collects every worker's completion.
+    """
+    caplog.set_level(logging.ERROR)
+    results, _ = await run_batch(
+        [["a"], ["b"]],
+        ["http://127.0.0.1:9"],
+        {"search_type": "Repositories", "deadline": 0.5},
+        workers=2,
+    )
+    assert results == []
+    assert assert_log_contains(caplog.records, "No results for query 'a'")
+    assert assert_log_contains(caplog.records, "No results for query 'b'")
+
+
+@pytest.mark.asyncio
+async def test_run_batch_language_reports_per_query(monkeypatch):
+    pytest.importorskip("numpy")
+
+    async def fake_run(self):
+        extra = {"language_stats": {self.keywords[0]: 100.0}, "stars": 1}
+        return [{"url": f"https://github.com/{self.keywords[0]}/repo", "extra": extra}]
+
+    monkeypatch.setattr(Crawler, "run", fake_run)
+    _, reports = await run_batch(
+        [["Go"], ["Rust"]],
+        ["http://p:1"],
+        {"search_type": "Repositories", "with_extra": True},
+        language_report=True,
+    )
+
+    assert reports["Go"]["top"] == ["Go"]
+    assert reports["Rust"]["top"] == ["Rust"]
+
+
+@pytest.mark.asyncio
+async def test_run_batch_fetches_pages_shared_by_queries_once(monkeypatch):
+    monkeypatch.setattr("github_crawler.workers.MAX_CONCURRENT_QUERIES", 1)
+    fetched = []
+
+    async def fake_search(self):
+        return [
+            {"url": "https://github.com/o/shared"},
+            {"url": f"https://github.com/o/{self.keywords[0]}"},
+        ]
+
+    async def fake_fetch_and_parse_page(self, record):
+        fetched.append(record["url"])
+        record["extra"] = {"owner": "o"}
+        self.extra_cache[record["url"]] = record["extra"]
+
+    monkeypatch.setattr(Crawler, "search", fake_search)
+    monkeypatch.setattr(Crawler, "fetch_and_parse_page", fake_fetch_and_parse_page)
+    results, _ = await run_batch(
+        [["a"], ["b"]],
+        ["http://p:1"],
+        {"search_type": "Repositories", "with_extra": True},
+    )
+
+    assert sorted(fetched) == [
+        "https://github.com/o/a",
+        "https://github.com/o/b",
+        "https://github.com/o/shared",
+    ]
+    assert all(record["extra"] == {"owner": "o"} for record in results)
+    assert len(results) == 4